@@ -0,0 +1,259 @@
+"""
+Serve KPIs and chart series as JSON over local HTTP, without Streamlit.
+
+Run from the repository root:
+
+    python api.py                          # http://127.0.0.1:8502
+    python api.py --host 0.0.0.0 --port 9000
+
+Endpoints (program defaults to the first configured one, year to
+"All Years"):
+
+    GET /api/programs
+    GET /api/years?program=law-obrero
+    GET /api/kpis?program=law-obrero&year=2020
+    GET /api/series?program=All%20Programs
+
+Every data response carries an ETag derived from the program's data
+version. A client that sends it back in If-None-Match gets an empty 304
+until the data changes; answering one costs a cache lookup, no metric
+computation or serialization.
+
+Errors are answered as {"error": message}: 400 or 404 for a bad request,
+503 when the data cannot be loaded.
+"""
+
+# -------------------------------
+# Imports
+# -------------------------------
+import argparse
+import hashlib
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from cachetools import LRUCache
+
+from config import DEFAULT_PROGRAM, PROGRAMS
+from utils.chart_series import chart_frames
+from utils.data_cache import check_data_version, load_rollup
+from utils.metric_store import get_metrics
+from utils.metrics import ALL_YEARS, lookup_kpis, kpi_card_values
+from utils.partitions import ALL_PROGRAMS, format_program
+from utils.telemetry import increment, span
+
+# -------------------------------
+# API Settings
+# -------------------------------
+
+HOST = "127.0.0.1"
+PORT = 8502
+
+# Part of every ETag; bump when the response format changes so clients
+# holding old ETags get the new format
+API_VERSION = 1
+
+# Serialized responses kept in memory, keyed by endpoint, program, year
+# and data version
+RESPONSE_CACHE_SIZE = 256
+
+_response_cache = LRUCache(maxsize=RESPONSE_CACHE_SIZE)
+_response_lock = threading.Lock()
+
+
+class ApiError(Exception):
+    """A request the API answers with an HTTP error status and a message."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# -------------------------------
+# Responses
+# -------------------------------
+
+def _partitions(program):
+    if program == ALL_PROGRAMS:
+        return list(PROGRAMS)
+    if program in PROGRAMS:
+        return [program]
+    raise ApiError(400, f"Unknown program {program!r}")
+
+
+def _records(df):
+    """A frame as a list of row dicts; NaN becomes null."""
+    return json.loads(df.to_json(orient="records"))
+
+
+def _number(value):
+    return None if value != value else float(value)  # NaN -> null
+
+
+def _year(frames, year):
+    if year in (None, "", ALL_YEARS):
+        return ALL_YEARS
+    years = frames["enrollment"]["Year"].dropna().unique().tolist()
+    try:
+        if int(year) in years:
+            return int(year)
+    except ValueError:
+        pass
+    raise ApiError(404, f"No data for year {year!r}")
+
+
+def years_body(program, frames, year, metrics=None):
+    return {
+        "program": program,
+        "label": format_program(program),
+        "years": [int(y) for y in frames["enrollment"]["Year"].dropna().unique()]
+    }
+
+
+def kpis_body(program, frames, year, metrics):
+    row = lookup_kpis(metrics.kpi_table, year)
+    return {
+        "program": program,
+        "year": year,
+        "kpis": [
+            {
+                **card,
+                "previous": None if year == ALL_YEARS else _number(row[(card["title"], "previous")]),
+                "delta": None if year == ALL_YEARS else _number(row[(card["title"], "delta")])
+            }
+            for card in kpi_card_values(metrics.kpi_table, year)
+        ]
+    }
+
+
+def series_body(program, frames, year, metrics):
+    series = chart_frames(frames["enrollment"], metrics.grad_df, metrics.cohort_df, metrics.dropout_df, year)
+    return {"program": program, "year": year, "series": {chart: _records(df) for chart, df in series.items()}}
+
+
+# path -> (body builder, whether it needs the materialized metrics)
+ENDPOINTS = {
+    "/api/years": (years_body, False),
+    "/api/kpis": (kpis_body, True),
+    "/api/series": (series_body, True)
+}
+
+
+def make_etag(program, version):
+    """Quoted ETag of a program's data version, or None if the version is unknown."""
+    if version is None or (isinstance(version, tuple) and any(v is None for _, v in version)):
+        return None
+    digest = hashlib.sha1(repr((API_VERSION, program, version)).encode("utf-8")).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header value names the ETag (weak match, as for GET)."""
+    if not if_none_match or etag is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+def handle(path, query, if_none_match=None):
+    """
+    Answer a GET request; returns (status, body_bytes, etag). Raises
+    ApiError for a bad request.
+    """
+    if path == "/api/programs":
+        programs = [{"program": p, "label": format_program(p)} for p in list(PROGRAMS) + [ALL_PROGRAMS]]
+        return 200, json.dumps({"programs": programs}).encode("utf-8"), None
+    if path not in ENDPOINTS:
+        raise ApiError(404, f"Unknown endpoint {path!r}")
+
+    program = query.get("program", [DEFAULT_PROGRAM])[0]
+    year = query.get("year", [None])[0]
+    partitions = _partitions(program)
+
+    # Only the version is checked before answering a matching conditional
+    # request; no frames are copied and nothing is computed
+    version = check_data_version(partitions)
+    etag = make_etag(program, version)
+    if etag_matches(if_none_match, etag):
+        increment("api", endpoint=path, result="not_modified")
+        return 304, b"", etag
+
+    key = (path, program, year, version)
+    with _response_lock:
+        body = _response_cache.get(key) if etag else None
+    if body is not None:
+        increment("api", endpoint=path, result="hit")
+        return 200, body, etag
+
+    increment("api", endpoint=path, result="miss")
+    build, needs_metrics = ENDPOINTS[path]
+    with span(f"api.{path.rsplit('/', 1)[-1]}"):
+        # A refresh may have landed since the check; label the response
+        # with the version of the frames actually used
+        frames, version = load_rollup(partitions)
+        etag, key = make_etag(program, version), (path, program, year, version)
+        year = _year(frames, year)
+        metrics = get_metrics(tuple(partitions), version, frames) if needs_metrics else None
+        body = json.dumps(build(program, frames, year, metrics)).encode("utf-8")
+
+    if etag:
+        with _response_lock:
+            _response_cache[key] = body
+    return 200, body, etag
+
+# -------------------------------
+# HTTP Server
+# -------------------------------
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "DashboardAPI/1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        try:
+            status, body, etag = handle(url.path.rstrip("/"), parse_qs(url.query), self.headers.get("If-None-Match"))
+        except ApiError as error:
+            status, body, etag = error.status, json.dumps({"error": str(error)}).encode("utf-8"), None
+        except Exception as error:
+            # Storage unreachable with nothing cached, or a failed computation:
+            # answer in JSON like any other error instead of dropping the connection
+            increment("api", endpoint=url.path.rstrip("/"), result="error")
+            status, etag = 503, None
+            body = json.dumps({"error": f"Data unavailable: {error}"}).encode("utf-8")
+
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            # Cacheable, but revalidated with If-None-Match on every use
+            self.send_header("Cache-Control", "no-cache")
+        if status != 304:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+
+def serve(host=HOST, port=PORT):
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    print(f"Serving the dashboard API on http://{host}:{server.server_port}/api/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default=HOST, help="address to bind (default: local only)")
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args(argv)
+    serve(args.host, args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
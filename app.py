@@ -1,7 +1,10 @@
+import importlib
+import sys
+
 import streamlit as st
 from styles import apply_styles
 from auth import init_auth
-from dashboard import dashboard, upload, about
+from utils.telemetry import page_run, span
 
 # -------------------------------
 # Streamlit App Configuration
@@ -25,29 +28,63 @@ st.sidebar.markdown(
     unsafe_allow_html=True
 )
 
+# Pages are listed by module and imported the first time they are shown,
+# so a cold start only pays for the page being opened; the About page
+# never loads pandas, altair or gspread (see DATA_FREE_PAGES below)
 tabs = {
-    "🏠 Dashboard": dashboard.show,   
-    "🗃️ Data": upload.show,
-    "ℹ️ About": about.show   
+    "🏠 Dashboard": "dashboard.dashboard",
+    "🗃️ Data": "dashboard.upload",
+    "ℹ️ About": "dashboard.about"
 }
 
+# Pages that show no program data; they do not start the prefetcher
+DATA_FREE_PAGES = {"dashboard.about"}
+
+# Admin-only performance panel, listed once the Data page is unlocked
+if st.session_state.get("upload_auth"):
+    tabs["🛠️ Debug"] = "dashboard.debug"
+
+
+def load_page(module_name):
+    """Import a page module, timing the first import as an "import.<module>" span."""
+    if module_name in sys.modules:
+        return importlib.import_module(module_name)
+    with span(f"import.{module_name}"):
+        return importlib.import_module(module_name)
+
+
 # Handle sidebar navigation button clicks
-for label, page_func in tabs.items():
+for label in tabs:
     if st.sidebar.button(label, use_container_width=True, key=label):
         st.session_state.page = label 
 
-# Set default page on initial load
-if "page" not in st.session_state:
+# Set default page on initial load (or if the page is no longer listed)
+if st.session_state.get("page") not in tabs:
     st.session_state.page = list(tabs.keys())[0]
 
 # -------------------------------
 # Render Selected Page
 # -------------------------------
-tabs[st.session_state.page]()
+# Each rerun is timed, with a span breakdown, for the debug panel; a
+# page's first import is part of its first run
+with page_run(st.session_state.page):
+    load_page(tabs[st.session_state.page]).show()
 
 # -------------------------------
 # Footer
 # -------------------------------
 st.markdown("---")
 st.markdown("Made with ❤️ using Streamlit")
-  
\ No newline at end of file
+  
+
+# -------------------------------
+# Warm the Shared Data Cache
+# -------------------------------
+# Runs once per process, after the first data page has been painted (it
+# imports pandas, so the About page does not start it); the default
+# program is then fetched in the background, and every program someone
+# opens is kept fresh from then on (see utils/prefetch.py)
+if tabs[st.session_state.page] not in DATA_FREE_PAGES:
+    from utils.prefetch import start_prefetcher
+
+    start_prefetcher()
@@ -1,8 +1,9 @@
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-
 def init_auth():
+    # Imported on call; app.py imports this module on every cold start
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+
     scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
     creds = ServiceAccountCredentials.from_json_keyfile_name("assets/credentials.json", scope)
     client = gspread.authorize(creds)
-    return client
\ No newline at end of file
+    return client
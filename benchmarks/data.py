@@ -0,0 +1,132 @@
+# -------------------------------
+# Imports
+# -------------------------------
+import numpy as np
+import pandas as pd
+
+from config import SHEET_COLUMNS, SHEET_INDEXES, coerce_frame
+
+# -------------------------------
+# Synthetic Sheet Data
+# -------------------------------
+# Rows look like the real sheets: sorted years with several rows per year
+# once the row count passes the number of distinct years, counts in a
+# realistic range and a few blank cells.
+
+FIRST_YEAR = 1950
+MAX_YEARS = 75
+BLANK_FRACTION = 0.01
+
+
+def synthetic_grids(rows, seed=0):
+    """Return {sheet_key: values grid (header first)} with `rows` data rows per sheet."""
+    rng = np.random.default_rng(seed)
+    years = np.sort(FIRST_YEAR + rng.integers(0, min(rows, MAX_YEARS), rows))
+
+    grids = {}
+    for sheet_key, columns in SHEET_COLUMNS.items():
+        counts = rng.integers(0, 200, size=(rows, len(columns) - 1)).astype(object)
+        counts[rng.random(counts.shape) < BLANK_FRACTION] = ""
+        body = np.column_stack([years.astype(object), counts])
+        grids[sheet_key] = [list(columns)] + body.tolist()
+    return grids
+
+
+def synthetic_frames(rows, seed=0):
+    """Return typed frames like data_cache.load_sheet_data, without a client."""
+    frames = {}
+    for sheet_key, grid in synthetic_grids(rows, seed).items():
+        df = pd.DataFrame(grid[1:], columns=grid[0]).replace("", None)
+        frames[sheet_key] = coerce_frame(df, sheet_key)
+    return frames
+
+# -------------------------------
+# Stubbed Google Sheets Client
+# -------------------------------
+# Implements the gspread calls the app makes, served from in-memory grids,
+# so the real read path (batched values request, grid parsing, coercion)
+# runs without credentials or network.
+
+class StubWorksheet:
+    def __init__(self, title):
+        self.title = title
+
+
+class StubWorkbook:
+    def __init__(self, grids, version):
+        self.grids = grids
+        self.version = version
+        self.titles = {sheet_key.title(): sheet_key for sheet_key in SHEET_INDEXES}
+
+    def worksheets(self):
+        ordered = sorted(SHEET_INDEXES, key=SHEET_INDEXES.get)
+        return [StubWorksheet(sheet_key.title()) for sheet_key in ordered]
+
+    def values_batch_get(self, ranges, params=None):
+        return {"valueRanges": [
+            {"range": name, "values": self.grids[self.titles[name.strip("'")]]}
+            for name in ranges
+        ]}
+
+    def values_batch_update(self, body):
+        return {"totalUpdatedCells": 0}
+
+    def get_lastUpdateTime(self):
+        return self.version
+
+
+class StubClient:
+    """gspread-like client whose every spreadsheet holds the same grids."""
+
+    def __init__(self, grids, version="bench"):
+        self.workbook = StubWorkbook(grids, version)
+
+    def open(self, name):
+        return self.workbook
+
+# -------------------------------
+# Synthetic Student Records
+# -------------------------------
+# Each year a cohort enters the first level; every year a student either
+# advances, repeats the level or drops out, and final-level students
+# graduate or stay on. Rows follow config.RECORD_COLUMNS.
+
+ADVANCE, REPEAT = 0.85, 0.07
+GRADUATE = 0.8
+
+
+def synthetic_records(rows, seed=0, cohort_size=200):
+    """Return about `rows` per-student records with compact dtypes (see utils.records)."""
+    from config import YEAR_LEVELS
+    from utils.records import RECORD_DTYPES
+
+    rng = np.random.default_rng(seed)
+    final_level = len(YEAR_LEVELS)
+    year, next_id = FIRST_YEAR, 0
+    ids = np.empty(0, dtype=np.int64)
+    levels = np.empty(0, dtype=np.int8)
+    chunks, total = [], 0
+
+    while total < rows:
+        entering = rng.integers(cohort_size // 2, cohort_size * 3 // 2)
+        ids = np.concatenate([ids, np.arange(next_id, next_id + entering)])
+        levels = np.concatenate([levels, np.ones(entering, dtype=np.int8)])
+        next_id += entering
+
+        roll = rng.random(len(ids))
+        graduated = (levels == final_level) & (roll < GRADUATE)
+        chunks.append(pd.DataFrame({
+            "Student ID": ids, "Year": year, "Year Level": levels, "Graduated": graduated
+        }))
+        total += len(ids)
+
+        # Next year: graduates leave, the rest advance, repeat or drop out
+        stays = ~graduated & ((roll < ADVANCE + REPEAT) | (levels == final_level))
+        advances = stays & (levels < final_level) & (roll < ADVANCE)
+        levels = (levels + advances)[stays].astype(np.int8)
+        ids = ids[stays]
+        year += 1
+
+    records = pd.concat(chunks, ignore_index=True).head(rows)
+    records["Student ID"] = pd.Categorical(records["Student ID"].map("S{:07d}".format))
+    return records.astype(RECORD_DTYPES)
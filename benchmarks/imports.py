@@ -0,0 +1,163 @@
+"""
+Measure cold import times of the app shell and of each page.
+
+Run from the repository root:
+
+    python -m benchmarks.imports
+    python -m benchmarks.imports --compare benchmarks/results/imports-<old>.json
+
+Every measurement runs in a fresh interpreter, so it is a true cold start:
+the shell is what app.py imports before painting the sidebar, each page
+is imported on top of the shell, as app.py does on its first visit. The
+heavy packages each step pulls in are listed too, and the exit code is 1
+if a page loads a package it must not (see FORBIDDEN) or, with --compare,
+if an import got slower than --threshold times its old median.
+"""
+
+# -------------------------------
+# Imports
+# -------------------------------
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.run import RESULTS_DIR, compare
+
+# -------------------------------
+# Import Benchmark Settings
+# -------------------------------
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Imported by app.py before any page
+SHELL = ["streamlit", "styles", "auth", "utils.telemetry"]
+
+# name -> modules imported on top of the shell; "compute" and "api" are
+# timed in a bare interpreter, as a script or the JSON API would import them.
+# app.py starts the prefetcher only once a data page has been shown, so a
+# visit to the About page imports exactly "page:about"
+TARGETS = {
+    "shell": SHELL,
+    "page:about": ["dashboard.about"],
+    "page:dashboard": ["dashboard.dashboard"],
+    "page:upload": ["dashboard.upload"],
+    "page:debug": ["dashboard.debug"],
+    "prefetcher": ["utils.prefetch"],
+    "compute": ["utils.metrics", "utils.metric_store", "utils.chart_series"],
+    "api": ["api"]
+}
+
+# Packages worth reporting when a step loads them
+HEAVY = ["streamlit", "numpy", "pandas", "pyarrow", "altair", "gspread", "google.oauth2", "tenacity", "openpyxl", "matplotlib"]
+
+# Packages a step must never load
+FORBIDDEN = {
+    "shell": ["numpy", "pandas", "altair", "gspread"],
+    "page:about": ["pandas", "altair", "gspread"],
+    "prefetcher": ["altair", "gspread", "openpyxl", "matplotlib"],
+    "compute": ["altair", "gspread", "streamlit"],
+    "api": ["altair", "gspread", "streamlit"]
+}
+
+REPEATS = 5
+
+# Runs in the fresh interpreter: argv is the JSON list of preloaded
+# modules, then the JSON list of modules to time
+PROBE = """
+import json, sys, time
+preload, targets = json.loads(sys.argv[1]), json.loads(sys.argv[2])
+for name in preload:
+    __import__(name)
+before = set(sys.modules)
+start = time.perf_counter()
+for name in targets:
+    __import__(name)
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "modules": [m for m in sys.modules if m not in before]}))
+"""
+
+# -------------------------------
+# Measurement
+# -------------------------------
+
+def probe(preload, targets):
+    """Import targets in a fresh interpreter; returns (seconds, newly loaded modules)."""
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, json.dumps(preload), json.dumps(targets)],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    return data["seconds"], data["modules"]
+
+
+def heavy_packages(modules):
+    return [name for name in HEAVY if any(m == name or m.startswith(name + ".") for m in modules)]
+
+
+def measure_target(name, repeats=REPEATS):
+    preload = [] if name in ("shell", "compute", "api") else SHELL
+    times = []
+    for _ in range(repeats):
+        seconds, modules = probe(preload, TARGETS[name])
+        times.append(seconds)
+    return {
+        "runs": len(times),
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "modules": len(modules),
+        "heavy": heavy_packages(modules)
+    }
+
+# -------------------------------
+# Results
+# -------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--targets", nargs="+", default=list(TARGETS), choices=list(TARGETS))
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="fresh interpreters per target")
+    parser.add_argument("--output", type=Path, help="JSON file to write (default: benchmarks/results/imports-<time>.json)")
+    parser.add_argument("--compare", type=Path, help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    results, violations = {}, []
+    for name in args.targets:
+        stats = measure_target(name, args.repeats)
+        results[name] = stats
+        heavy = ", ".join(stats["heavy"]) or "-"
+        print(f"  {name:<16} median {stats['median']:.3f}s  {stats['modules']:>4} modules  heavy: {heavy}")
+        for package in set(stats["heavy"]) & set(FORBIDDEN.get(name, [])):
+            violations.append((name, package))
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "results": {"imports": results}
+    }
+
+    output = args.output or RESULTS_DIR / f"imports-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Saved {output}")
+
+    status = 0
+    for name, package in violations:
+        print(f"{name} imports {package}, which it must not")
+        status = 1
+    if args.compare:
+        regressions = compare(report, json.loads(args.compare.read_text(encoding="utf-8")), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} import(s) slower than x{args.threshold}")
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+Benchmark the metric functions and the dashboard data path.
+
+Run from the repository root:
+
+    python -m benchmarks.run                          # all sizes
+    python -m benchmarks.run --sizes 10 1000          # selected sizes
+    python -m benchmarks.run --compare benchmarks/results/<old>.json
+
+Results are written as JSON to benchmarks/results/ (or --output). With
+--compare, medians are checked against an earlier run and the exit code
+is 1 if any benchmark got slower than --threshold times its old median.
+"""
+
+# -------------------------------
+# Imports
+# -------------------------------
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+import streamlit.logger
+
+import config
+from benchmarks.data import StubClient, synthetic_frames, synthetic_grids, synthetic_records
+from utils import charts, data_cache, metric_store, snapshot, storage
+from utils.kpi_cards import show_kpi_cards
+from utils.metric_store import MetricStore, get_metrics
+from utils.records import records_to_frames
+from utils.metrics import (
+    build_kpi_table,
+    compute_cohort_survival_rate,
+    compute_dropout,
+    compute_graduation_rate,
+    compute_total_enrollment
+)
+
+# -------------------------------
+# Benchmark Settings
+# -------------------------------
+
+SIZES = [10, 1_000, 100_000, 1_000_000]
+
+# Each benchmark repeats until it has run this long (at least once)
+MIN_SECONDS = 0.5
+MAX_RUNS = 50
+
+# Slowdowns smaller than this are timer noise, whatever the ratio
+NOISE_FLOOR_SECONDS = 0.001
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# -------------------------------
+# Timing
+# -------------------------------
+
+def measure(func):
+    """Time func repeatedly; returns run count and min/median/mean seconds."""
+    times = []
+    while len(times) < MAX_RUNS and (not times or sum(times) < MIN_SECONDS):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {
+        "runs": len(times),
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times)
+    }
+
+# -------------------------------
+# Stubbed Environment
+# -------------------------------
+
+def install_stub(rows):
+    """
+    Route the shared cache to a stubbed Google Sheets client holding `rows`
+    synthetic rows per sheet, with snapshots in a throwaway directory.
+    """
+    storage.STORAGE_BACKEND = "sheets"
+    storage._backends["sheets"] = storage.SheetsBackend(StubClient(synthetic_grids(rows), f"bench-{rows}"))
+    snapshot.SNAPSHOT_DIR = Path(tempfile.mkdtemp(prefix="bench-snapshot-"))
+    for partition in config.PROGRAMS:
+        data_cache.invalidate_sheet_cache(partition)
+
+
+def dashboard_data_path(selected_year="All Years"):
+    """Everything dashboard.show computes before rendering, for one program."""
+    partitions = [config.DEFAULT_PROGRAM]
+    frames, version = data_cache.load_rollup(partitions)
+    metrics = get_metrics(tuple(partitions), version, frames)
+    charts.get_chart_specs(
+        version, selected_year, True,
+        frames["enrollment"], metrics.grad_df, metrics.cohort_df, metrics.dropout_df
+    )
+
+
+def clear_computed():
+    """Drop the materialized metrics and chart specs, as in a fresh process."""
+    metric_store._stores.clear()
+    charts._chart_cache.clear()
+    charts._dataset_cache.clear()
+
+
+def _dashboard_script():
+    from dashboard import dashboard
+    dashboard.show()
+
+# -------------------------------
+# Benchmarks
+# -------------------------------
+
+def metric_benchmarks(rows):
+    frames = synthetic_frames(rows)
+    enroll_df = frames["enrollment"]
+    grad_df = compute_graduation_rate(frames["graduation"])
+    cohort_df = compute_cohort_survival_rate(frames["cohort"])
+    dropout_df = compute_dropout(enroll_df)
+    kpi_table = build_kpi_table(enroll_df, grad_df, cohort_df, dropout_df)
+    some_year = enroll_df["Year"].dropna().iloc[-1]
+
+    # The same frames after a one-cell edit in the middle of the history
+    store = MetricStore(frames)
+    edited = {key: df.copy() for key, df in frames.items()}
+    edited["enrollment"].iloc[rows // 2, 1] = 1
+
+    records = synthetic_records(rows)
+
+    return {
+        "compute_dropout": measure(lambda: compute_dropout(enroll_df)),
+        "compute_graduation_rate": measure(lambda: compute_graduation_rate(frames["graduation"])),
+        "compute_cohort_survival_rate": measure(lambda: compute_cohort_survival_rate(frames["cohort"])),
+        "compute_total_enrollment[all]": measure(lambda: compute_total_enrollment("All Years", enroll_df)),
+        "compute_total_enrollment[year]": measure(lambda: compute_total_enrollment(some_year, enroll_df)),
+        "build_kpi_table": measure(lambda: build_kpi_table(enroll_df, grad_df, cohort_df, dropout_df)),
+        "metric_store[full]": measure(lambda: MetricStore(edited)),
+        "metric_store[one edit]": measure(lambda: store.updated(edited)),
+        "records_to_frames": measure(lambda: records_to_frames(records)),
+        "show_kpi_cards": measure(lambda: show_kpi_cards(some_year, kpi_table))
+    }
+
+
+def data_path_benchmarks(rows):
+    from streamlit.testing.v1 import AppTest
+
+    install_stub(rows)
+    sheets = storage.get_backend("sheets")
+
+    results = {
+        "sheets_read": measure(lambda: sheets.read_frames(config.DEFAULT_PROGRAM))
+    }
+
+    def cold():
+        data_cache.invalidate_sheet_cache(config.DEFAULT_PROGRAM)
+        clear_computed()
+        dashboard_data_path()
+
+    results["dashboard_data_path[cold]"] = measure(cold)
+
+    dashboard_data_path()
+    results["dashboard_data_path[warm]"] = measure(dashboard_data_path)
+
+    # The real page function, rendered headlessly; a first visit loads the
+    # data and builds the KPI table and chart specs, reruns hit the caches
+    def first_visit():
+        data_cache.invalidate_sheet_cache(config.DEFAULT_PROGRAM)
+        clear_computed()
+        AppTest.from_function(_dashboard_script, default_timeout=600).run()
+
+    results["dashboard.show[first]"] = measure(first_visit)
+
+    app = AppTest.from_function(_dashboard_script, default_timeout=600)
+    app.run()
+    results["dashboard.show[rerun]"] = measure(app.run)
+    if app.exception:
+        raise RuntimeError(f"dashboard.show failed: {app.exception[0].message}")
+
+    return results
+
+# -------------------------------
+# Results
+# -------------------------------
+
+def compare(current, baseline, threshold):
+    """Print median ratios against a baseline run; return the regressions."""
+    regressions = []
+    for size, benches in current["results"].items():
+        for name, stats in benches.items():
+            old = baseline.get("results", {}).get(size, {}).get(name)
+            if not old:
+                continue
+            ratio = stats["median"] / old["median"] if old["median"] else float("inf")
+            slower = stats["median"] - old["median"] > NOISE_FLOOR_SECONDS
+            flag = "  REGRESSION" if ratio > threshold and slower else ""
+            print(f"{size:>9} {name:<34} {old['median']:.6f}s -> {stats['median']:.6f}s  x{ratio:.2f}{flag}")
+            if flag:
+                regressions.append((size, name, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="rows per sheet")
+    parser.add_argument("--output", type=Path, help="JSON file to write (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--compare", type=Path, help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    # Silence bare-mode warnings from show_kpi_cards. The config is parsed
+    # first, since parsing it later would reset the log level
+    st.config.get_option("logger.level")
+    streamlit.logger.set_log_level("error")
+
+    results = {}
+    for rows in args.sizes:
+        print(f"Benchmarking {rows:,} rows...", flush=True)
+        results[str(rows)] = {**metric_benchmarks(rows), **data_path_benchmarks(rows)}
+        for name, stats in results[str(rows)].items():
+            print(f"  {name:<34} median {stats['median']:.6f}s ({stats['runs']} runs)")
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "streamlit": st.__version__,
+        "results": results
+    }
+
+    output = args.output or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Saved {output}")
+
+    if args.compare:
+        regressions = compare(report, json.loads(args.compare.read_text(encoding="utf-8")), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) slower than x{args.threshold}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
+import os
 from pathlib import Path
-from google.oauth2.service_account import Credentials
-import gspread
-import streamlit as st
+import numpy as np
+import pandas as pd
 
 # -------------------------------
 # Google Sheets Configuration
@@ -9,6 +9,17 @@ import streamlit as st
 
 SPREADSHEET_NAME = "School of Law Dashboard Database"
 
+# Program partitions. Each program/campus keeps the worksheets listed in
+# SHEET_INDEXES in its own spreadsheet; the first entry is the default
+PROGRAMS = {
+    "law-obrero": {
+        "name": "School of Law",
+        "campus": "Obrero",
+        "spreadsheet": SPREADSHEET_NAME
+    }
+}
+DEFAULT_PROGRAM = next(iter(PROGRAMS))
+
 # Sheet index mapping for easier access
 SHEET_INDEXES = {
     "enrollment": 0,
@@ -16,6 +27,45 @@ SHEET_INDEXES = {
     "cohort": 2
 }
 
+# Ordered year levels of the program; drop-out transitions run between
+# consecutive levels, so 2-, 4- and 5-year programs only change this list
+YEAR_LEVELS = ["First Year", "Second Year", "Third Year", "Fourth Year"]
+
+# Column dtypes per sheet. Frames are coerced to these once, when they are
+# loaded; "year" is an ordered categorical of int16 years, counts use
+# nullable Int32 so blank cells survive as <NA>
+SHEET_SCHEMAS = {
+    "enrollment": {"Year": "year", **{level: "Int32" for level in YEAR_LEVELS}},
+    "graduation": {
+        "Year": "year",
+        "No. Graduating Students": "Int32",
+        "No. Graduates who graduated on time": "Int32"
+    },
+    "cohort": {"Year": "year", "Cohort Enrollment": "Int32", "Cohort Graduates": "Int32"}
+}
+
+# Expected columns per sheet, used when a worksheet is empty
+SHEET_COLUMNS = {sheet_key: list(schema) for sheet_key, schema in SHEET_SCHEMAS.items()}
+
+# Columns of per-student record files (see utils/records.py): one row per
+# student per academic year enrolled, "Year Level" as a number (1 = first
+# level) or a YEAR_LEVELS name, and "Graduated" set in the year the
+# student graduated. The sheets above are derived from them
+RECORD_COLUMNS = ["Student ID", "Year", "Year Level", "Graduated"]
+
+# Where program data is stored: "sheets" (Google Sheets), "sqlite" (a
+# local database file, for offline use and running without credentials) or
+# "fake" (in-memory Sheets stand-in for load tests, see utils/fake_sheets.py).
+# Overridable with the DASHBOARD_STORAGE environment variable
+STORAGE_BACKEND = os.environ.get("DASHBOARD_STORAGE", "sheets")
+SQLITE_PATH = Path(os.environ.get(
+    "DASHBOARD_SQLITE_PATH",
+    Path(__file__).resolve().parent / ".cache" / "dashboard.sqlite"
+))
+
+# Local Parquet snapshot of the last good sheet data (see utils/snapshot.py)
+SNAPSHOT_DIR = Path(__file__).resolve().parent / ".cache" / "snapshot"
+
 # Required OAuth scopes for Google Sheets and Drive access
 SCOPES = [
     "https://www.googleapis.com/auth/spreadsheets", 
@@ -31,8 +81,110 @@ def get_gspread_client():
     Initializes and returns an authenticated gspread client
     using credentials from Streamlit secrets.
     """
+    # Imported here so pages and scripts that never talk to Google (About,
+    # SQLite storage, the compute functions) don't pay for these packages
+    import gspread
+    import streamlit as st
+    from google.oauth2.service_account import Credentials
+
     creds = Credentials.from_service_account_info(
         st.secrets["google_service_account"], 
         scopes=SCOPES
     )
-    return gspread.authorize(creds)
\ No newline at end of file
+    return gspread.authorize(creds)
+
+
+# -------------------------------
+# Schema Coercion
+# -------------------------------
+
+def to_year_category(values):
+    """Convert year values to an ordered categorical; non-numeric years become NaN."""
+    years = pd.to_numeric(values, errors="coerce")
+    categories = np.unique(years.dropna().astype("int16"))
+    return pd.Categorical(years, categories=categories, ordered=True)
+
+
+def coerce_frame(df, sheet_key):
+    """
+    Applies SHEET_SCHEMAS to a freshly loaded frame: strips header spaces,
+    adds missing expected columns and converts each one to its dtype.
+    Unparseable cells become missing values; unknown columns are kept as is.
+    """
+    df = df.copy()
+    df.columns = df.columns.astype(str).str.strip()
+
+    for col, dtype in SHEET_SCHEMAS.get(sheet_key, {}).items():
+        values = df[col] if col in df.columns else pd.Series(index=df.index, dtype=object)
+        if dtype == "year":
+            df[col] = to_year_category(values)
+        else:
+            numeric = pd.to_numeric(values, errors="coerce")
+            df[col] = numeric.round().astype(dtype)
+
+    return df
+
+# -------------------------------
+# Batched Worksheet Reads
+# -------------------------------
+
+def get_sheet_ranges(workbook):
+    """
+    Maps each key in SHEET_INDEXES to the A1 range covering its worksheet.
+    Costs one metadata request; callers may reuse the result across reads.
+    """
+    from gspread.utils import absolute_range_name
+
+    worksheets = workbook.worksheets()
+    return {
+        sheet_key: absolute_range_name(worksheets[index].title)
+        for sheet_key, index in SHEET_INDEXES.items()
+    }
+
+
+def values_to_frame(values, sheet_key):
+    """
+    Converts a raw values grid (header row first) into a DataFrame typed
+    according to SHEET_SCHEMAS.
+    """
+    if not values or not values[0]:
+        return coerce_frame(pd.DataFrame(columns=SHEET_COLUMNS.get(sheet_key, [])), sheet_key)
+
+    from gspread.utils import fill_gaps
+
+    grid = fill_gaps(values)
+    header, rows = grid[0], grid[1:]
+    return coerce_frame(pd.DataFrame(rows, columns=header), sheet_key)
+
+
+def fetch_all_values(workbook, ranges=None):
+    """
+    Reads every configured worksheet in a single batched values request
+    and returns the raw values grids (header row first, as stored, before
+    any coercion) keyed like SHEET_INDEXES.
+    """
+    if ranges is None:
+        ranges = get_sheet_ranges(workbook)
+
+    sheet_keys = list(ranges)
+    response = workbook.values_batch_get(
+        [ranges[key] for key in sheet_keys],
+        params={"valueRenderOption": "UNFORMATTED_VALUE"}
+    )
+    value_ranges = response.get("valueRanges", [])
+
+    return {
+        sheet_key: value_range.get("values", [])
+        for sheet_key, value_range in zip(sheet_keys, value_ranges)
+    }
+
+
+def fetch_all_sheets(workbook, ranges=None):
+    """
+    Reads every configured worksheet in a single batched values request
+    and returns a dict of DataFrames keyed like SHEET_INDEXES.
+    """
+    return {
+        sheet_key: values_to_frame(values, sheet_key)
+        for sheet_key, values in fetch_all_values(workbook, ranges).items()
+    }
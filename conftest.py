@@ -0,0 +1,2 @@
+# Puts the repository root on sys.path, so tests import config and utils
+# the way app.py does, however pytest is started.
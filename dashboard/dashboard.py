@@ -2,62 +2,96 @@
 # Imports
 # -------------------------------
 import streamlit as st
-import pandas as pd
-import altair as alt
 
-from config import get_gspread_client, SPREADSHEET_NAME, SHEET_INDEXES
-from utils.metrics import (
-    compute_dropout,
-    compute_graduation_rate,
-    compute_cohort_survival_rate,
-    show_kpi_cards
-)
+from config import PROGRAMS
+from utils.data_cache import load_rollup, get_data_status
+from utils.partitions import ALL_PROGRAMS, format_program
+from utils.charts import get_chart_specs
+from utils.kpi_cards import show_kpi_cards
+from utils.metric_store import get_metrics
+from utils.telemetry import span
+
+# -------------------------------
+# Data Freshness Caption
+# -------------------------------
+def format_data_age(status):
+    """Return a short caption describing how old the displayed data is."""
+    age = status["age_seconds"]
+    if age is None:
+        return ""
+
+    if age < 60:
+        age_text = "just now"
+    elif age < 3600:
+        age_text = f"{int(age // 60)} min ago"
+    elif age < 86400:
+        age_text = f"{int(age // 3600)} hr ago"
+    else:
+        age_text = f"{int(age // 86400)} day(s) ago"
+
+    caption = f"🕒 Data updated {age_text}"
+    if status["refreshing"]:
+        caption += " · refreshing..."
+    return caption
 
 # -------------------------------
 # Main Dashboard Page Function
 # -------------------------------
 def show():
 
+    col1, col2, col3, col4 = st.columns([4, 2, 2, 0.1])  # Adjust layout
+
     # -------------------------------
-    # Load Data from Google Sheets
+    # Program Selection Dropdown
     # -------------------------------
-    client = get_gspread_client()
-    workbook = client.open(SPREADSHEET_NAME)
-
-    sheet1 = workbook.get_worksheet(SHEET_INDEXES["enrollment"])
-    sheet2 = workbook.get_worksheet(SHEET_INDEXES["graduation"])
-    sheet3 = workbook.get_worksheet(SHEET_INDEXES["cohort"])
+    with col2:
+        selected_program = st.selectbox(
+            "🏛️ Select Program",
+            list(PROGRAMS) + [ALL_PROGRAMS],
+            format_func=format_program
+        )
 
-    enroll_df = pd.DataFrame(sheet1.get_all_records())
-    grad_df_raw = pd.DataFrame(sheet2.get_all_records())
-    cohort_df_raw = pd.DataFrame(sheet3.get_all_records())
+    # -------------------------------
+    # Load Data from Google Sheets (shared cache)
+    # -------------------------------
+    # Only the selected program is loaded. Cards and charts are computed
+    # from the same per-year sums of each program's cached summary, so
+    # sheets with several rows per year add up consistently. Metrics and
+    # charts are keyed by the version these frames were read at, not one
+    # read later, which a background refresh may already have moved on
+    partitions = list(PROGRAMS) if selected_program == ALL_PROGRAMS else [selected_program]
+    with span("data.load"):
+        frames, data_version = load_rollup(partitions)
 
-    # Clean column headers and format
-    enroll_df.columns = enroll_df.columns.str.strip()
-    enroll_df["Year"] = enroll_df["Year"].astype(str)
+    enroll_df = frames["enrollment"]
 
     # -------------------------------
     # Year Selection Dropdown
     # -------------------------------
-    year_options = ["All Years"] + [y for y in enroll_df["Year"].unique() if y != "Total"]
+    # Year is a categorical of int years; rows without a valid year are skipped
+    year_options = ["All Years"] + enroll_df["Year"].dropna().unique().tolist()
 
-    col1, col2, col3 = st.columns([6, 2, 0.1])  # Adjust layout
-    with col2:
+    with col3:
         selected_year = st.selectbox("📅 Select Year", year_options) 
 
     st.subheader("📊 Program Summary")
+    st.caption(format_data_age(get_data_status(partitions)))
 
     # -------------------------------
     # Compute Metrics
     # -------------------------------
-    grad_df = compute_graduation_rate(grad_df_raw)
-    cohort_df = compute_cohort_survival_rate(cohort_df_raw)
-    dropout_df = compute_dropout(enroll_df)
+    # Materialized per program; after an edit only the changed rows'
+    # metrics are recomputed (see utils/metric_store.py)
+    with span("metrics.compute"):
+        metrics = get_metrics(tuple(partitions), data_version, frames)
+        grad_df, cohort_df, dropout_df = metrics.grad_df, metrics.cohort_df, metrics.dropout_df
+        kpi_table = metrics.kpi_table
 
     # -------------------------------
     # Display KPI Cards
     # -------------------------------
-    show_kpi_cards(selected_year, enroll_df, grad_df, cohort_df, dropout_df)
+    with span("kpi.render"):
+        show_kpi_cards(selected_year, kpi_table)
 
     # -------------------------------
     # Graphical Insights
@@ -74,140 +108,22 @@ def show():
 
     st.markdown("<div style='margin-top: 1rem;'></div>", unsafe_allow_html=True)
 
-    # ===== Enrollment Bar Chart =====
-    col1, col2 = st.columns(2)
-    with col1:
-        df_plot = enroll_df.copy()
-
-        if selected_year != "All Years":
-            df_plot = df_plot[df_plot["Year"] == selected_year]
-        else:
-            total_row = {
-                "Year": "Total",
-                "First Year": df_plot["First Year"].sum(),
-                "Second Year": df_plot["Second Year"].sum(),
-                "Third Year": df_plot["Third Year"].sum(),
-                "Fourth Year": df_plot["Fourth Year"].sum()
-            }
-            df_plot = pd.concat([df_plot, pd.DataFrame([total_row])], ignore_index=True)
-
-        df_melted = df_plot.melt(id_vars="Year", var_name="Level", value_name="Count")
-        level_order = ["First Year", "Second Year", "Third Year", "Fourth Year"]
-
-        bar = alt.Chart(df_melted).mark_bar().encode(
-            x=alt.X('Year:N', title='Year'),
-            y=alt.Y('Count:Q', title='Enrollment'),
-            color=alt.Color('Level:N', sort=level_order),
-            xOffset=alt.XOffset('Level:N', sort=level_order),
-            tooltip=["Year", "Level", "Count"]
-        )
-
-        if show_labels:
-            labels = alt.Chart(df_melted).mark_text(
-                dy=-10,
-                color='black',
-                fontSize=11
-            ).encode(
-                x=alt.X('Year:N'),
-                y='Count:Q',
-                text='Count:Q',
-                detail='Level:N'
-            )
-            chart = (bar + labels)
-        else:
-            chart = bar
-
-        chart = chart.properties(
-            title="🎓 Enrollment by Year Level",
-            height=400
-        )
-
-        st.altair_chart(chart, use_container_width=True)
-
-    # ===== Graduation Rate Line Chart =====
-    with col2:
-        grad_plot = grad_df.copy()
-        if selected_year != "All Years":
-            grad_plot = grad_plot[grad_plot["Year"] == selected_year]
-
-        line = alt.Chart(grad_plot).mark_line(point=True, color="#551012").encode(
-            x=alt.X("Year:N"),
-            y=alt.Y("Graduation Rate (%):Q", scale=alt.Scale(domain=[0, 100])),
-            tooltip=["Year", alt.Tooltip("Graduation Rate (%)", format=".1f")]
-        )
-
-        if show_labels:
-            grad_labels = alt.Chart(grad_plot).mark_text(
-                align="left", dy=-10, fontSize=11
-            ).encode(
-                x="Year:N",
-                y="Graduation Rate (%):Q",
-                text=alt.Text("Graduation Rate (%):Q", format=".1f")
-            )
-            line = line + grad_labels
-
-        line = line.properties(
-            title="🎓 Graduation Rate",
-            height=400
-        )
-
-        st.altair_chart(line, use_container_width=True)
-
-    # ===== Cohort Survival Rate Line Chart =====
-    col3, col4 = st.columns(2)
-    with col3:
-        survival_plot = cohort_df.copy()
-        if selected_year != "All Years":
-            survival_plot = survival_plot[survival_plot["Year"] == selected_year]
-
-        survival_line = alt.Chart(survival_plot).mark_line(point=True).encode(
-            x="Year:N",
-            y=alt.Y("Cohort Survival Rate:Q", title="Survival Rate (%)"),
-            tooltip=["Year", alt.Tooltip("Cohort Survival Rate", format=".1f")]
-        )
-
-        if show_labels:
-            survival_labels = alt.Chart(survival_plot).mark_text(
-                align="left", dy=-10, fontSize=11
-            ).encode(
-                x="Year:N",
-                y="Cohort Survival Rate:Q",
-                text=alt.Text("Cohort Survival Rate:Q", format=".1f")
-            )
-            survival_line = survival_line + survival_labels
-
-        survival_line = survival_line.properties(
-            title="📈 Cohort Survival Rate",
-            height=400
-        )
-
-        st.altair_chart(survival_line, use_container_width=True)
-
-    # ===== Drop-out Rate Line Chart =====
-    with col4:
-        dropout_plot = dropout_df.copy()
-        if selected_year != "All Years":
-            dropout_plot = dropout_plot[dropout_plot["Year"] == int(selected_year)]
-
-        dropout_line = alt.Chart(dropout_plot).mark_line(point=True, color="#990000").encode(
-            x="Year:O",
-            y=alt.Y("Drop-out Rate:Q", title="Drop-out Rate (%)"),
-            tooltip=["Year", alt.Tooltip("Drop-out Rate", format=".2f")]
-        )
-
-        if show_labels:
-            dropout_labels = alt.Chart(dropout_plot).mark_text(
-                align="left", dy=-10, fontSize=11
-            ).encode(
-                x="Year:O",
-                y="Drop-out Rate:Q",
-                text=alt.Text("Drop-out Rate:Q", format=".2f")
-            )
-            dropout_line = dropout_line + dropout_labels
-
-        dropout_line = dropout_line.properties(
-            title="📉 Drop-out Rate",
-            height=400
+    # ===== Charts (specs memoized per data version and view) =====
+    with span("charts.specs"):
+        specs = get_chart_specs(
+            data_version, selected_year, show_labels,
+            enroll_df, grad_df, cohort_df, dropout_df
         )
 
-        st.altair_chart(dropout_line, use_container_width=True)
+    with span("charts.render"):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.vega_lite_chart(spec=specs["enrollment"], use_container_width=True)
+        with col2:
+            st.vega_lite_chart(spec=specs["graduation"], use_container_width=True)
+
+        col3, col4 = st.columns(2)
+        with col3:
+            st.vega_lite_chart(spec=specs["survival"], use_container_width=True)
+        with col4:
+            st.vega_lite_chart(spec=specs["dropout"], use_container_width=True)
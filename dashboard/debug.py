@@ -0,0 +1,63 @@
+import streamlit as st
+import pandas as pd
+
+from utils import telemetry
+
+# -------------------------------
+# Admin Debug Panel
+# -------------------------------
+# Only listed in the sidebar once a user has unlocked the Data page with
+# the admin secret key (see app.py).
+
+def _latency_table(described, label):
+    rows = [
+        {
+            label: name,
+            "count": stats["count"],
+            **{f"p{int(q * 100)} (ms)": round(value * 1000, 1) for q, value in stats["quantiles"].items()}
+        }
+        for name, stats in described.items()
+    ]
+    return pd.DataFrame(rows)
+
+
+def show():
+    st.subheader("🛠️ Performance Debug")
+
+    if not st.session_state.get("upload_auth"):
+        st.warning("Unlock the Data page with the admin key to view this panel.")
+        return
+
+    data = telemetry.summary()
+
+    # ===== Previous Rerun Breakdown =====
+    run = telemetry.last_run()
+    if run:
+        st.markdown(f"**Last page run:** {run['page']} · {run['seconds'] * 1000:.0f} ms")
+        spans = pd.DataFrame(run["spans"], columns=["span", "seconds"])
+        spans["ms"] = (spans.pop("seconds") * 1000).round(1)
+        st.dataframe(spans, hide_index=True, use_container_width=True)
+
+    # ===== Latency Percentiles =====
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**Page latency**")
+        st.dataframe(_latency_table(data["pages"], "page"), hide_index=True, use_container_width=True)
+    with col2:
+        st.markdown("**Stage latency**")
+        st.dataframe(_latency_table(data["spans"], "span"), hide_index=True, use_container_width=True)
+
+    # ===== Counters =====
+    st.markdown("**API calls and cache lookups**")
+    counters = pd.DataFrame([
+        {"counter": c["name"], "labels": ", ".join(f"{k}={v}" for k, v in c["labels"].items()), "value": c["value"]}
+        for c in data["counters"]
+    ])
+    st.dataframe(counters, hide_index=True, use_container_width=True)
+
+    # ===== Export =====
+    col1, col2, _ = st.columns([1, 1, 3])
+    with col1:
+        st.download_button("⬇️ Prometheus", telemetry.to_prometheus(), "dashboard_metrics.prom", "text/plain")
+    with col2:
+        st.download_button("⬇️ JSON lines", telemetry.to_json_lines(), "dashboard_metrics.jsonl", "application/json")
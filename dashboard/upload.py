@@ -1,7 +1,51 @@
 import streamlit as st
 import time
 import pandas as pd
-from config import get_gspread_client, SPREADSHEET_NAME, SHEET_INDEXES
+from config import RECORD_COLUMNS, SHEET_COLUMNS, PROGRAMS, coerce_frame
+from utils.data_cache import StaleDataError, read_for_edit, write_sheet_changes
+from utils.importer import read_import_file, merge_by_year, SUPPORTED_TYPES
+from utils.partitions import format_program
+from utils.records import read_records_file, records_to_frames
+from utils.telemetry import span
+
+# -------------------------------
+# Grid Editor Helpers
+# -------------------------------
+def to_editable(df):
+    """Grid editors need a plain integer Year so new years can be typed in."""
+    df = df.copy()
+    if isinstance(df["Year"].dtype, pd.CategoricalDtype):
+        df["Year"] = df["Year"].astype("Int16")
+    return df
+
+
+def column_config_for(df):
+    """Number columns for counts and years; other columns edit as text."""
+    config = {}
+    for col in df.columns:
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            continue
+        if col == "Year":
+            config[col] = st.column_config.NumberColumn(col, format="%d", step=1)
+        else:
+            config[col] = st.column_config.NumberColumn(col, min_value=0, step=1)
+    return config
+
+
+def has_unsaved_edits():
+    """True if any grid editor holds edited, added or deleted rows."""
+    changes = ("edited_rows", "added_rows", "deleted_rows")
+    return any(
+        any(st.session_state.get(f"editor_{key}", {}).get(change) for change in changes)
+        for key in SHEET_COLUMNS
+    )
+
+
+def reset_loaded_data():
+    """Drop the loaded tables and editor state so the next run reloads them."""
+    loaded = ["form_data", "baseline_data", "baseline_grids", "baseline_version", "import_id"]
+    for key in loaded + [f"editor_{k}" for k in SHEET_COLUMNS]:
+        st.session_state.pop(key, None)
 
 # -------------------------------
 # Main Upload Data Page
@@ -57,25 +101,6 @@ def show():
     # -------- Styles (including overlay) --------
     st.markdown("""
         <style>
-        /* Main layout adjustments */
-        div[data-baseweb="tab-panel"] [data-testid="stVerticalBlockBorderWrapper"] {
-            margin-top: -0.75rem !important;
-            margin-bottom: -0.75rem !important;
-        }
-        div[data-baseweb="tab-panel"] [data-testid="stElementContainer"] {
-            padding-top: -0.1rem !important;
-            padding-bottom: -0.1rem !important;
-            margin-top: 0 !important;
-            margin-bottom: 0 !important;
-        }
-        div[data-baseweb="tab-panel"] .stColumn {
-            padding-left: -0.25rem !important;
-            padding-right: -0.25rem !important;
-        }
-        div[data-baseweb="tab-panel"] [data-testid="stButton"] {
-            margin-top: 1rem !important;
-        }
-
         /* Fullscreen overlay */
         #overlay {
             position: fixed;
@@ -95,29 +120,61 @@ def show():
         </style>
     """, unsafe_allow_html=True)
 
+    # ---------------------------------------
+    # Program Selection
+    # ---------------------------------------
+    program = st.selectbox(
+        "🏛️ Program",
+        list(PROGRAMS),
+        format_func=format_program,
+        key="upload_program"
+    )
+
+    # Switching programs discards the loaded tables and editor state
+    if st.session_state.get("form_program") != program:
+        reset_loaded_data()
+        st.session_state.form_program = program
+
     # ---------------------------------------
     # Load Google Sheets Data
     # ---------------------------------------
-    @st.cache_resource(show_spinner="Loading spreadsheet...")
+    # Served from the shared cache, with the stored values the frames were
+    # coerced from (kept to diff against, since coercion blanks cells it
+    # cannot parse) and their version. A save is refused if the sheet
+    # changed since that version, so a stale copy is never written back
     def load_all_data():
-        client = get_gspread_client()
-        workbook = client.open(SPREADSHEET_NAME)
-
-        def fetch_df(sheet_key, default):
-            try:
-                records = workbook.get_worksheet(SHEET_INDEXES[sheet_key]).get_all_records()
-                return pd.DataFrame(records) if records else default
-            except:
-                return default
+        try:
+            with st.spinner("Loading spreadsheet..."), span("data.load"):
+                frames, grids, version = read_for_edit(program)
+        except Exception:
+            # No stored version equals this one, so nothing can be saved
+            # on top of a failed load
+            frames, grids, version = {}, None, "load-failed"
 
         return {
-            "enrollment": fetch_df("enrollment", pd.DataFrame(columns=["Year", "First Year", "Second Year", "Third Year", "Fourth Year"])),
-            "graduation": fetch_df("graduation", pd.DataFrame(columns=["Year", "No. Graduating Students", "No. Graduates who graduated on time"])),
-            "cohort": fetch_df("cohort", pd.DataFrame(columns=["Year", "Cohort Enrollment", "Cohort Graduates"]))
-        }
+            sheet_key: to_editable(
+                frames.get(sheet_key, coerce_frame(pd.DataFrame(columns=columns), sheet_key))
+            )
+            for sheet_key, columns in SHEET_COLUMNS.items()
+        }, grids, version
 
     if "form_data" not in st.session_state:
-        st.session_state.form_data = load_all_data()
+        (
+            st.session_state.form_data,
+            st.session_state.baseline_grids,
+            st.session_state.baseline_version
+        ) = load_all_data()
+        # Untouched copy of what is in the sheet, diffed against on submit
+        st.session_state.baseline_data = {
+            key: df.copy() for key, df in st.session_state.form_data.items()
+        }
+
+    # Set when a save was refused because the sheet changed after loading
+    if st.session_state.pop("stale_data", False):
+        st.warning(
+            "⚠️ The data was changed elsewhere since you loaded it, so your changes were not saved. "
+            "The latest data is shown below; please apply your changes again."
+        )
 
     if "show_success" not in st.session_state:
         st.session_state.show_success = False
@@ -129,43 +186,18 @@ def show():
     # ---------------------------------------
     def render_table(label, key):
         st.markdown(f"### {label}")
-        df = st.session_state.form_data[key].copy()
-
-        edited_rows = []
-        for i, row in df.iterrows():
-            cols = st.columns(len(row) + 1, gap="small")
-            row_data = {}
-
-            for j, (col_name, cell) in enumerate(row.items()):
-                input_key = f"{key}_{i}_{j}"
-                with cols[j]:
-                    value = st.text_input(
-                        label=col_name if i == 0 else "",
-                        value=str(cell).rstrip("0").rstrip(".") if isinstance(cell, float) else str(cell),
-                        key=input_key
-                    )
-                    row_data[col_name] = value.strip()
-
-            with cols[-1]:
-                st.markdown("<div style='padding-top: 0em; text-align: center;'>", unsafe_allow_html=True)
-                if st.button("➖", key=f"remove_{key}_{i}"):
-                    st.session_state.form_data[key] = df.drop(i).reset_index(drop=True)
-                    st.rerun()
 
-            edited_rows.append(row_data)
-
-        st.session_state.form_data[key] = pd.DataFrame(edited_rows)
-
-        if st.button(f"➕ Add Row to {label}", key=f"add_row_{key}"):
-            new_row = {col: "0" for col in df.columns}
-            if "Year" in new_row:
-                try:
-                    new_row["Year"] = str(int(df["Year"].iloc[-1]) + 1)
-                except:
-                    new_row["Year"] = ""
-            df.loc[len(df)] = new_row
-            st.session_state.form_data[key] = df
-            st.rerun()
+        # The editor is always fed the baseline; Streamlit replays the user's
+        # edits on top of it, so feeding back the edited frame would double them
+        edited = st.data_editor(
+            st.session_state.baseline_data[key],
+            key=f"editor_{key}",
+            num_rows="dynamic",
+            hide_index=True,
+            use_container_width=True,
+            column_config=column_config_for(st.session_state.baseline_data[key])
+        )
+        st.session_state.form_data[key] = edited
 
     # ---------------------------------------
     # Render Tabbed Forms
@@ -181,6 +213,109 @@ def show():
         with tabs[idx]:
             render_table(tab_titles[sheet_key], sheet_key)
 
+    # ---------------------------------------
+    # Bulk File Import
+    # ---------------------------------------
+    with st.expander("📥 Bulk Import (CSV / Excel / Parquet)"):
+        # Per-student records replace all three sheets with derived counts
+        import_targets = {**tab_titles, "records": "Student Records (all sheets)"}
+        target_key = st.selectbox(
+            "Import into",
+            list(import_targets),
+            format_func=lambda key: import_targets[key],
+            key="import_target"
+        )
+        required_columns = RECORD_COLUMNS if target_key == "records" else SHEET_COLUMNS[target_key]
+        uploaded = st.file_uploader(
+            f"Columns required: {', '.join(required_columns)}",
+            type=SUPPORTED_TYPES,
+            key="import_file"
+        )
+
+        if uploaded is not None:
+            # Parse and merge once per file/target. Only the merged sheets
+            # (one row per year) and the counts are kept in the session, not
+            # the validated rows, so reruns neither re-merge nor hold the file
+            import_id = (uploaded.file_id, target_key)
+            if st.session_state.get("import_id") != import_id:
+                progress = st.empty()
+                on_progress = lambda rows: progress.caption(f"Validated {rows:,} rows...")
+                try:
+                    if target_key == "records":
+                        # Only the derived sheets are kept, not the records
+                        result = read_records_file(uploaded, uploaded.name, on_progress=on_progress)
+                        records = result.pop("data")
+                        result["students"] = records["Student ID"].nunique()
+                        imported = records_to_frames(records)
+                    else:
+                        result = read_import_file(uploaded, uploaded.name, required_columns, on_progress=on_progress)
+                        imported = {target_key: result.pop("data")}
+
+                    result["merged"], result["stats"] = {}, {"new": 0, "updated": 0, "dropped": 0}
+                    for sheet_key, df in imported.items():
+                        result["merged"][sheet_key], sheet_stats = merge_by_year(
+                            st.session_state.baseline_data[sheet_key], to_editable(df)
+                        )
+                        result["stats"] = {key: result["stats"][key] + sheet_stats[key] for key in result["stats"]}
+                except Exception as e:
+                    result = {"error": str(e)}
+                progress.empty()
+                st.session_state.import_id = import_id
+                st.session_state.import_result = result
+
+            result = st.session_state.import_result
+            if "error" in result:
+                st.error(f"❌ Could not read file: {result['error']}")
+            else:
+                merged, stats = result["merged"], result["stats"]
+                unit = f"records of **{result['students']:,}** students" if "students" in result else "rows"
+                st.markdown(
+                    f"Read **{result['rows_read']:,}** {unit} · "
+                    f"**{result['rejected']:,}** rejected · "
+                    f"**{stats['new']:,}** new years · **{stats['updated']:,}** updated years"
+                )
+                if stats["dropped"]:
+                    st.caption(
+                        f"⚠️ {stats['dropped']:,} row(s) repeat a year found later in the file "
+                        "and will not be imported; the last row of each year is used."
+                    )
+                for message in result["errors"]:
+                    st.caption(f"⚠️ {message}")
+
+                for sheet_key, df in merged.items():
+                    st.caption(tab_titles[sheet_key])
+                    st.dataframe(df.head(100), hide_index=True, use_container_width=True)
+
+                # The import is written on top of the loaded data, and the
+                # tables are reloaded afterwards
+                if has_unsaved_edits():
+                    st.warning(
+                        "⚠️ The tables above have unsaved changes. Importing saves only the imported rows "
+                        "and reloads the tables, discarding those changes; submit them first to keep them."
+                    )
+
+                nothing_imported = stats["new"] + stats["updated"] == 0
+                if st.button(f"📥 Import into {import_targets[target_key]}", disabled=nothing_imported):
+                    try:
+                        with st.spinner("Writing imported rows..."):
+                            write_sheet_changes(
+                                program,
+                                {key: st.session_state.baseline_data[key] for key in merged},
+                                merged,
+                                grids=st.session_state.baseline_grids,
+                                expected_version=st.session_state.baseline_version
+                            )
+                        # Reload what was saved, with its new version
+                        reset_loaded_data()
+                        st.session_state.show_success = True
+                        st.rerun()
+                    except StaleDataError:
+                        reset_loaded_data()
+                        st.session_state.stale_data = True
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ Failed to import data: {e}")
+
     # ---------------------------------------
     # Submit Button & Save Logic
     # ---------------------------------------
@@ -194,9 +329,6 @@ def show():
     if st.session_state.submitting:
         st.markdown("<div id='overlay'>Saving data...</div>", unsafe_allow_html=True)
         try:
-            client = get_gspread_client()
-            wb = client.open(SPREADSHEET_NAME)
-
             for sheet_key in tab_titles:
                 df = st.session_state.form_data[sheet_key]
                 if "Year" in df.columns:
@@ -204,13 +336,28 @@ def show():
                     df = df.sort_values("Year", na_position="last").reset_index(drop=True)
                     st.session_state.form_data[sheet_key] = df
 
-                ws = wb.get_worksheet(SHEET_INDEXES[sheet_key])
-                ws.clear()
-                ws.update("A1", [df.columns.tolist()] + df.astype(str).values.tolist())
+            # Only changed cells are sent, in one batched call for all sheets,
+            # and only if nobody changed the sheet since it was loaded
+            write_sheet_changes(
+                program,
+                st.session_state.baseline_data,
+                {key: st.session_state.form_data[key] for key in tab_titles},
+                grids=st.session_state.baseline_grids,
+                expected_version=st.session_state.baseline_version
+            )
+            # Restart the editors from the saved data and its new version;
+            # the shared cache was invalidated, so dashboard readers reload
+            # on their next rerun
+            reset_loaded_data()
 
             st.session_state.submitting = False
             st.session_state.show_success = True
             st.rerun()
+        except StaleDataError:
+            reset_loaded_data()
+            st.session_state.submitting = False
+            st.session_state.stale_data = True
+            st.rerun()
         except Exception as e:
             st.session_state.submitting = False
             st.error(f"❌ Failed to save data: {e}")
@@ -0,0 +1,243 @@
+"""
+Render the KPI cards and the four dashboard charts for every year.
+
+Run from the repository root:
+
+    python report.py                                  # default program, PNG + PDF
+    python report.py --program law-obrero --format pdf --output reports/
+    python report.py --years 2019 2020 --workers 4
+    python report.py --records students.csv           # from per-student records
+
+One page is written per year, plus an "All Years" overview, as
+<output>/<program>/<year>.<format>. Program data is read straight from
+the configured storage, never from the dashboard's cached copy. Metrics
+are computed once with utils.metrics; the pages are drawn with matplotlib
+in a process pool.
+"""
+
+# -------------------------------
+# Imports
+# -------------------------------
+# Kept light: pool workers import this module, and they only draw
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+# -------------------------------
+# Report Settings
+# -------------------------------
+
+OUTPUT_DIR = Path("reports")
+FORMATS = ["png", "pdf"]
+
+# A4 landscape, in inches
+PAGE_SIZE = (11.69, 8.27)
+DPI = 150
+
+# Values are printed on chart points and bars up to this many points
+MAX_LABELED_POINTS = 12
+
+LEVEL_COLORS = ["#4c78a8", "#f58518", "#e45756", "#72b7b2", "#54a24b", "#eeca3b"]
+
+# -------------------------------
+# Page Data (parent process)
+# -------------------------------
+
+def load_frames(program, records_path=None):
+    """
+    Per-year frames from per-student records, or read fresh from the
+    configured storage, and a line saying where they came from. Storage is
+    read directly, not through the dashboard's cache or its snapshot, so
+    a report is never drawn from an older copy.
+    """
+    if records_path:
+        from utils.records import read_records_file, records_to_frames
+
+        with open(records_path, "rb") as file:
+            return records_to_frames(read_records_file(file, records_path)["data"]), f"records in {records_path}"
+
+    from config import PROGRAMS
+    from utils.partitions import ALL_PROGRAMS
+    from utils.storage import get_backend
+
+    backend = get_backend()
+    versions, frames = backend.read_rollup(list(PROGRAMS) if program == ALL_PROGRAMS else [program])
+    read_at = ", ".join(f"{partition} at {version}" for partition, version in versions)
+    return frames, f"{backend.name} storage, {read_at}"
+
+
+def build_pages(frames, years=None):
+    """
+    Compute every page's KPI cards and chart series: a list of dicts with
+    year, cards and series. years defaults to every year of enrollment data.
+    """
+    from utils.chart_series import chart_frames
+    from utils.metrics import (
+        ALL_YEARS,
+        build_kpi_table,
+        compute_cohort_survival_rate,
+        compute_dropout,
+        compute_graduation_rate,
+        kpi_card_values
+    )
+
+    enroll_df = frames["enrollment"]
+    grad_df = compute_graduation_rate(frames["graduation"])
+    cohort_df = compute_cohort_survival_rate(frames["cohort"])
+    dropout_df = compute_dropout(enroll_df)
+    kpi_table = build_kpi_table(enroll_df, grad_df, cohort_df, dropout_df)
+
+    if years is None:
+        years = enroll_df["Year"].dropna().unique().tolist()
+    return [
+        {
+            "year": year,
+            "cards": kpi_card_values(kpi_table, year),
+            "series": chart_frames(enroll_df, grad_df, cohort_df, dropout_df, year)
+        }
+        for year in [ALL_YEARS] + list(years)
+    ]
+
+# -------------------------------
+# Page Drawing (pool workers)
+# -------------------------------
+
+def _draw_cards(fig, cards):
+    for i, card in enumerate(cards):
+        ax = fig.add_axes([0.04 + i * 0.24, 0.80, 0.21, 0.11])
+        ax.set_axis_off()
+        ax.add_patch(_card_patch(ax))
+        ax.text(0.5, 0.78, card["title"], ha="center", va="center", fontsize=10, color="#555")
+        ax.text(0.5, 0.45, card["value_text"], ha="center", va="center", fontsize=20, weight="bold")
+        ax.text(0.5, 0.14, card["change_text"], ha="center", va="center", fontsize=9, color=card["change_color"])
+
+
+def _card_patch(ax):
+    from matplotlib.patches import FancyBboxPatch
+
+    return FancyBboxPatch(
+        (0.01, 0.02), 0.98, 0.96, boxstyle="round,pad=0,rounding_size=0.06",
+        transform=ax.transAxes, facecolor="#f7f7f7", edgecolor="#dddddd"
+    )
+
+
+def _label_points(ax, xs, ys, fmt):
+    if len(xs) <= MAX_LABELED_POINTS:
+        for x, y in zip(xs, ys):
+            if y == y:  # Skip NaN
+                ax.annotate(f"{y:{fmt}}", (x, y), textcoords="offset points", xytext=(0, 6),
+                            ha="center", fontsize=7)
+
+
+def _draw_enrollment(ax, df):
+    import numpy as np
+
+    years = list(dict.fromkeys(df["Year"].astype(str)))
+    levels = list(dict.fromkeys(df["Level"]))
+    width = 0.8 / max(len(levels), 1)
+    positions = np.arange(len(years))
+    for i, level in enumerate(levels):
+        counts = (
+            df[df["Level"] == level].assign(Year=lambda d: d["Year"].astype(str))
+            .set_index("Year")["Count"].reindex(years).astype(float).fillna(0)
+        )
+        bars = ax.bar(positions + (i - (len(levels) - 1) / 2) * width, counts.to_numpy(), width,
+                      label=level, color=LEVEL_COLORS[i % len(LEVEL_COLORS)])
+        if len(years) * len(levels) <= MAX_LABELED_POINTS * 2:
+            ax.bar_label(bars, fmt="%d", fontsize=7)
+    ax.set_xticks(positions, years, rotation=90 if len(years) > 15 else 0, fontsize=7)
+    ax.set_ylabel("Enrollment")
+    ax.margins(y=0.2)  # Room for the legend and bar labels
+    if levels:
+        ax.legend(fontsize=7, loc="upper left", ncol=len(levels))
+
+
+def _draw_line(ax, df, column, color, fmt, ylim=None):
+    xs = df["Year"].astype(str).tolist()
+    ys = df[column].astype(float).tolist()
+    ax.plot(xs, ys, marker="o", markersize=3, color=color)
+    _label_points(ax, xs, ys, fmt)
+    if ylim:
+        ax.set_ylim(*ylim)
+    ax.set_ylabel(f"{column.replace(' (%)', '')} (%)")
+    ax.tick_params(axis="x", labelrotation=90 if len(xs) > 15 else 0, labelsize=7)
+
+
+def render_page(page, output_dir, formats, title):
+    """Draw one year's page and save it in every format; returns the written paths."""
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=PAGE_SIZE, dpi=DPI)
+    fig.suptitle(f"{title} · {page['year']}", fontsize=14, weight="bold", x=0.04, ha="left", y=0.97)
+    _draw_cards(fig, page["cards"])
+
+    series = page["series"]
+    axes = fig.subplots(2, 2, gridspec_kw={"left": 0.07, "right": 0.97, "top": 0.74, "bottom": 0.08,
+                                           "hspace": 0.45, "wspace": 0.18})
+    charts = [
+        ("Enrollment by Year Level", lambda ax: _draw_enrollment(ax, series["enrollment"])),
+        ("Graduation Rate", lambda ax: _draw_line(ax, series["graduation"], "Graduation Rate (%)", "#551012", ".1f", (0, 100))),
+        ("Cohort Survival Rate", lambda ax: _draw_line(ax, series["survival"], "Cohort Survival Rate", "#4c78a8", ".1f")),
+        ("Drop-out Rate", lambda ax: _draw_line(ax, series["dropout"], "Drop-out Rate", "#990000", ".2f"))
+    ]
+    for ax, (chart_title, draw) in zip(axes.flat, charts):
+        ax.set_title(chart_title, fontsize=11, loc="left")
+        draw(ax)
+
+    stem = str(page["year"]).lower().replace(" ", "-")
+    paths = []
+    for fmt in formats:
+        path = Path(output_dir) / f"{stem}.{fmt}"
+        fig.savefig(path, format=fmt)
+        paths.append(str(path))
+    return paths
+
+# -------------------------------
+# Command Line
+# -------------------------------
+
+def main(argv=None):
+    from config import DEFAULT_PROGRAM, PROGRAMS
+    from utils.partitions import ALL_PROGRAMS, format_program
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--program", default=DEFAULT_PROGRAM, choices=list(PROGRAMS) + [ALL_PROGRAMS])
+    parser.add_argument("--records", help="per-student records file (CSV, Excel or Parquet) to report on instead")
+    parser.add_argument("--years", type=int, nargs="+", help="years to render (default: all)")
+    parser.add_argument("--format", nargs="+", default=FORMATS, choices=FORMATS, dest="formats")
+    parser.add_argument("--output", type=Path, default=OUTPUT_DIR, help="directory for the pages")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="drawing processes")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    frames, source = load_frames(args.program, args.records)
+    print(f"Reporting on {source}")
+    pages = build_pages(frames, args.years)
+    computed = time.perf_counter()
+
+    name = Path(args.records).stem if args.records else args.program
+    output_dir = args.output / name.lower().replace(" ", "-")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    draw = partial(
+        render_page, output_dir=output_dir, formats=args.formats,
+        title=name if args.records else format_program(args.program)
+    )
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        written = [path for paths in pool.map(draw, pages) for path in paths]
+
+    print(
+        f"Wrote {len(written)} files for {len(pages)} pages to {output_dir} in "
+        f"{time.perf_counter() - start:.2f}s (metrics {computed - start:.2f}s, {args.workers} workers)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
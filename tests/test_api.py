@@ -0,0 +1,156 @@
+"""
+Checks of the JSON API (api.py) against the in-process fake Sheets client:
+ETags and conditional requests, error statuses, and the 503 answered over
+HTTP when the data cannot be loaded.
+
+Run from the repository root with `python -m pytest`.
+"""
+
+# -------------------------------
+# Imports
+# -------------------------------
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+from cachetools import LRUCache
+
+import api
+from config import PROGRAMS, SHEET_COLUMNS, SHEET_INDEXES
+from utils import data_cache, snapshot, storage
+from utils.fake_sheets import FakeClient
+from utils.storage import SheetsBackend
+
+PROGRAM = next(iter(PROGRAMS))
+
+# -------------------------------
+# Fixtures
+# -------------------------------
+
+@pytest.fixture
+def client():
+    client = FakeClient()
+    ordered = sorted(SHEET_INDEXES, key=SHEET_INDEXES.get)
+    grids = {
+        "enrollment": [[year, 100, 90, 80, 70] for year in range(2015, 2021)],
+        "graduation": [[year, 50, 30] for year in range(2015, 2021)],
+        "cohort": [[year, 80, 60] for year in range(2015, 2021)]
+    }
+    client.create(
+        PROGRAMS[PROGRAM]["spreadsheet"],
+        {key.title(): [SHEET_COLUMNS[key]] + grids[key] for key in ordered}
+    )
+    return client
+
+
+@pytest.fixture
+def cache(client, monkeypatch, tmp_path):
+    """Route utils.data_cache to the fake client, with snapshots in tmp_path and no cached responses."""
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", "fake")
+    monkeypatch.setitem(storage._backends, "fake", SheetsBackend(client))
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", tmp_path)
+    monkeypatch.setattr(api, "_response_cache", LRUCache(maxsize=api.RESPONSE_CACHE_SIZE))
+    data_cache.invalidate_sheet_cache(PROGRAM)
+    yield data_cache
+    data_cache.invalidate_sheet_cache(PROGRAM)
+
+
+@pytest.fixture
+def server(cache):
+    """The API served on a free local port; yields its base URL."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), api.ApiHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def _query(**params):
+    return {name: [value] for name, value in params.items()}
+
+
+def _get(url, headers=None):
+    """(status, headers, body) of a GET, error statuses included."""
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers or {})) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as error:
+        return error.code, error.headers, error.read()
+
+# -------------------------------
+# ETags
+# -------------------------------
+
+def test_matching_etag_is_answered_with_304(cache):
+    status, body, etag = api.handle("/api/kpis", _query(program=PROGRAM, year="2020"))
+    assert status == 200 and etag
+    assert [card["title"] for card in json.loads(body)["kpis"]][0] == "Total Enrollment"
+
+    status, body, same = api.handle("/api/kpis", _query(program=PROGRAM, year="2020"), if_none_match=etag)
+    assert (status, body, same) == (304, b"", etag)
+
+    # The ETag names the program's data version, so it holds for every endpoint;
+    # a weak tag in a list matches too
+    status, _, _ = api.handle("/api/series", _query(program=PROGRAM), if_none_match=f'W/{etag}, "other"')
+    assert status == 304
+
+
+def test_etag_changes_with_the_data(cache):
+    _, body, etag = api.handle("/api/kpis", _query(program=PROGRAM, year="2020"))
+
+    frames, grids, version = cache.read_for_edit(PROGRAM)
+    edited = {key: df.copy() for key, df in frames.items()}
+    edited["enrollment"].loc[5, "First Year"] = 1
+    cache.write_sheet_changes(PROGRAM, frames, edited, grids, expected_version=version)
+
+    status, new_body, new_etag = api.handle("/api/kpis", _query(program=PROGRAM, year="2020"), if_none_match=etag)
+    assert status == 200
+    assert new_etag != etag
+    assert new_body != body
+
+# -------------------------------
+# Errors
+# -------------------------------
+
+@pytest.mark.parametrize("path, query, status", [
+    ("/api/nothing", {}, 404),
+    ("/api/kpis", _query(program="no-such-program"), 400),
+    ("/api/kpis", _query(program=PROGRAM, year="1990"), 404),
+    ("/api/kpis", _query(program=PROGRAM, year="twenty"), 404)
+])
+def test_bad_requests_raise_api_errors(cache, path, query, status):
+    with pytest.raises(api.ApiError) as error:
+        api.handle(path, query)
+    assert error.value.status == status
+
+# -------------------------------
+# HTTP
+# -------------------------------
+
+def test_http_conditional_get(server):
+    status, headers, body = _get(f"{server}/api/years?program={PROGRAM}")
+    assert status == 200
+    assert json.loads(body)["years"] == list(range(2015, 2021))
+    assert headers["Cache-Control"] == "no-cache"
+
+    status, _, body = _get(f"{server}/api/years?program={PROGRAM}", {"If-None-Match": headers["ETag"]})
+    assert (status, body) == (304, b"")
+
+
+def test_http_errors_are_json(server, monkeypatch):
+    status, _, body = _get(f"{server}/api/kpis?program=no-such-program")
+    assert status == 400
+    assert "no-such-program" in json.loads(body)["error"]
+
+    def unreachable(partitions):
+        raise ConnectionError("storage unreachable")
+
+    monkeypatch.setattr(api, "check_data_version", unreachable)
+    status, headers, body = _get(f"{server}/api/kpis?program={PROGRAM}")
+    assert status == 503
+    assert "ETag" not in headers
+    assert json.loads(body) == {"error": "Data unavailable: storage unreachable"}
@@ -0,0 +1,164 @@
+"""
+Checks of the shared data cache (utils/data_cache.py) against the
+in-process fake Sheets client: what blocks, and what is fetched how often.
+
+Run from the repository root with `python -m pytest`.
+"""
+
+# -------------------------------
+# Imports
+# -------------------------------
+import threading
+
+import pytest
+
+from config import PROGRAMS, SHEET_COLUMNS, SHEET_INDEXES
+from utils import data_cache, snapshot, storage
+from utils.fake_sheets import FakeClient
+from utils.storage import SheetsBackend
+
+PROGRAM = next(iter(PROGRAMS))
+
+# Longest any check waits on another thread before failing
+TIMEOUT_SECONDS = 5
+
+# -------------------------------
+# Fixtures
+# -------------------------------
+
+@pytest.fixture
+def client():
+    client = FakeClient()
+    ordered = sorted(SHEET_INDEXES, key=SHEET_INDEXES.get)
+    grids = {
+        "enrollment": [[year, 100, 90, 80, 70] for year in range(2015, 2021)],
+        "graduation": [[year, 50, 30] for year in range(2015, 2021)],
+        "cohort": [[year, 80, 60] for year in range(2015, 2021)]
+    }
+    client.create(
+        PROGRAMS[PROGRAM]["spreadsheet"],
+        {key.title(): [SHEET_COLUMNS[key]] + grids[key] for key in ordered}
+    )
+    return client
+
+
+@pytest.fixture
+def cache(client, monkeypatch, tmp_path):
+    """Route utils.data_cache to the fake client, with snapshots in tmp_path."""
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", "fake")
+    monkeypatch.setitem(storage._backends, "fake", SheetsBackend(client))
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", tmp_path)
+    data_cache.invalidate_sheet_cache(PROGRAM)
+    yield data_cache
+    data_cache.invalidate_sheet_cache(PROGRAM)
+
+# -------------------------------
+# Locking
+# -------------------------------
+
+def test_cache_hits_do_not_wait_for_snapshot_writes(cache, monkeypatch):
+    writing, release = threading.Event(), threading.Event()
+
+    def slow_write(*args):
+        writing.set()
+        release.wait(TIMEOUT_SECONDS)
+
+    monkeypatch.setattr(data_cache, "write_snapshot", slow_write)
+    loader = threading.Thread(target=cache.load_sheet_data, args=(PROGRAM,))
+    loader.start()
+    try:
+        assert writing.wait(TIMEOUT_SECONDS)
+
+        # The first load is stuck writing its snapshot; readers are served anyway
+        served = []
+        reader = threading.Thread(target=lambda: served.append(cache.load_sheet_data(PROGRAM)))
+        reader.start()
+        reader.join(TIMEOUT_SECONDS / 2)
+        assert served, "a cache hit waited for the snapshot write"
+        assert not release.is_set()
+    finally:
+        release.set()
+        loader.join(TIMEOUT_SECONDS)
+
+
+def test_fresh_process_is_served_from_the_snapshot(cache, monkeypatch):
+    frames, version = cache.load_sheet_data(PROGRAM)
+
+    # As after a restart: nothing in memory; background refreshes are held
+    # back so what is served can be checked
+    monkeypatch.setattr(data_cache, "_partitions", {})
+    monkeypatch.setattr(data_cache, "_start_refresh", lambda partition: None)
+
+    restored, restored_version = cache.load_sheet_data(PROGRAM)
+    assert restored_version == version
+    assert cache.get_data_status(PROGRAM)["source"] == "snapshot"
+    assert restored["enrollment"].equals(frames["enrollment"])
+
+# -------------------------------
+# Single Flight
+# -------------------------------
+
+def test_concurrent_first_loads_share_one_fetch(cache, monkeypatch):
+    sessions = 8
+    backend = storage._backends["fake"]
+    read_sheets = backend.read_sheets
+    fetches, waiting = [], threading.Semaphore(0)
+    release = threading.Event()
+
+    def slow_read_sheets(partition):
+        fetches.append(partition)
+        release.wait(TIMEOUT_SECONDS)
+        return read_sheets(partition)
+
+    def counting_increment(name, amount=1, **labels):
+        if name == "coalesced_fetches" and labels.get("kind") == "load":
+            waiting.release()
+
+    monkeypatch.setattr(backend, "read_sheets", slow_read_sheets)
+    monkeypatch.setattr(data_cache, "increment", counting_increment)
+
+    entries = []
+    threads = [
+        threading.Thread(target=lambda: entries.append(cache._ensure_loaded(PROGRAM)))
+        for _ in range(sessions)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        # Every session but the one fetching is waiting on that fetch
+        for _ in range(sessions - 1):
+            assert waiting.acquire(timeout=TIMEOUT_SECONDS)
+    finally:
+        release.set()
+        for thread in threads:
+            thread.join(TIMEOUT_SECONDS)
+
+    assert fetches == [PROGRAM]
+    assert len(entries) == sessions
+    assert all(entry["frames"] is entries[0]["frames"] for entry in entries)
+
+# -------------------------------
+# Data Page Baseline
+# -------------------------------
+
+def test_edit_baseline_is_served_from_the_cache(cache, client):
+    cache.load_sheet_data(PROGRAM)
+    calls = client.stats["calls"]
+
+    frames, grids, version = cache.read_for_edit(PROGRAM)
+    assert client.stats["calls"] == calls
+    assert version == cache.get_data_version(PROGRAM)
+    assert grids["enrollment"][0] == SHEET_COLUMNS["enrollment"]
+    assert len(grids["enrollment"]) == len(frames["enrollment"]) + 1
+
+
+def test_edit_baseline_reloads_frames_restored_from_the_snapshot(cache, monkeypatch):
+    cache.load_sheet_data(PROGRAM)
+    monkeypatch.setattr(data_cache, "_partitions", {})
+    monkeypatch.setattr(data_cache, "_start_refresh", lambda partition: None)
+    cache.load_sheet_data(PROGRAM)
+    assert cache.get_data_status(PROGRAM)["source"] == "snapshot"
+
+    frames, grids, version = cache.read_for_edit(PROGRAM)
+    assert grids is not None
+    assert cache.get_data_status(PROGRAM)["source"] == "sheets"
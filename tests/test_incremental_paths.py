@@ -0,0 +1,225 @@
+"""
+Checks of the paths that change data in place instead of rewriting it:
+the cell-diff writer (utils/sheet_writer.py) against the in-process fake
+Sheets client, and the incremental metric updates (utils/metric_store.py)
+against a full recomputation.
+
+Run from the repository root with `python -m pytest`.
+"""
+
+# -------------------------------
+# Imports
+# -------------------------------
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import PROGRAMS, SHEET_COLUMNS, SHEET_INDEXES, YEAR_LEVELS, coerce_frame, values_to_frame
+from utils import data_cache, snapshot, storage
+from utils.fake_sheets import FakeClient
+from utils.metric_store import COUNT_COLUMNS, MetricStore
+from utils.sheet_writer import diff_grids, frame_to_grid
+from utils.storage import SheetsBackend
+
+PROGRAM = next(iter(PROGRAMS))
+
+# -------------------------------
+# Fixtures
+# -------------------------------
+
+def _grids(years):
+    """Worksheet grids with one row per year and simple counts."""
+    rows = {
+        "enrollment": [[year, *(100 + i * 10 + year % 7 for i in range(len(YEAR_LEVELS)))] for year in years],
+        "graduation": [[year, 50 + year % 5, 30 + year % 3] for year in years],
+        "cohort": [[year, 80 + year % 4, 60 + year % 6] for year in years]
+    }
+    return {key: [SHEET_COLUMNS[key]] + rows[key] for key in SHEET_COLUMNS}
+
+
+@pytest.fixture
+def backend():
+    client = FakeClient()
+    ordered = sorted(SHEET_INDEXES, key=SHEET_INDEXES.get)
+    grids = _grids(range(2015, 2021))
+    client.create(PROGRAMS[PROGRAM]["spreadsheet"], {key.title(): grids[key] for key in ordered})
+    return SheetsBackend(client)
+
+
+@pytest.fixture
+def cached_backend(backend, monkeypatch, tmp_path):
+    """Route utils.data_cache to the fake backend, with snapshots in tmp_path."""
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", "fake")
+    monkeypatch.setitem(storage._backends, "fake", backend)
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", tmp_path)
+    data_cache.invalidate_sheet_cache(PROGRAM)
+    yield backend
+    data_cache.invalidate_sheet_cache(PROGRAM)
+
+
+def _add_total_row(backend):
+    """Append a "Total" row, as hand-kept sheets have, which coerces to a blank Year."""
+    spreadsheet = backend.client().open(PROGRAMS[PROGRAM]["spreadsheet"])
+    values = spreadsheet._by_title("Enrollment").values
+    values.append(["Total"] + [sum(row[i] for row in values[1:]) for i in range(1, len(values[0]))])
+
+
+def _copy(frames):
+    return {key: df.copy() for key, df in frames.items()}
+
+
+def _assert_stored(backend, expected):
+    """The sheet now reads back exactly as the expected frames."""
+    stored = backend.read_frames(PROGRAM)
+    for key, df in expected.items():
+        assert frame_to_grid(stored[key]) == frame_to_grid(coerce_frame(df, key)), key
+
+# -------------------------------
+# Diff Writer
+# -------------------------------
+
+def test_diff_grids_returns_changed_runs_only():
+    old = [["Year", "A", "B"], ["2020", "1", "2"], ["2021", "3", "4"]]
+    new = [["Year", "A", "B"], ["2020", "1", "9"], ["2021", "7", "8"], ["2022", "5", ""]]
+    assert diff_grids(old, new) == [(2, 3, ["9"]), (3, 2, ["7", "8"]), (4, 1, ["2022", "5"])]
+
+
+def test_unchanged_frames_write_nothing(backend):
+    frames = backend.read_frames(PROGRAM)
+    calls = backend.client().stats["calls"]
+    assert backend.write_changes(PROGRAM, frames, _copy(frames)) == []
+    assert backend.client().stats["calls"] == calls
+
+
+def test_edited_cells_round_trip(backend):
+    frames = backend.read_frames(PROGRAM)
+    edited = _copy(frames)
+    edited["enrollment"].loc[2, "Second Year"] = 999
+    edited["cohort"].loc[0, "Cohort Graduates"] = pd.NA
+
+    assert backend.write_changes(PROGRAM, frames, edited) == ["enrollment", "cohort"]
+    _assert_stored(backend, edited)
+
+
+def test_deleted_rows_are_cleared(backend):
+    frames = backend.read_frames(PROGRAM)
+    edited = _copy(frames)
+    edited["enrollment"] = edited["enrollment"].drop(index=[1, 4]).reset_index(drop=True)
+    edited["graduation"] = edited["graduation"].iloc[:2]
+
+    backend.write_changes(PROGRAM, frames, edited)
+    _assert_stored(backend, edited)
+
+
+def test_appended_rows_round_trip(backend):
+    frames = backend.read_frames(PROGRAM)
+    edited = _copy(frames)
+    header, *rows = _grids([2021, 2022])["enrollment"]
+    edited["enrollment"] = pd.concat(
+        [edited["enrollment"].astype({"Year": "Int16"}), pd.DataFrame(rows, columns=header).astype("Int16")],
+        ignore_index=True
+    )
+
+    backend.write_changes(PROGRAM, frames, edited)
+    _assert_stored(backend, edited)
+
+
+def test_counts_are_written_as_numbers(backend):
+    grids = backend.read_grids(PROGRAM)
+    frames = backend.read_frames(PROGRAM)
+    edited = _copy(frames)
+    edited["enrollment"].loc[0, "First Year"] = 7
+    edited["enrollment"].loc[1, "Second Year"] = pd.NA
+    appended = pd.DataFrame([[2021, 1, 2, 3, None]], columns=SHEET_COLUMNS["enrollment"]).astype("Int16")
+    edited["enrollment"] = pd.concat([edited["enrollment"].astype({"Year": "Int16"}), appended], ignore_index=True)
+    backend.write_changes(PROGRAM, frames, edited, grids)
+
+    stored = backend.read_grids(PROGRAM)["enrollment"]
+    assert stored[1][1] == 7
+    assert stored[2][2] == ""
+    assert stored[-1][:4] == [2021, 1, 2, 3]
+
+
+def test_rows_with_unparsed_cells_can_be_deleted(backend):
+    _add_total_row(backend)
+    grids = backend.read_grids(PROGRAM)
+    frames = backend.read_frames(PROGRAM)
+    assert frames["enrollment"]["Year"].isna().iloc[-1]
+
+    edited = _copy(frames)
+    edited["enrollment"] = edited["enrollment"].iloc[:-1]
+    backend.write_changes(PROGRAM, frames, edited, grids)
+
+    assert all(row[0] != "Total" for row in backend.read_grids(PROGRAM)["enrollment"])
+    _assert_stored(backend, edited)
+
+
+def test_untouched_unparsed_cells_are_kept(backend):
+    _add_total_row(backend)
+    grids = backend.read_grids(PROGRAM)
+    frames = backend.read_frames(PROGRAM)
+
+    edited = _copy(frames)
+    edited["enrollment"].loc[0, "First Year"] = 1
+    backend.write_changes(PROGRAM, frames, edited, grids)
+
+    stored = backend.read_grids(PROGRAM)["enrollment"]
+    assert stored[-1][0] == "Total"
+    assert stored[1][1] == 1
+
+
+def test_write_refused_when_sheet_changed_since_load(cached_backend):
+    frames, grids, version = data_cache.read_for_edit(PROGRAM)
+
+    # Someone else saves first
+    other = _copy(frames)
+    other["cohort"].loc[0, "Cohort Enrollment"] = 1
+    data_cache.write_sheet_changes(PROGRAM, frames, other, expected_version=version)
+
+    mine = _copy(frames)
+    mine["enrollment"].loc[0, "First Year"] = 2
+    with pytest.raises(data_cache.StaleDataError):
+        data_cache.write_sheet_changes(PROGRAM, frames, mine, expected_version=version)
+    _assert_stored(cached_backend, other)
+
+# -------------------------------
+# Incremental Metrics
+# -------------------------------
+
+def _assert_same_metrics(store, expected):
+    pd.testing.assert_frame_equal(store.kpi_table, expected.kpi_table)
+    pd.testing.assert_frame_equal(store.grad_df, expected.grad_df)
+    pd.testing.assert_frame_equal(store.cohort_df, expected.cohort_df)
+    pd.testing.assert_frame_equal(store.dropout_df, expected.dropout_df)
+
+
+def _random_edit(frames, rng):
+    """Copy of frames with a few count cells set to a new count, zero or blank."""
+    edited = _copy(frames)
+    for _ in range(rng.integers(1, 4)):
+        key = rng.choice(list(COUNT_COLUMNS))
+        row = rng.integers(len(edited[key]))
+        column = rng.choice(COUNT_COLUMNS[key])
+        edited[key].loc[row, column] = rng.choice([int(rng.integers(1, 500)), 0, pd.NA])
+    return edited
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_incremental_metrics_match_full_rebuild(seed):
+    rng = np.random.default_rng(seed)
+    frames = {key: values_to_frame(grid, key) for key, grid in _grids(range(2000, 2021)).items()}
+    store = MetricStore(frames)
+
+    # Chained, as the dashboard applies one version after another
+    for _ in range(5):
+        frames = _random_edit(frames, rng)
+        store = store.updated(frames)
+        _assert_same_metrics(store, MetricStore(frames))
+
+
+def test_metrics_rebuilt_when_rows_change():
+    frames = {key: values_to_frame(grid, key) for key, grid in _grids(range(2000, 2021)).items()}
+    store = MetricStore(frames)
+
+    edited = {key: values_to_frame(grid, key) for key, grid in _grids(range(2000, 2022)).items()}
+    _assert_same_metrics(store.updated(edited), MetricStore(edited))
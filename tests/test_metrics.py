@@ -0,0 +1,317 @@
+"""
+Checks of the vectorized metric functions (utils/metrics.py) against the
+row-by-row formulas they replaced, on blank counts, zero denominators,
+rows without a year and years missing from a sheet.
+
+Run from the repository root with `python -m pytest`.
+"""
+
+# -------------------------------
+# Imports
+# -------------------------------
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import SHEET_COLUMNS, YEAR_LEVELS, values_to_frame
+from utils.metrics import (
+    COHORT_SURVIVAL_RATE,
+    GRADUATION_RATE,
+    RatioMetric,
+    build_kpi_table,
+    compute_cohort_survival_rate,
+    compute_dropout,
+    compute_graduation_rate,
+    compute_ratio_metrics,
+    kpi_card_values
+)
+
+# -------------------------------
+# Fixtures
+# -------------------------------
+
+def _random_grid(sheet_key, rng, years=range(2000, 2016)):
+    """
+    A values grid with counts that are sometimes blank or zero, a few years
+    left out and a "Total" row in the middle, as hand-kept sheets have.
+    """
+    rows = []
+    for year in years:
+        if rng.random() < 0.15:
+            continue  # Year missing from this sheet
+        counts = [
+            "" if roll < 0.1 else 0 if roll < 0.2 else int(rng.integers(1, 200))
+            for roll in rng.random(len(SHEET_COLUMNS[sheet_key]) - 1)
+        ]
+        rows.append([year, *counts])
+    rows.insert(len(rows) // 2, ["Total", *([""] * (len(SHEET_COLUMNS[sheet_key]) - 1))])
+    return [SHEET_COLUMNS[sheet_key]] + rows
+
+
+def _random_frame(sheet_key, seed):
+    return values_to_frame(_random_grid(sheet_key, np.random.default_rng(seed)), sheet_key)
+
+
+def _untyped(df):
+    """The frame as the old formulas read it: float counts and years, NaN for blanks."""
+    return df.astype(object).where(df.notna(), np.nan).astype(float).reset_index(drop=True)
+
+# -------------------------------
+# Drop-out Rate
+# -------------------------------
+
+def old_compute_dropout(df):
+    """compute_dropout as a per-row loop, before it was vectorized."""
+    dropout_data = []
+    df = df.copy()
+    df["Year"] = pd.to_numeric(df["Year"], errors="coerce")
+
+    for i in range(1, len(df)):
+        if pd.isna(df.loc[i - 1, "Year"]) or pd.isna(df.loc[i, "Year"]):
+            continue
+
+        year = int(df.loc[i, "Year"])
+        prev_row = df.loc[i - 1]
+        current_row = df.loc[i]
+
+        dropped_total = 0
+        enrolled_total = 0
+        for prev_level, next_level in zip(YEAR_LEVELS, YEAR_LEVELS[1:]):
+            enrolled = pd.to_numeric(prev_row[prev_level], errors="coerce")
+            advanced = pd.to_numeric(current_row[next_level], errors="coerce")
+
+            if pd.notna(enrolled) and enrolled > 0 and pd.notna(advanced):
+                dropped_total += enrolled - advanced
+                enrolled_total += enrolled
+
+        dropout_rate = (dropped_total / enrolled_total) * 100 if enrolled_total > 0 else 0
+        dropout_data.append({"Year": year, "Drop-out Rate": dropout_rate})
+
+    return pd.DataFrame(dropout_data, columns=["Year", "Drop-out Rate"])
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_dropout_matches_row_loop(seed):
+    enroll_df = _random_frame("enrollment", seed)
+    expected = old_compute_dropout(_untyped(enroll_df))
+
+    result = compute_dropout(enroll_df)
+    assert result["Year"].tolist() == expected["Year"].tolist()
+    np.testing.assert_allclose(result["Drop-out Rate"], expected["Drop-out Rate"].astype(float))
+
+
+def test_dropout_edge_cases():
+    enroll_df = values_to_frame([
+        SHEET_COLUMNS["enrollment"],
+        [2018, 10, 0, "", 5],
+        [2019, "", 8, 7, 1],     # Nobody in 2018's Second Year; its Third Year is blank
+        [2020, 0, 0, 0, 0],      # Counts after a blank First Year
+        ["Total", 10, 8, 7, 6],  # Pairs with a "Total" row are skipped
+        [2021, 5, 4, 3, 2]
+    ], "enrollment")
+
+    result = compute_dropout(enroll_df)
+    assert result["Year"].tolist() == [2019, 2020]
+    np.testing.assert_allclose(result["Drop-out Rate"], [20.0, 100.0])
+    pd.testing.assert_frame_equal(
+        result.astype({"Year": "int64"}),
+        old_compute_dropout(_untyped(enroll_df)).astype({"Year": "int64", "Drop-out Rate": float})
+    )
+
+# -------------------------------
+# Graduation and Cohort Survival Rates
+# -------------------------------
+
+def old_ratio(df, numerator, denominator):
+    """compute_graduation_rate and compute_cohort_survival_rate as a per-row apply."""
+    return df.apply(
+        lambda row: (row[numerator] / row[denominator] * 100) if row[denominator] > 0 else 0,
+        axis=1
+    )
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("sheet_key, compute, spec", [
+    ("graduation", compute_graduation_rate, GRADUATION_RATE),
+    ("cohort", compute_cohort_survival_rate, COHORT_SURVIVAL_RATE)
+])
+def test_rates_match_row_apply(seed, sheet_key, compute, spec):
+    df = _random_frame(sheet_key, seed)
+    expected = old_ratio(_untyped(df), spec.numerator, spec.denominator)
+
+    result = compute(df)
+    np.testing.assert_allclose(result[spec.output], expected.astype(float))
+    pd.testing.assert_frame_equal(result[df.columns], df)
+
+
+def test_rates_edge_cases():
+    grad_df = values_to_frame([
+        SHEET_COLUMNS["graduation"],
+        [2018, 10, 5],
+        [2019, 0, 0],      # Zero denominator
+        [2020, "", 4],     # Blank denominator
+        [2021, 10, ""],    # Blank numerator
+        ["Total", 20, 9]   # No year; still gets a rate
+    ], "graduation")
+    expected = old_ratio(_untyped(grad_df), GRADUATION_RATE.numerator, GRADUATION_RATE.denominator)
+
+    rates = compute_graduation_rate(grad_df)["Graduation Rate (%)"]
+    np.testing.assert_allclose(rates, [50.0, 0.0, 0.0, np.nan, 45.0])
+    np.testing.assert_allclose(rates, expected.astype(float))
+
+
+def test_ratio_specs_are_computed_together():
+    cohort_df = _random_frame("cohort", 0)
+    specs = [
+        COHORT_SURVIVAL_RATE,
+        RatioMetric("Cohort Enrollment", "Cohort Graduates", "Enrollment per Graduate", scale=1.0)
+    ]
+
+    result = compute_ratio_metrics(cohort_df, specs)
+    for spec in specs:
+        expected = old_ratio(_untyped(cohort_df), spec.numerator, spec.denominator) / 100 * spec.scale
+        np.testing.assert_allclose(result[spec.output], expected.astype(float))
+
+# -------------------------------
+# KPI Table
+# -------------------------------
+
+def _change(delta, previous_year, text, higher_is_better=True):
+    if delta > 0:
+        return f"▲ +{text} since {previous_year}", "green" if higher_is_better else "red"
+    if delta < 0:
+        return f"▼ {text} since {previous_year}", "red" if higher_is_better else "green"
+    return f"No change from {previous_year}", "#888"
+
+
+def _old_rate_card(selected_year, df, numerator, denominator):
+    """The old Graduation Rate / Cohort Survival Rate card."""
+    if selected_year == "All Years":
+        total = df[denominator].sum()
+        rate = (df[numerator].sum() / total) * 100 if total > 0 else 0
+        return f"{rate:.1f}%", "Overall Rate", "#888"
+
+    rate = 0
+    current = df[df["Year"] == selected_year]
+    if not current.empty and current.iloc[0][denominator] > 0:
+        rate = current.iloc[0][numerator] / current.iloc[0][denominator] * 100
+
+    prev_year = str(int(selected_year) - 1)
+    prev_row = df[df["Year"] == prev_year]
+    if prev_row.empty or not prev_row.iloc[0][denominator] > 0:
+        return f"{rate:.1f}%", f"No data for {prev_year}", "#888"
+    delta = rate - prev_row.iloc[0][numerator] / prev_row.iloc[0][denominator] * 100
+    return (f"{rate:.1f}%", *_change(delta, prev_year, f"{delta:.1f}%"))
+
+
+def old_kpi_cards(selected_year, enroll_df, grad_df, cohort_df, dropout_df):
+    """
+    (value_text, change_text, change_color) of each card as show_kpi_cards
+    rendered it, before the KPI table. Years of the sheet frames are strings,
+    as the old code compared them.
+    """
+    cards = []
+
+    # Total Enrollment
+    counts = enroll_df.iloc[:, 1:]
+    if selected_year == "All Years":
+        cards.append((f"{int(counts.sum().sum())}", "Overall Total", "#888"))
+    else:
+        current = counts[enroll_df["Year"] == selected_year]
+        current_total = current.sum(axis=1).values[0] if not current.empty else 0
+        previous_year = str(int(selected_year) - 1)
+        previous = counts[enroll_df["Year"] == previous_year]
+        previous_total = previous.sum(axis=1).values[0] if not previous.empty else 0
+        delta = current_total - previous_total
+        # The old records held whole numbers, so the change printed without decimals
+        cards.append((f"{int(current_total)}", *_change(delta, previous_year, f"{int(delta)}")))
+
+    cards.append(_old_rate_card(selected_year, grad_df, GRADUATION_RATE.numerator, GRADUATION_RATE.denominator))
+    cards.append(_old_rate_card(
+        selected_year, cohort_df, COHORT_SURVIVAL_RATE.numerator, COHORT_SURVIVAL_RATE.denominator
+    ))
+
+    # Drop-out Rate
+    if selected_year == "All Years":
+        cards.append((f"{dropout_df['Drop-out Rate'].mean():.2f}%", "Overall Avg", "#888"))
+    else:
+        year = int(selected_year)
+        row = dropout_df[dropout_df["Year"] == year]
+        current_rate = row["Drop-out Rate"].values[0] if not row.empty else 0
+        prev_row = dropout_df[dropout_df["Year"] == year - 1]
+        prev_rate = prev_row["Drop-out Rate"].values[0] if not prev_row.empty else 0
+        delta = current_rate - prev_rate
+        cards.append((
+            f"{current_rate:.2f}%",
+            *_change(delta, year - 1, f"{delta:.1f}%", higher_is_better=False)
+        ))
+
+    return cards
+
+
+def _string_years(df):
+    df = _untyped(df)
+    df["Year"] = [str(int(year)) if pd.notna(year) else "Total" for year in df["Year"]]
+    return df
+
+
+def _assert_same_cards(frames, selected_years):
+    enroll_df, grad_df, cohort_df = frames
+    dropout_df = compute_dropout(enroll_df)
+    kpi_table = build_kpi_table(enroll_df, grad_df, cohort_df, dropout_df)
+
+    old_frames = [_string_years(df) for df in frames]
+    for selected_year in selected_years:
+        cards = kpi_card_values(kpi_table, selected_year)
+        assert [(card["value_text"], card["change_text"], card["change_color"]) for card in cards] == (
+            old_kpi_cards(str(selected_year), *old_frames, dropout_df)
+        ), selected_year
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_kpi_cards_match_old_cards(seed):
+    frames = [_random_frame(key, seed + i * 100) for i, key in enumerate(["enrollment", "graduation", "cohort"])]
+    # A blank numerator showed as "nan%" before; see test_kpi_blank_rate_counts_as_missing
+    for df, spec in zip(frames[1:], [GRADUATION_RATE, COHORT_SURVIVAL_RATE]):
+        df[spec.numerator] = df[spec.numerator].fillna(0)
+
+    years = {int(year) for df in frames for year in df["Year"].dropna()}
+    # Every year in any sheet, plus years none of them has
+    _assert_same_cards(frames, [*sorted(years), 1990, 2030, "All Years"])
+
+
+def test_kpi_cards_edge_cases():
+    frames = [
+        values_to_frame([
+            SHEET_COLUMNS["enrollment"],
+            [2018, 10, 8, 6, 4],
+            [2019, "", 9, 7, 5],     # Blank counts add nothing
+            [2021, 0, 0, 0, 0],      # 2020 is missing
+            ["Total", 10, 17, 13, 9] # Counted in the all-years total only
+        ], "enrollment"),
+        values_to_frame([
+            SHEET_COLUMNS["graduation"],
+            [2018, 0, 0],            # Zero denominator
+            [2019, 10, 5],
+            [2020, "", 3]            # Blank denominator
+        ], "graduation"),
+        values_to_frame([
+            SHEET_COLUMNS["cohort"],
+            [2019, 20, 10],
+            [2019, 40, 10],          # Only the first row of a year counts
+            [2021, 10, 10]
+        ], "cohort")
+    ]
+    _assert_same_cards(frames, [2018, 2019, 2020, 2021, 2022, "All Years"])
+
+
+def test_kpi_blank_rate_counts_as_missing():
+    enroll_df = values_to_frame([SHEET_COLUMNS["enrollment"], [2019, 1, 1, 1, 1], [2020, 1, 1, 1, 1]], "enrollment")
+    grad_df = values_to_frame([SHEET_COLUMNS["graduation"], [2019, 10, ""], [2020, 10, 5]], "graduation")
+    cohort_df = values_to_frame([SHEET_COLUMNS["cohort"], [2019, 10, 5], [2020, 10, ""]], "cohort")
+    kpi_table = build_kpi_table(enroll_df, grad_df, cohort_df, compute_dropout(enroll_df))
+
+    # The old cards said "No change" for both, and showed the blank 2020 rate as "nan%"
+    grad_card, cohort_card = kpi_card_values(kpi_table, 2020)[1:3]
+    assert (grad_card["value_text"], grad_card["change_text"]) == ("50.0%", "No data for 2019")
+    assert (cohort_card["value_text"], cohort_card["change_text"]) == ("0.0%", "▼ -50.0% since 2019")
@@ -0,0 +1,182 @@
+"""
+Checks of the per-student record import (utils/records.py): parsing an
+uploaded file, and deriving the enrollment, graduation and cohort sheets
+against a per-student count of the same records.
+
+Run from the repository root with `python -m pytest`.
+"""
+
+# -------------------------------
+# Imports
+# -------------------------------
+import io
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import SHEET_COLUMNS, YEAR_LEVELS, values_to_frame
+from utils.records import read_records_file, records_to_frames
+from utils.sheet_writer import frame_to_grid
+
+FINAL_LEVEL = len(YEAR_LEVELS)
+
+# -------------------------------
+# Fixtures
+# -------------------------------
+
+RECORDS_CSV = """Student ID,Year,Year Level,Graduated
+A,2016,1,
+A,2017,2,
+A,2018,3,
+A,2019,4,yes
+B,2016,1,
+B,2017,1,
+B,2018,2,
+B,2019,3,
+B,2020,4,1
+C,2018,Third Year,
+C,2019,Fourth Year,TRUE
+D,2017,1,
+D,2017,1,
+E,2019,2,
+E,2019,4,no
+,2019,1,
+F,2019,Fifth Year,
+G,20.5,1,
+"""
+
+
+def _records(seed, students=300, years=range(2000, 2016)):
+    """
+    Random student histories with the untidy parts of real uploads:
+    repeated levels, drop-outs, transferees who enter above the first
+    level, graduations before the final level and duplicate rows.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for student in range(students):
+        year = int(rng.choice(years))
+        level = 1 if rng.random() < 0.8 else int(rng.integers(2, FINAL_LEVEL + 1))
+        while year < years.stop:
+            graduated = (level == FINAL_LEVEL and rng.random() < 0.7) or rng.random() < 0.02
+            rows.append((f"S{student}", year, level, graduated))
+            if rng.random() < 0.05:
+                rows.append((f"S{student}", year, max(1, level - 1), False))  # Stray duplicate
+            if graduated or rng.random() < 0.05:
+                break
+            year += 1
+            level = min(FINAL_LEVEL, level + (rng.random() < 0.85))
+
+    rows = [rows[i] for i in rng.permutation(len(rows))]
+    return pd.DataFrame({
+        "Student ID": pd.Categorical([row[0] for row in rows]),
+        "Year": pd.Series([row[1] for row in rows], dtype="int16"),
+        "Year Level": pd.Series([row[2] for row in rows], dtype="int8"),
+        "Graduated": pd.Series([row[3] for row in rows], dtype="bool")
+    })
+
+
+def count_records(records):
+    """The three sheets as grids, counted student by student."""
+    # Each student and year: the highest level recorded, graduated if any
+    # record at that level says so
+    kept = {}
+    for student, year, level, graduated in records.itertuples(index=False):
+        best = kept.get((student, year))
+        if best is None or (level, graduated) > best:
+            kept[(student, year)] = (level, graduated)
+
+    enrollment = defaultdict(lambda: [0] * FINAL_LEVEL)
+    graduating = defaultdict(int)
+    entry, graduated_in = {}, {}
+    for (student, year), (level, graduated) in kept.items():
+        enrollment[year][level - 1] += 1
+        if level == FINAL_LEVEL:
+            graduating[year] += 1
+        if level == 1:
+            entry[student] = min(year, entry.get(student, year))
+        if graduated:
+            graduated_in[student] = min(year, graduated_in.get(student, year))
+
+    on_time = defaultdict(int)
+    cohorts = defaultdict(lambda: [0, 0])
+    for student, year in entry.items():
+        cohorts[year][0] += 1
+        if student in graduated_in:
+            cohorts[year][1] += 1
+            if graduated_in[student] - year == FINAL_LEVEL - 1:
+                on_time[graduated_in[student]] += 1
+
+    return {
+        "enrollment": [SHEET_COLUMNS["enrollment"]] + [[year, *enrollment[year]] for year in sorted(enrollment)],
+        "graduation": [SHEET_COLUMNS["graduation"]] + [
+            [year, graduating[year], on_time[year]] for year in sorted(set(graduating) | set(on_time))
+        ],
+        "cohort": [SHEET_COLUMNS["cohort"]] + [[year, *cohorts[year]] for year in sorted(cohorts)]
+    }
+
+
+def _assert_frames(frames, grids):
+    for key, grid in grids.items():
+        assert frame_to_grid(frames[key]) == frame_to_grid(values_to_frame(grid, key)), key
+
+# -------------------------------
+# Parsing
+# -------------------------------
+
+def test_records_file_is_parsed_and_checked():
+    result = read_records_file(io.StringIO(RECORDS_CSV), "records.csv")
+
+    assert result["rows_read"] == 18
+    assert result["rejected"] == 3
+    assert result["errors"] == [
+        "Row 17: missing Student ID",
+        "Row 18: invalid Year Level",
+        "Row 19: missing or non-integer Year"
+    ]
+    records = result["data"]
+    assert records["Year Level"].tolist()[9:11] == [3, 4]  # Level names read as numbers
+    assert records["Graduated"].sum() == 3
+    assert records["Student ID"].dtype == "category"
+
+# -------------------------------
+# Sheet Derivation
+# -------------------------------
+
+def test_sheets_derived_from_records():
+    frames = records_to_frames(read_records_file(io.StringIO(RECORDS_CSV), "records.csv")["data"])
+
+    _assert_frames(frames, {
+        "enrollment": [
+            SHEET_COLUMNS["enrollment"],
+            [2016, 2, 0, 0, 0],
+            [2017, 2, 1, 0, 0],  # D's duplicate row counts once
+            [2018, 0, 1, 2, 0],
+            [2019, 0, 0, 1, 3],  # E counted once, at the higher level
+            [2020, 0, 0, 0, 1]
+        ],
+        "graduation": [
+            SHEET_COLUMNS["graduation"],
+            [2019, 3, 1],        # Only A graduated three years after entering
+            [2020, 1, 0]
+        ],
+        "cohort": [
+            SHEET_COLUMNS["cohort"],
+            [2016, 2, 2],        # B graduated late, but graduated
+            [2017, 1, 0]         # C (a transferee) and E are in no cohort
+        ]
+    })
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_sheets_match_per_student_count(seed):
+    records = _records(seed)
+    _assert_frames(records_to_frames(records), count_records(records))
+
+
+def test_no_records_derive_empty_sheets():
+    result = read_records_file(io.StringIO("Student ID,Year,Year Level,Graduated\n"), "records.csv")
+    frames = records_to_frames(result["data"])
+    assert {key: len(df) for key, df in frames.items()} == {"enrollment": 0, "graduation": 0, "cohort": 0}
@@ -0,0 +1,108 @@
+"""
+Checks of the storage backends (utils/storage.py): the SQLite engine
+against the in-process fake Sheets client, and the shared cache on top.
+
+Run from the repository root with `python -m pytest`.
+"""
+
+# -------------------------------
+# Imports
+# -------------------------------
+import pandas as pd
+import pytest
+
+from config import PROGRAMS, SHEET_COLUMNS, values_to_frame
+from utils import data_cache, snapshot, storage
+from utils.fake_sheets import FakeClient
+from utils.gsheet import LEGACY_SPREADSHEET, load_data
+from utils.sheet_writer import frame_to_grid
+from utils.storage import SQLiteBackend, StorageBackend
+
+PROGRAMS_USED = list(PROGRAMS)
+
+# -------------------------------
+# Fixtures
+# -------------------------------
+
+def _frames(years, repeat=1):
+    """Typed frames with `repeat` rows per year, as per-term sheets keep."""
+    rows = {
+        "enrollment": [[year, 100 + year % 7, 90, 80 + term, 70] for year in years for term in range(repeat)],
+        "graduation": [[year, 50 + year % 5, 30 + term] for year in years for term in range(repeat)],
+        "cohort": [[year, 80 + year % 4, ""] for year in years for term in range(repeat)]
+    }
+    return {key: values_to_frame([SHEET_COLUMNS[key]] + rows[key], key) for key in SHEET_COLUMNS}
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path):
+    backend = SQLiteBackend(tmp_path / "dashboard.sqlite")
+    for i, partition in enumerate(PROGRAMS_USED):
+        backend.replace_frames(partition, _frames(range(2010 + i, 2021), repeat=2))
+    return backend
+
+
+@pytest.fixture
+def cached_sqlite(sqlite_backend, monkeypatch, tmp_path):
+    """Route utils.data_cache to the SQLite backend, with snapshots in tmp_path."""
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", "sqlite")
+    monkeypatch.setitem(storage._backends, "sqlite", sqlite_backend)
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", tmp_path / "snapshot")
+    for partition in PROGRAMS_USED:
+        data_cache.invalidate_sheet_cache(partition)
+    yield sqlite_backend
+    for partition in PROGRAMS_USED:
+        data_cache.invalidate_sheet_cache(partition)
+
+
+def _assert_same_frames(left, right):
+    for key in SHEET_COLUMNS:
+        pd.testing.assert_frame_equal(
+            left[key].reset_index(drop=True), right[key].reset_index(drop=True), check_dtype=False
+        )
+
+# -------------------------------
+# SQLite Backend
+# -------------------------------
+
+def test_sql_sums_match_pandas_sums(sqlite_backend):
+    versions, frames = sqlite_backend.read_rollup(PROGRAMS_USED)
+    expected_versions, expected = StorageBackend.read_rollup(sqlite_backend, PROGRAMS_USED)
+
+    assert versions == expected_versions
+    _assert_same_frames(frames, expected)
+    assert frames["enrollment"]["Year"].is_unique
+
+
+def test_cached_rollup_is_labelled_with_its_frames_version(cached_sqlite):
+    partition = PROGRAMS_USED[0]
+    frames, version = data_cache.load_rollup([partition])
+    assert version == ((partition, cached_sqlite.version(partition)),)
+
+    # A write after the load leaves the cached rollup and its label as they were
+    cached_sqlite.replace_frames(partition, _frames(range(2000, 2005)))
+    again, same_version = data_cache.load_rollup([partition])
+    assert same_version == version
+    _assert_same_frames(again, frames)
+
+    data_cache.invalidate_sheet_cache(partition)
+    fresh, new_version = data_cache.load_rollup([partition])
+    assert new_version == ((partition, cached_sqlite.version(partition)),)
+    _assert_same_frames(fresh, cached_sqlite.read_rollup([partition])[1])
+
+# -------------------------------
+# Legacy Loader
+# -------------------------------
+
+def test_legacy_loader_reads_the_original_workbook():
+    client = FakeClient()
+    legacy, current = _frames(range(2000, 2005)), _frames(range(2015, 2021))
+    for title, frames in [(LEGACY_SPREADSHEET, legacy), (PROGRAMS[PROGRAMS_USED[0]]["spreadsheet"], current)]:
+        client.create(title, {key.title(): frame_to_grid(df) for key, df in frames.items()})
+
+    _assert_same_frames(dict(zip(SHEET_COLUMNS, load_data(client))), legacy)
+
+
+def test_legacy_loader_falls_back_to_the_default_program(cached_sqlite):
+    frames = dict(zip(SHEET_COLUMNS, load_data()))
+    _assert_same_frames(frames, cached_sqlite.read_frames(PROGRAMS_USED[0]))
@@ -0,0 +1,78 @@
+# -------------------------------
+# Imports
+# -------------------------------
+import numpy as np
+import pandas as pd
+
+from config import YEAR_LEVELS
+from utils.metrics import ALL_YEARS
+
+# -------------------------------
+# Chart Series Settings
+# -------------------------------
+# The data behind each dashboard chart, as plain frames. Nothing here
+# imports Streamlit or Altair: utils.charts turns these frames into Vega
+# specs, report.py draws them with matplotlib and api.py serves them as
+# JSON. Inputs have one row per year (see data_cache.load_rollup), the
+# same frames the KPI cards are computed from, so payload size follows
+# the number of plotted points.
+
+# Line charts with more points than this are thinned before serializing;
+# the browser cannot show more distinct points in a 400px-tall chart anyway
+MAX_LINE_POINTS = 500
+
+# -------------------------------
+# Line Thinning
+# -------------------------------
+
+def downsample_line(df, value_col, max_points=MAX_LINE_POINTS):
+    """
+    Thin a line series to about max_points rows, keeping the minimum and
+    maximum of each bucket so peaks and dips survive. Shorter series are
+    returned as is.
+    """
+    if len(df) <= max_points:
+        return df
+
+    values = df[value_col].to_numpy(dtype=float, na_value=np.nan)
+    buckets = np.array_split(np.arange(len(df)), max(max_points // 2, 1))
+    keep = set()
+    for bucket in buckets:
+        bucket_values = values[bucket]
+        if np.isnan(bucket_values).all():
+            keep.add(bucket[0])
+            continue
+        keep.add(bucket[np.nanargmin(bucket_values)])
+        keep.add(bucket[np.nanargmax(bucket_values)])
+    return df.iloc[sorted(keep)]
+
+# -------------------------------
+# Chart Series
+# -------------------------------
+
+def chart_frames(enroll_df, grad_df, cohort_df, dropout_df, selected_year):
+    """Return the plotted frame of each chart for the selected year, from per-year frames."""
+    enroll_plot = enroll_df[enroll_df["Year"].notna()]
+    if selected_year != ALL_YEARS:
+        enroll_plot = enroll_plot[enroll_plot["Year"] == selected_year]
+    else:
+        # Year labels become text so the "Total" bar can share the axis
+        enroll_plot = enroll_plot.assign(Year=enroll_plot["Year"].astype(str))
+        total_row = {"Year": "Total", **{level: enroll_plot[level].sum() for level in YEAR_LEVELS}}
+        enroll_plot = pd.concat([enroll_plot, pd.DataFrame([total_row])], ignore_index=True)
+
+    frames = {
+        "enrollment": enroll_plot.melt(id_vars="Year", value_vars=YEAR_LEVELS, var_name="Level", value_name="Count"),
+        "graduation": grad_df[["Year", "Graduation Rate (%)"]],
+        "survival": cohort_df[["Year", "Cohort Survival Rate"]],
+        "dropout": dropout_df[["Year", "Drop-out Rate"]]
+    }
+    if selected_year != ALL_YEARS:
+        for key in ("graduation", "survival", "dropout"):
+            frames[key] = frames[key][frames[key]["Year"] == selected_year]
+
+    # Bars are exact per-year totals and are never thinned; lines may be
+    frames["graduation"] = downsample_line(frames["graduation"], "Graduation Rate (%)")
+    frames["survival"] = downsample_line(frames["survival"], "Cohort Survival Rate")
+    frames["dropout"] = downsample_line(frames["dropout"], "Drop-out Rate")
+    return frames
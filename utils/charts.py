@@ -0,0 +1,240 @@
+# -------------------------------
+# Imports
+# -------------------------------
+import copy
+import hashlib
+import json
+import threading
+
+import altair as alt
+import pyarrow as pa
+from cachetools import LRUCache
+
+from config import YEAR_LEVELS
+from utils.chart_series import chart_frames
+from utils.telemetry import increment, span
+
+# -------------------------------
+# Chart Spec Cache Settings
+# -------------------------------
+
+# Finished chart specs kept in memory; one entry holds the four dashboard
+# charts for a (data version, year, labels) combination
+CHART_CACHE_SIZE = 64
+
+_chart_cache = LRUCache(maxsize=CHART_CACHE_SIZE)
+_dataset_cache = LRUCache(maxsize=CHART_CACHE_SIZE)
+_chart_lock = threading.Lock()
+
+# -------------------------------
+# Chart Datasets
+# -------------------------------
+# Each chart plots one frame. It is trimmed to the plotted columns,
+# serialized to Arrow once per (data version, year) and registered under a
+# content-hash name; every layer of the chart references it by that name,
+# so toggling labels never re-serializes or re-sends the rows.
+
+def to_dataset(df):
+    """Serialize a frame to compact Arrow bytes and name it by content hash."""
+    # No index column and no pandas schema metadata; Vega only reads the columns
+    table = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata(None)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    data_bytes = sink.getvalue().to_pybytes()
+    return hashlib.md5(data_bytes).hexdigest(), data_bytes
+
+
+def get_chart_datasets(data_key, selected_year, enroll_df, grad_df, cohort_df, dropout_df):
+    """Return {chart: (name, arrow_bytes)}, built once per (data_key, selected_year)."""
+    key = (data_key, selected_year)
+    with _chart_lock:
+        datasets = _dataset_cache.get(key)
+
+    if datasets is None:
+        frames = chart_frames(enroll_df, grad_df, cohort_df, dropout_df, selected_year)
+        datasets = {chart: to_dataset(df) for chart, df in frames.items()}
+        with _chart_lock:
+            _dataset_cache[key] = datasets
+    return datasets
+
+# -------------------------------
+# Chart Builders
+# -------------------------------
+# Builders take the registered dataset name, not a frame, so base and
+# label layers share one data reference. Field types are spelled out since
+# Altair cannot infer them from named data.
+
+def enrollment_chart(data_name, show_labels):
+    """Grouped bar chart of enrollment per year level."""
+    base = alt.Chart(alt.NamedData(name=data_name))
+    level_order = YEAR_LEVELS
+
+    bar = base.mark_bar().encode(
+        x=alt.X('Year:N', title='Year'),
+        y=alt.Y('Count:Q', title='Enrollment'),
+        color=alt.Color('Level:N', sort=level_order),
+        xOffset=alt.XOffset('Level:N', sort=level_order),
+        tooltip=["Year:N", "Level:N", "Count:Q"]
+    )
+
+    if show_labels:
+        labels = base.mark_text(
+            dy=-10,
+            color='black',
+            fontSize=11
+        ).encode(
+            x=alt.X('Year:N'),
+            y='Count:Q',
+            text='Count:Q',
+            detail='Level:N'
+        )
+        chart = (bar + labels)
+    else:
+        chart = bar
+
+    return chart.properties(
+        title="🎓 Enrollment by Year Level",
+        height=400
+    )
+
+
+def graduation_chart(data_name, show_labels):
+    """Line chart of the graduation rate per year."""
+    base = alt.Chart(alt.NamedData(name=data_name))
+
+    line = base.mark_line(point=True, color="#551012").encode(
+        x=alt.X("Year:N"),
+        y=alt.Y("Graduation Rate (%):Q", scale=alt.Scale(domain=[0, 100])),
+        tooltip=["Year:N", alt.Tooltip("Graduation Rate (%):Q", format=".1f")]
+    )
+
+    if show_labels:
+        grad_labels = base.mark_text(
+            align="left", dy=-10, fontSize=11
+        ).encode(
+            x="Year:N",
+            y="Graduation Rate (%):Q",
+            text=alt.Text("Graduation Rate (%):Q", format=".1f")
+        )
+        line = line + grad_labels
+
+    return line.properties(
+        title="🎓 Graduation Rate",
+        height=400
+    )
+
+
+def survival_chart(data_name, show_labels):
+    """Line chart of the cohort survival rate per year."""
+    base = alt.Chart(alt.NamedData(name=data_name))
+
+    survival_line = base.mark_line(point=True).encode(
+        x="Year:N",
+        y=alt.Y("Cohort Survival Rate:Q", title="Survival Rate (%)"),
+        tooltip=["Year:N", alt.Tooltip("Cohort Survival Rate:Q", format=".1f")]
+    )
+
+    if show_labels:
+        survival_labels = base.mark_text(
+            align="left", dy=-10, fontSize=11
+        ).encode(
+            x="Year:N",
+            y="Cohort Survival Rate:Q",
+            text=alt.Text("Cohort Survival Rate:Q", format=".1f")
+        )
+        survival_line = survival_line + survival_labels
+
+    return survival_line.properties(
+        title="📈 Cohort Survival Rate",
+        height=400
+    )
+
+
+def dropout_chart(data_name, show_labels):
+    """Line chart of the drop-out rate per year."""
+    base = alt.Chart(alt.NamedData(name=data_name))
+
+    dropout_line = base.mark_line(point=True, color="#990000").encode(
+        x="Year:O",
+        y=alt.Y("Drop-out Rate:Q", title="Drop-out Rate (%)"),
+        tooltip=["Year:O", alt.Tooltip("Drop-out Rate:Q", format=".2f")]
+    )
+
+    if show_labels:
+        dropout_labels = base.mark_text(
+            align="left", dy=-10, fontSize=11
+        ).encode(
+            x="Year:O",
+            y="Drop-out Rate:Q",
+            text=alt.Text("Drop-out Rate:Q", format=".2f")
+        )
+        dropout_line = dropout_line + dropout_labels
+
+    return dropout_line.properties(
+        title="📉 Drop-out Rate",
+        height=400
+    )
+
+
+CHART_BUILDERS = {
+    "enrollment": enrollment_chart,
+    "graduation": graduation_chart,
+    "survival": survival_chart,
+    "dropout": dropout_chart
+}
+
+# -------------------------------
+# Spec Serialization
+# -------------------------------
+
+def to_spec(chart, dataset):
+    """Serialize a chart and attach its one named Arrow dataset."""
+    name, data_bytes = dataset
+    with alt.theme.enable("none"):
+        spec = chart.to_dict()
+    spec["datasets"] = {name: data_bytes}
+    return spec
+
+
+def payload_size(specs):
+    """Approximate bytes sent to the browser for a set of specs (JSON + Arrow)."""
+    total = 0
+    for spec in specs.values():
+        datasets = spec.get("datasets", {})
+        body = {key: value for key, value in spec.items() if key != "datasets"}
+        total += len(json.dumps(body)) + sum(len(data_bytes) for data_bytes in datasets.values())
+    return total
+
+# -------------------------------
+# Memoized Dashboard Charts
+# -------------------------------
+
+def get_chart_specs(data_key, selected_year, show_labels, enroll_df, grad_df, cohort_df, dropout_df):
+    """
+    Return Vega-Lite specs for the four dashboard charts.
+
+    Specs are built once per (data_key, selected_year, show_labels) and kept
+    in a bounded LRU cache shared by all sessions. data_key must change
+    whenever the frames do. Each call gets its own copy, since Streamlit
+    pops the datasets out of a spec when rendering it.
+    """
+    key = (data_key, selected_year, show_labels)
+    with _chart_lock:
+        specs = _chart_cache.get(key)
+
+    if specs is None:
+        increment("cache", cache="chart_specs", result="miss")
+        with span("charts.build"):
+            datasets = get_chart_datasets(data_key, selected_year, enroll_df, grad_df, cohort_df, dropout_df)
+            specs = {
+                chart: to_spec(build(datasets[chart][0], show_labels), datasets[chart])
+                for chart, build in CHART_BUILDERS.items()
+            }
+        with _chart_lock:
+            _chart_cache[key] = specs
+    else:
+        increment("cache", cache="chart_specs", result="hit")
+
+    # Dataset bytes are immutable, so deep copies stay cheap
+    return copy.deepcopy(specs)
@@ -0,0 +1,454 @@
+# -------------------------------
+# Imports
+# -------------------------------
+import threading
+import time
+
+from config import PROGRAMS, DEFAULT_PROGRAM
+from utils.snapshot import read_snapshot, write_snapshot
+from utils.storage import get_backend
+from utils.telemetry import increment
+
+# -------------------------------
+# Cache Settings
+# -------------------------------
+
+# Hard upper bound on how long a loaded copy is served, even if the
+# spreadsheet version could not be checked in the meantime
+CACHE_TTL_SECONDS = 600
+
+# How often the spreadsheet's modified time is polled; reruns in between
+# are served from memory without touching the network
+VERSION_CHECK_SECONDS = 30
+
+# -------------------------------
+# Process-wide Cache State
+# -------------------------------
+# Module state is shared by every Streamlit session served by this process.
+# Each program partition (see config.PROGRAMS) has its own entry and is only
+# loaded when it is first asked for. Data is read through the configured
+# storage backend (see utils/storage.py).
+
+_lock = threading.RLock()
+_snapshot_lock = threading.Lock()  # Serializes snapshot writes; never taken while holding _lock
+_partitions = {}
+_rollups = {}  # tuple of partitions -> (their versions, per-year frames)
+
+# Fetches currently running, keyed by (kind, partition); see _single_flight
+_inflight = {}
+
+# Default of write_sheet_changes' expected_version: write without checking
+_UNCHECKED = object()
+
+
+class StaleDataError(Exception):
+    """The stored data changed after the copy an edit is based on was read."""
+
+
+def _new_entry():
+    return {
+        "frames": None,
+        "grids": None,           # stored values the frames were coerced from (None from a snapshot)
+        "summary": None,         # per-year sums, used for the all-programs rollup
+        "version": None,
+        "source": None,          # "sheets", "sqlite" or "snapshot"
+        "fetched_at": 0.0,       # when the frames were read from the backend
+        "checked_at": 0.0,       # when the version was last compared
+        "generation": 0,         # bumped on invalidation to discard late refreshes
+        "refreshing": False,
+        "snapshot_checked": False,
+    }
+
+
+def _entry(partition):
+    if partition not in PROGRAMS:
+        raise KeyError(f"Unknown program '{partition}'")
+    if partition not in _partitions:
+        _partitions[partition] = _new_entry()
+    return _partitions[partition]
+
+# -------------------------------
+# Internal Helpers
+# -------------------------------
+
+def _single_flight(key, fetch, *args):
+    """
+    Run fetch(*args) unless the same fetch is already running, in which case
+    wait for it and share its result (or its error). Keeps concurrent
+    sessions, background refreshes and the prefetcher from sending duplicate
+    requests for the same data.
+    """
+    with _lock:
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = {"done": threading.Event(), "result": None, "error": None}
+
+    if not leader:
+        increment("coalesced_fetches", kind=key[0])
+        flight["done"].wait()
+        if flight["error"] is not None:
+            raise flight["error"]
+        return flight["result"]
+
+    try:
+        flight["result"] = fetch(*args)
+        return flight["result"]
+    except Exception as e:
+        flight["error"] = e
+        raise
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+        flight["done"].set()
+
+
+def _fetch_version(partition):
+    """Return the backend's version of a partition (Drive modified time for Sheets)."""
+    return _single_flight(("version", partition), get_backend().version, partition)
+
+
+def _fetch_frames(partition):
+    """Read every configured sheet of a partition from the backend, as (frames, grids)."""
+    return _single_flight(("frames", partition), get_backend().read_sheets, partition)
+
+
+def _write_snapshot(partition, frames, version, fetched_at):
+    """
+    Persist published frames as the partition's snapshot, outside the cache
+    lock. Writes are serialized, and skipped once a newer load or an
+    invalidation has replaced these frames, so the newest copy lands last.
+    """
+    with _snapshot_lock:
+        with _lock:
+            if _entry(partition)["fetched_at"] != fetched_at:
+                return
+        try:
+            write_snapshot(partition, frames, version, fetched_at)
+        except Exception:
+            pass  # The snapshot is best-effort; serving live data matters more
+
+
+def _store(partition, generation, frames, grids, version, fetched_at):
+    """
+    Publish freshly fetched frames unless the partition was invalidated
+    since generation, then persist them as the new snapshot. Called without
+    the cache lock: only the in-memory entry is updated under it, so cache
+    hits never wait on the summary or on disk I/O.
+    """
+    backend = get_backend()
+    summary = backend.summarize(partition, frames)
+    with _lock:
+        entry = _entry(partition)
+        if generation != entry["generation"]:
+            return  # Invalidated mid-flight; a newer load owns the cache
+        entry["frames"] = frames
+        entry["grids"] = grids
+        entry["summary"] = summary
+        entry["version"] = version
+        entry["source"] = backend.name
+        entry["fetched_at"] = fetched_at
+        entry["checked_at"] = fetched_at
+
+    _write_snapshot(partition, frames, version, fetched_at)
+
+
+def _load_partition(partition, generation):
+    """Fetch a partition's version and frames for a blocking first load, and publish them."""
+    version = _fetch_version(partition)
+    frames, grids = _fetch_frames(partition)
+    _store(partition, generation, frames, grids, version, time.time())
+
+
+def _read_snapshot(partition, generation):
+    """Seed an empty partition from its on-disk snapshot, read and summarized outside the cache lock."""
+    try:
+        snapshot = read_snapshot(partition)
+        if snapshot is not None:
+            frames, meta = snapshot
+            summary = get_backend().summarize(partition, frames)
+    except Exception:
+        snapshot = None
+
+    with _lock:
+        entry = _entry(partition)
+        entry["snapshot_checked"] = True
+        if snapshot is None or generation != entry["generation"] or entry["frames"] is not None:
+            return
+        entry["frames"] = frames
+        entry["summary"] = summary
+        entry["version"] = meta["version"]
+        entry["source"] = "snapshot"
+        entry["fetched_at"] = meta["fetched_at"]
+        entry["checked_at"] = 0.0  # Force a revalidation on first use
+
+
+def _restore_snapshot(partition):
+    """
+    Seed a partition from its snapshot the first time it is asked for in
+    this process; concurrent callers share one read. Call without the
+    cache lock.
+    """
+    with _lock:
+        entry = _entry(partition)
+        if entry["snapshot_checked"]:
+            return
+        generation = entry["generation"]
+    _single_flight(("snapshot", partition), _read_snapshot, partition, generation)
+
+
+def _needs_refresh(entry, now):
+    """Check whether cached frames are due for a version check or reload."""
+    return (
+        now - entry["checked_at"] >= VERSION_CHECK_SECONDS
+        or now - entry["fetched_at"] >= CACHE_TTL_SECONDS
+    )
+
+
+def _revalidate(partition, generation, ttl=CACHE_TTL_SECONDS):
+    """
+    Background worker: reload the frames if the spreadsheet changed or the
+    TTL ran out, otherwise only record that the cached copy is still current.
+    A shorter ttl reloads ahead of expiry. Frames restored from the snapshot
+    are reloaded too, to get the stored values the Data page edits against.
+    """
+    entry = _entry(partition)
+    try:
+        version = _fetch_version(partition)
+        now = time.time()
+
+        expired = now - entry["fetched_at"] >= ttl
+        if expired or version != entry["version"] or entry["grids"] is None:
+            _store(partition, generation, *_fetch_frames(partition), version, now)
+        else:
+            with _lock:
+                if generation == entry["generation"]:
+                    entry["checked_at"] = now
+    except Exception:
+        pass  # Keep serving the stale copy; the next rerun retries
+    finally:
+        with _lock:
+            entry["refreshing"] = False
+
+
+def _start_refresh(partition):
+    """Start a background revalidation unless one is already running."""
+    entry = _entry(partition)
+    if entry["refreshing"]:
+        return
+    entry["refreshing"] = True
+    threading.Thread(
+        target=_revalidate,
+        args=(partition, entry["generation"]),
+        name=f"sheet-cache-refresh-{partition}",
+        daemon=True
+    ).start()
+
+
+def _ensure_loaded(partition):
+    """
+    Make sure a partition has frames: serve stale copies (including the
+    on-disk snapshot) while revalidating in the background; only an empty
+    partition blocks on the backend, outside the cache lock and sharing
+    one fetch with every other caller waiting for the same partition.
+    """
+    while True:
+        _restore_snapshot(partition)
+        with _lock:
+            entry = _entry(partition)
+            if entry["frames"] is not None:
+                increment("cache", cache="sheet_data", result="hit")
+                if _needs_refresh(entry, time.time()):
+                    _start_refresh(partition)
+                return entry
+            generation = entry["generation"]
+
+        # Nothing is published if invalidated mid-flight; loop and load again
+        increment("cache", cache="sheet_data", result="miss")
+        _single_flight(("load", partition), _load_partition, partition, generation)
+
+# -------------------------------
+# Public API
+# -------------------------------
+
+def load_sheet_data(partition=DEFAULT_PROGRAM):
+    """
+    Return (frames, version): a program's enrollment, graduation and
+    cohort frames keyed by sheet name, and the spreadsheet version they
+    were read at. Both are taken under the cache lock, so the version
+    always describes these frames even if a refresh lands right after.
+
+    Frames are shared across sessions and revalidated against the
+    spreadsheet's modified time in the background. Callers receive copies
+    and may modify them freely.
+    """
+    while True:
+        entry = _ensure_loaded(partition)
+        with _lock:
+            if entry["frames"] is not None:  # Not invalidated in the meantime
+                return {key: df.copy() for key, df in entry["frames"].items()}, entry["version"]
+
+
+def load_rollup(partitions=None):
+    """
+    Return (frames, version): frames with one row per year, summed over
+    one or more programs (all by default), and the tuple of partition
+    versions they were built from (as get_data_version returns it, read
+    under the same lock). These are what every metric, card and chart is
+    computed from, so sheets keeping several rows per year (per term or
+    per section) add up the same way everywhere; key anything derived
+    from them by the returned version.
+
+    The rollup is built from each partition's cached per-year summary,
+    outside the cache lock, and reused until one of the partition versions
+    changes.
+    """
+    partitions = list(partitions or PROGRAMS)
+    while True:
+        entries = [_ensure_loaded(partition) for partition in partitions]
+        with _lock:
+            if any(entry["summary"] is None for entry in entries):
+                continue  # A partition was invalidated in the meantime
+
+            # The summaries and their versions are taken together; what is
+            # built from them below is labelled with exactly these versions
+            key = get_data_version(partitions)
+            summaries = [entry["summary"] for entry in entries]
+            cached = _rollups.get(tuple(partitions))
+
+        if cached is None or cached[0] != key:
+            increment("cache", cache="rollup", result="miss")
+            cached = (key, get_backend().rollup(partitions, summaries))
+            with _lock:
+                _rollups[tuple(partitions)] = cached
+        else:
+            increment("cache", cache="rollup", result="hit")
+        return {sheet_key: df.copy() for sheet_key, df in cached[1].items()}, key
+
+
+def cached_partitions():
+    """Programs asked for so far in this process, i.e. with a cache entry."""
+    with _lock:
+        return list(_partitions)
+
+
+def prefetch_partition(partition, refresh_ahead=0.0):
+    """
+    Warm or refresh a program's cache on the calling thread without holding
+    the cache lock during network calls. Frames are reloaded refresh_ahead
+    seconds before the TTL would expire them. Returns True if a check ran.
+    """
+    _restore_snapshot(partition)
+    with _lock:
+        entry = _entry(partition)
+        now = time.time()
+        due = (
+            entry["frames"] is None
+            or now - entry["checked_at"] >= VERSION_CHECK_SECONDS
+            or now - entry["fetched_at"] >= CACHE_TTL_SECONDS - refresh_ahead
+        )
+        if entry["refreshing"] or not due:
+            return False
+        entry["refreshing"] = True
+        generation = entry["generation"]
+
+    _revalidate(partition, generation, ttl=CACHE_TTL_SECONDS - refresh_ahead)
+    return True
+
+
+def read_for_edit(partition=DEFAULT_PROGRAM):
+    """
+    Return (frames, grids, version) as the baseline of an edit: a copy of
+    a program's cached frames, the stored values grids they were coerced
+    from (shared; do not modify) and the version they were read at. Served
+    from the shared cache like load_sheet_data; if the data changed since,
+    write_sheet_changes refuses the edit instead of overwriting it. Only
+    frames restored from the snapshot, which carry no grids, are reloaded
+    first.
+    """
+    while True:
+        entry = _ensure_loaded(partition)
+        with _lock:
+            if entry["frames"] is None:
+                continue  # Invalidated in the meantime
+            if entry["grids"] is not None:
+                frames = {key: df.copy() for key, df in entry["frames"].items()}
+                return frames, entry["grids"], entry["version"]
+            generation = entry["generation"]
+
+        _single_flight(("load", partition), _load_partition, partition, generation)
+
+
+def write_sheet_changes(partition, baseline, edited, grids=None, expected_version=_UNCHECKED):
+    """
+    Save edited frames of a program through the storage backend and drop
+    its cached copy. Returns the keys of the sheets that changed.
+
+    Only cells that differ from what is stored are written: the raw grids
+    from read_for_edit if given, else the baseline frames. Given the
+    version read with them, the write is refused with StaleDataError if
+    the data changed since.
+    """
+    backend = get_backend()
+    if expected_version is not _UNCHECKED and backend.version(partition) != expected_version:
+        increment("stale_writes")
+        invalidate_sheet_cache(partition)
+        raise StaleDataError(f"The data of {partition} changed since it was loaded")
+
+    changed = backend.write_changes(partition, baseline, edited, grids)
+    invalidate_sheet_cache(partition)
+    return changed
+
+
+def get_data_version(partition=DEFAULT_PROGRAM):
+    """
+    Return the spreadsheet version of a program's cached frames, or a tuple
+    of versions when given a list of programs.
+    """
+    if isinstance(partition, (list, tuple)):
+        return tuple((p, _entry(p)["version"]) for p in partition)
+    return _entry(partition)["version"]
+
+
+def check_data_version(partition=DEFAULT_PROGRAM):
+    """
+    Like get_data_version, but first loads or revalidates the cached data
+    as load_sheet_data would, without copying any frames. Cheap enough to
+    call on every request that only needs to know whether data changed.
+    """
+    partitions = partition if isinstance(partition, (list, tuple)) else [partition]
+    for p in partitions:
+        _ensure_loaded(p)
+    with _lock:
+        return get_data_version(partition)
+
+
+def get_data_status(partition=DEFAULT_PROGRAM):
+    """
+    Describe the cached data for display: its age in seconds, where it was
+    served from, and whether a background refresh is running. For a list of
+    programs the oldest data is reported.
+    """
+    partitions = partition if isinstance(partition, (list, tuple)) else [partition]
+    entries = [_entry(p) for p in partitions]
+    fetched_at = min(entry["fetched_at"] for entry in entries)
+    return {
+        "age_seconds": time.time() - fetched_at if fetched_at else None,
+        "source": "snapshot" if any(e["source"] == "snapshot" for e in entries) else get_backend().name,
+        "refreshing": any(entry["refreshing"] for entry in entries)
+    }
+
+
+def invalidate_sheet_cache(partition=DEFAULT_PROGRAM):
+    """Drop a program's cached frames so the next read reloads from the backend."""
+    with _lock:
+        entry = _entry(partition)
+        entry["generation"] += 1
+        get_backend().reset(partition)
+        entry["frames"] = None
+        entry["grids"] = None
+        entry["summary"] = None
+        entry["version"] = None
+        entry["source"] = None
+        entry["fetched_at"] = 0.0
+        entry["checked_at"] = 0.0
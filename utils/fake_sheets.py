@@ -0,0 +1,254 @@
+# -------------------------------
+# Imports
+# -------------------------------
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from gspread.exceptions import APIError, SpreadsheetNotFound, WorksheetNotFound
+from gspread.utils import a1_range_to_grid_range
+from requests import Response
+
+from config import SHEET_COLUMNS, SHEET_INDEXES
+
+# -------------------------------
+# In-process Google Sheets Stand-in
+# -------------------------------
+# Implements the part of the gspread client / spreadsheet / worksheet API
+# this app uses, backed by in-memory grids. Every call can be slowed down
+# and can fail like the real API: 429 once a per-minute quota is used up,
+# or randomly with 429 or 5xx at configured rates. Used for load tests and
+# offline runs (DASHBOARD_STORAGE=fake, see utils/storage.py).
+
+
+def _api_error(code, message):
+    """Build the gspread APIError the real client raises for an HTTP error."""
+    response = Response()
+    response.status_code = code
+    response._content = json.dumps({"error": {"code": code, "message": message, "status": message}}).encode()
+    return APIError(response)
+
+
+def _trim(grid):
+    """Drop trailing blank cells and rows, as the Sheets API does."""
+    rows = [list(row) for row in grid]
+    for row in rows:
+        while row and row[-1] in ("", None):
+            row.pop()
+    while rows and not rows[-1]:
+        rows.pop()
+    return rows
+
+
+def _split_range(name):
+    """Split "'Title'!A1:B2" into ("Title", "A1:B2"); the A1 part may be None."""
+    title, _, cells = name.partition("!")
+    if title.startswith("'") and title.endswith("'"):
+        title = title[1:-1].replace("''", "'")
+    return title, cells or None
+
+
+class FakeWorksheet:
+    """One tab of a fake spreadsheet."""
+
+    def __init__(self, spreadsheet, title, values=None):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.values = [list(row) for row in values or []]
+
+    # ===== Cell Storage =====
+
+    def _write(self, start_row, start_col, values):
+        """Write a block of values with its top-left cell at 0-based (row, col)."""
+        for r, row in enumerate(values):
+            target_row = start_row + r
+            while len(self.values) <= target_row:
+                self.values.append([])
+            cells = self.values[target_row]
+            for c, value in enumerate(row):
+                target_col = start_col + c
+                while len(cells) <= target_col:
+                    cells.append("")
+                cells[target_col] = value
+
+    def _read(self, cells=None):
+        grid = _trim(self.values)
+        if cells is None:
+            return grid
+        bounds = a1_range_to_grid_range(cells)
+        rows = grid[bounds.get("startRowIndex", 0):bounds.get("endRowIndex")]
+        return _trim(row[bounds.get("startColumnIndex", 0):bounds.get("endColumnIndex")] for row in rows)
+
+    # ===== gspread Worksheet API =====
+
+    def get_all_values(self):
+        self.spreadsheet.client._request("get_all_values")
+        return self._read()
+
+    def get_all_records(self):
+        self.spreadsheet.client._request("get_all_records")
+        grid = self._read()
+        if not grid:
+            return []
+        header = grid[0]
+        return [dict(zip(header, row + [""] * (len(header) - len(row)))) for row in grid[1:]]
+
+    def clear(self):
+        self.spreadsheet.client._request("clear")
+        self.values = []
+        self.spreadsheet._touch()
+
+    def update(self, values=None, range_name=None, **kwargs):
+        # Accept both update(values, range) and the older update(range, values)
+        if isinstance(values, str):
+            values, range_name = range_name, values
+        self.spreadsheet.client._request("update")
+        bounds = a1_range_to_grid_range(range_name or "A1")
+        self._write(bounds.get("startRowIndex", 0), bounds.get("startColumnIndex", 0), values or [])
+        self.spreadsheet._touch()
+        return {"updatedRange": range_name or "A1"}
+
+
+class FakeSpreadsheet:
+    """A fake spreadsheet holding FakeWorksheets in tab order."""
+
+    def __init__(self, client, title, worksheets):
+        self.client = client
+        self.title = title
+        self._worksheets = [FakeWorksheet(self, name, values) for name, values in worksheets.items()]
+        self._touch()
+
+    def _touch(self):
+        self.updated = datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+    def _by_title(self, title):
+        for worksheet in self._worksheets:
+            if worksheet.title == title:
+                return worksheet
+        raise WorksheetNotFound(title)
+
+    # ===== gspread Spreadsheet API =====
+
+    @property
+    def sheet1(self):
+        return self.get_worksheet(0)
+
+    def worksheets(self):
+        self.client._request("worksheets")
+        return list(self._worksheets)
+
+    def get_worksheet(self, index):
+        self.client._request("get_worksheet")
+        return self._worksheets[index] if index < len(self._worksheets) else None
+
+    def get_lastUpdateTime(self):
+        self.client._request("get_lastUpdateTime")
+        return self.updated
+
+    def values_batch_get(self, ranges, params=None):
+        self.client._request("values_batch_get")
+        value_ranges = []
+        for name in ranges:
+            title, cells = _split_range(name)
+            value_ranges.append({"range": name, "values": self._by_title(title)._read(cells)})
+        return {"spreadsheetId": self.title, "valueRanges": value_ranges}
+
+    def values_batch_update(self, body):
+        self.client._request("values_batch_update")
+        updated = 0
+        for value_range in body.get("data", []):
+            title, cells = _split_range(value_range["range"])
+            bounds = a1_range_to_grid_range(cells or "A1")
+            self._by_title(title)._write(
+                bounds.get("startRowIndex", 0), bounds.get("startColumnIndex", 0), value_range["values"]
+            )
+            updated += sum(len(row) for row in value_range["values"])
+        self._touch()
+        return {"spreadsheetId": self.title, "totalUpdatedCells": updated}
+
+
+class FakeClient:
+    """
+    gspread-like client for in-memory spreadsheets.
+
+    latency and jitter are seconds added to every call; quota_per_minute
+    is the number of calls allowed in any 60 s window before 429 errors;
+    rate_429 and rate_5xx are the chances that any call fails at random.
+    Spreadsheets that do not exist yet are created with the configured
+    worksheets holding only their header rows, unless create_missing=False.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, quota_per_minute=None,
+                 rate_429=0.0, rate_5xx=0.0, seed=None, create_missing=True):
+        self.latency = latency
+        self.jitter = jitter
+        self.quota_per_minute = quota_per_minute
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.create_missing = create_missing
+        self.spreadsheets = {}
+        self.stats = {"calls": 0, "quota_errors": 0, "random_429": 0, "random_5xx": 0}
+        self._random = random.Random(seed)
+        self._window = deque()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Build a client configured by DASHBOARD_FAKE_* environment variables."""
+        quota = os.environ.get("DASHBOARD_FAKE_QUOTA_PER_MINUTE")
+        return cls(
+            latency=float(os.environ.get("DASHBOARD_FAKE_LATENCY_MS", 0)) / 1000,
+            jitter=float(os.environ.get("DASHBOARD_FAKE_JITTER_MS", 0)) / 1000,
+            quota_per_minute=int(quota) if quota else None,
+            rate_429=float(os.environ.get("DASHBOARD_FAKE_429_RATE", 0)),
+            rate_5xx=float(os.environ.get("DASHBOARD_FAKE_5XX_RATE", 0))
+        )
+
+    def _request(self, method):
+        """Account for one API call: wait, then maybe fail like the real API."""
+        with self._lock:
+            self.stats["calls"] += 1
+            now = time.monotonic()
+            while self._window and now - self._window[0] >= 60:
+                self._window.popleft()
+
+            error = None
+            if self.quota_per_minute is not None and len(self._window) >= self.quota_per_minute:
+                self.stats["quota_errors"] += 1
+                error = _api_error(429, f"Quota exceeded for {method}")
+            else:
+                self._window.append(now)
+                roll = self._random.random()
+                if roll < self.rate_429:
+                    self.stats["random_429"] += 1
+                    error = _api_error(429, f"Rate limit exceeded for {method}")
+                elif roll < self.rate_429 + self.rate_5xx:
+                    self.stats["random_5xx"] += 1
+                    error = _api_error(self._random.choice([500, 502, 503]), f"Backend error in {method}")
+            delay = self.latency + self._random.uniform(0, self.jitter)
+
+        if delay:
+            time.sleep(delay)
+        if error is not None:
+            raise error
+
+    def create(self, title, worksheets=None):
+        """Create (or replace) a spreadsheet from {worksheet title: values grid}."""
+        if worksheets is None:
+            ordered = sorted(SHEET_INDEXES, key=SHEET_INDEXES.get)
+            worksheets = {sheet_key.title(): [list(SHEET_COLUMNS[sheet_key])] for sheet_key in ordered}
+        self.spreadsheets[title] = FakeSpreadsheet(self, title, worksheets)
+        return self.spreadsheets[title]
+
+    def open(self, title):
+        self._request("open")
+        with self._lock:
+            if title not in self.spreadsheets:
+                if not self.create_missing:
+                    raise SpreadsheetNotFound(title)
+                self.create(title)
+            return self.spreadsheets[title]
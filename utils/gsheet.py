@@ -1,11 +1,20 @@
-import pandas as pd
+from config import DEFAULT_PROGRAM, fetch_all_sheets
+from utils.storage import SheetsBackend, get_backend
 
-def load_data(client):
-    wb = client.open("School of Law Data")
-    sheet1, sheet2, sheet3 = wb.sheet1, wb.get_worksheet(1), wb.get_worksheet(2)
+# The workbook this loader has always read; the per-program spreadsheets
+# in config.PROGRAMS were added later and are read by utils.data_cache
+LEGACY_SPREADSHEET = "School of Law Data"
 
-    df_enroll = pd.DataFrame(sheet1.get_all_records())
-    df_grad = pd.DataFrame(sheet2.get_all_records())
-    df_cohort = pd.DataFrame(sheet3.get_all_records())
-
-    return df_enroll, df_grad, df_cohort
+def load_data(client=None):
+    """
+    Legacy loader: return (enrollment, graduation, cohort) frames of the
+    "School of Law Data" workbook, read with the given gspread client or
+    the configured Sheets backend's. Other storage backends have no such
+    workbook; the default program's frames are returned instead.
+    """
+    backend = SheetsBackend(client) if client is not None else get_backend()
+    if isinstance(backend, SheetsBackend):
+        frames = fetch_all_sheets(backend.client().open(LEGACY_SPREADSHEET))
+    else:
+        frames = backend.read_frames(DEFAULT_PROGRAM)
+    return frames["enrollment"], frames["graduation"], frames["cohort"]
@@ -0,0 +1,165 @@
+# -------------------------------
+# Imports
+# -------------------------------
+from pathlib import Path
+
+import pandas as pd
+
+# -------------------------------
+# Import Settings
+# -------------------------------
+
+# Rows parsed and validated at a time, so large files never sit in memory
+# as raw text all at once
+CHUNK_ROWS = 10_000
+
+# Cap on the number of row errors kept for display
+MAX_REPORTED_ERRORS = 50
+
+SUPPORTED_TYPES = ["csv", "xlsx", "parquet"]
+
+# -------------------------------
+# Chunked Readers
+# -------------------------------
+
+def _csv_chunks(file, chunk_rows):
+    yield from pd.read_csv(file, dtype=str, keep_default_na=False, chunksize=chunk_rows)
+
+
+def _parquet_chunks(file, chunk_rows):
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(file).iter_batches(batch_size=chunk_rows):
+        yield batch.to_pandas()
+
+
+def _xlsx_chunks(file, chunk_rows):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(cell) if cell is not None else "" for cell in next(rows, [])]
+
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == chunk_rows:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+
+_READERS = {
+    "csv": _csv_chunks,
+    "xlsx": _xlsx_chunks,
+    "parquet": _parquet_chunks
+}
+
+
+def iter_file_chunks(file, file_name, chunk_rows=CHUNK_ROWS):
+    """Yield DataFrame chunks of an uploaded CSV, Excel or Parquet file."""
+    file_type = Path(file_name).suffix.lower().lstrip(".")
+    if file_type not in _READERS:
+        raise ValueError(f"Unsupported file type '.{file_type}'. Use one of: {', '.join(SUPPORTED_TYPES)}")
+    yield from _READERS[file_type](file, chunk_rows)
+
+# -------------------------------
+# Validation and Coercion
+# -------------------------------
+
+def _match_columns(chunk, expected_columns):
+    """Map file headers to expected columns, ignoring case and stray spaces."""
+    lookup = {str(col).strip().lower(): col for col in chunk.columns}
+    missing = [col for col in expected_columns if col.lower() not in lookup]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+    return {lookup[col.lower()]: col for col in expected_columns}
+
+
+def validate_chunk(chunk, expected_columns, first_row=2):
+    """
+    Keep the expected columns, coerce them to integers and split off rows
+    with non-numeric values or no Year.
+
+    first_row is the file row number of the chunk's first data row, used
+    to report errors against the original file. Returns
+    (valid_rows, errors, rejected_count).
+    """
+    mapping = _match_columns(chunk, expected_columns)
+    chunk = chunk[list(mapping)].rename(columns=mapping)
+
+    blank = chunk.isna() | (chunk.astype(str).apply(lambda col: col.str.strip()) == "")
+    numeric = chunk.apply(pd.to_numeric, errors="coerce")
+    bad_cells = (numeric.isna() & ~blank) | (numeric % 1 > 0)
+    bad_rows = bad_cells.any(axis=1) | numeric["Year"].isna()
+
+    errors = []
+    for position in bad_rows.to_numpy().nonzero()[0][:MAX_REPORTED_ERRORS]:
+        columns = [col for col in expected_columns if bad_cells.iloc[position][col]]
+        reason = f"non-integer value in {', '.join(columns)}" if columns else "missing Year"
+        errors.append(f"Row {first_row + position}: {reason}")
+
+    valid = numeric[~bad_rows.to_numpy()]
+    valid = valid.astype({col: "Int64" for col in expected_columns})
+    return valid.reset_index(drop=True), errors, int(bad_rows.sum())
+
+
+def read_import_file(file, file_name, expected_columns, chunk_rows=CHUNK_ROWS, on_progress=None):
+    """
+    Stream an uploaded file through validation chunk by chunk.
+
+    Returns a dict with the validated rows (compact Int64 columns), total
+    rows read, rejected row count and a capped list of error messages.
+    """
+    valid_chunks = []
+    errors = []
+    rows_read = 0
+    rejected = 0
+
+    for chunk in iter_file_chunks(file, file_name, chunk_rows):
+        valid, chunk_errors, chunk_rejected = validate_chunk(chunk, expected_columns, first_row=rows_read + 2)
+        valid_chunks.append(valid)
+        errors.extend(chunk_errors[:MAX_REPORTED_ERRORS - len(errors)])
+        rows_read += len(chunk)
+        rejected += chunk_rejected
+        if on_progress:
+            on_progress(rows_read)
+
+    data = (
+        pd.concat(valid_chunks, ignore_index=True) if valid_chunks
+        else pd.DataFrame({col: pd.Series(dtype="Int64") for col in expected_columns})
+    )
+    return {"data": data, "rows_read": rows_read, "rejected": rejected, "errors": errors}
+
+# -------------------------------
+# Merge Preview
+# -------------------------------
+
+def merge_by_year(existing, imported):
+    """
+    Upsert imported rows into existing data by Year; imported rows win.
+    Every existing row of an imported year is replaced, and rows of other
+    years are kept as they are. Of several imported rows with the same
+    Year only the last is kept. Returns (merged, stats) where stats counts
+    new and updated years and the imported rows dropped as repeats.
+    """
+    deduplicated = imported.drop_duplicates("Year", keep="last")
+    existing = existing.copy()
+    existing["Year"] = pd.to_numeric(existing["Year"], errors="coerce").astype("Int64")
+    imported_years = deduplicated["Year"].astype(int)
+
+    updated = int(imported_years.isin(set(existing["Year"].dropna().astype(int))).sum())
+    stats = {
+        "new": len(deduplicated) - updated,
+        "updated": updated,
+        "dropped": len(imported) - len(deduplicated)
+    }
+
+    kept = existing[~existing["Year"].isin(imported_years)]
+    merged = pd.concat([kept, deduplicated], ignore_index=True)
+    merged = merged.sort_values("Year", na_position="last", kind="stable").reset_index(drop=True)
+    return merged, stats
@@ -0,0 +1,28 @@
+# -------------------------------
+# Imports
+# -------------------------------
+import streamlit as st
+
+from utils.metrics import kpi_card_values
+
+# -------------------------------
+# KPI Cards Renderer
+# -------------------------------
+
+def _render_card(title, value_text, change_text, change_color):
+    """Render a single KPI metric card."""
+    st.markdown(f"""
+        <div class="metric-card">
+            <div class="metric-title">{title}</div>
+            <div class="metric-value">{value_text}</div>
+            <div class="metric-change" style="color: {change_color};">{change_text}</div>
+        </div>
+    """, unsafe_allow_html=True)
+
+
+def show_kpi_cards(selected_year, kpi_table):
+    """Render the four KPI metric cards on the dashboard from a KPI table."""
+    cards = kpi_card_values(kpi_table, selected_year)
+    for column, card in zip(st.columns(len(cards)), cards):
+        with column:
+            _render_card(card["title"], card["value_text"], card["change_text"], card["change_color"])
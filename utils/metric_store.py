@@ -0,0 +1,272 @@
+# -------------------------------
+# Imports
+# -------------------------------
+import threading
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+
+from config import YEAR_LEVELS
+from utils.metrics import (
+    ALL_YEARS,
+    COHORT_SURVIVAL_RATE,
+    GRADUATION_RATE,
+    KPI_METRICS,
+    build_kpi_table,
+    compute_cohort_survival_rate,
+    compute_dropout,
+    compute_graduation_rate,
+    dropout_rates,
+    ratio_values
+)
+from utils.telemetry import increment, span
+
+# -------------------------------
+# Materialized Metrics
+# -------------------------------
+# Everything the dashboard derives from a program's frames (the rate
+# columns, drop-out transitions and the KPI table) is kept per program.
+# When a new version of the frames arrives with the same rows and years,
+# only the rows whose counts changed are recomputed: their rates, the
+# drop-out transitions into and out of them, the KPI rows of the affected
+# years (and the years after them, whose deltas change) and the all-years
+# rollups, which are running totals. Any other change rebuilds everything.
+#
+# A store is never modified once handed out; an update copies the frames
+# (a memory copy) and patches the copy.
+
+RATE_SPECS = {"graduation": GRADUATION_RATE, "cohort": COHORT_SURVIVAL_RATE}
+
+# Count columns of each sheet the metrics are computed from
+COUNT_COLUMNS = {
+    "enrollment": YEAR_LEVELS,
+    **{key: [spec.numerator, spec.denominator] for key, spec in RATE_SPECS.items()}
+}
+
+# Where each KPI's per-year value comes from
+KPI_SOURCES = {
+    "Total Enrollment": "enrollment",
+    "Graduation Rate": "graduation",
+    "Cohort Survival Rate": "cohort",
+    "Drop-out Rate": "dropout"
+}
+
+
+def _floats(df, columns):
+    return df[columns].to_numpy(dtype=float, na_value=np.nan)
+
+
+def _years(df):
+    return _floats(df, ["Year"])[:, 0]
+
+
+def _same(a, b):
+    return (a == b) | (np.isnan(a) & np.isnan(b))
+
+
+def _first_rows(years):
+    """Map each known year to the position of its first row."""
+    positions = pd.Series(np.arange(len(years)), index=years)[~np.isnan(years)]
+    positions = positions[~positions.index.duplicated(keep="first")]
+    return dict(zip(positions.index.astype(int), positions.to_numpy()))
+
+
+def _rates(counts, spec, strict=False):
+    """A RatioMetric over (numerator, denominator) rows; NaN without a denominator if strict."""
+    if strict:
+        spec = replace(spec, on_zero_denominator=np.nan)
+    return ratio_values(counts[:, :1], counts[:, 1:], [spec])[:, 0]
+
+
+class MetricStore:
+    """Derived metrics of one set of enrollment/graduation/cohort frames."""
+
+    def __init__(self, frames, counts=None):
+        self.frames = frames
+        self.counts = counts or {key: _floats(frames[key], columns) for key, columns in COUNT_COLUMNS.items()}
+        enroll = frames["enrollment"]
+
+        self.rates = {
+            "graduation": compute_graduation_rate(frames["graduation"]),
+            "cohort": compute_cohort_survival_rate(frames["cohort"])
+        }
+        self.dropout_df = compute_dropout(enroll)
+        self.kpi_table = build_kpi_table(enroll, self.grad_df, self.cohort_df, self.dropout_df)
+
+        # Row lookups; they only depend on the Year columns, which an
+        # incremental update never changes
+        self._years = {key: _years(frames[key]) for key in COUNT_COLUMNS}
+        self._first = {key: _first_rows(years) for key, years in self._years.items()}
+        self._first["dropout"] = _first_rows(self.dropout_df["Year"].to_numpy(dtype=float))
+
+        years = self._years["enrollment"]
+        pair_starts = np.flatnonzero(~np.isnan(years[:-1]) & ~np.isnan(years[1:]))
+        self._dropout_row = {int(start): row for row, start in enumerate(pair_starts)}
+
+        self._kpi_row = {year: row for row, year in enumerate(self.kpi_table.index)}
+        self._kpi_column = {column: i for i, column in enumerate(self.kpi_table.columns)}
+
+        # Running totals behind the all-years rollup row
+        self._totals = {
+            "enrollment": float(np.nansum(self.counts["enrollment"])),
+            "dropout": float(self.dropout_df["Drop-out Rate"].sum()),
+            **{key: np.nansum(self.counts[key], axis=0) for key in RATE_SPECS}
+        }
+
+    @property
+    def grad_df(self):
+        return self.rates["graduation"]
+
+    @property
+    def cohort_df(self):
+        return self.rates["cohort"]
+
+    # ===== Incremental Update =====
+
+    def updated(self, frames):
+        """
+        Return the store for new frames, patching a copy of this one when
+        only counts changed, or a full rebuild otherwise.
+        """
+        counts = {key: _floats(frames[key], columns) for key, columns in COUNT_COLUMNS.items()}
+        same_layout = set(frames) == set(self.frames) and all(
+            list(frames[key].columns) == list(self.frames[key].columns)
+            and len(frames[key]) == len(self.frames[key])
+            and _same(_years(frames[key]), self._years[key]).all()
+            for key in COUNT_COLUMNS
+        )
+        if not same_layout:
+            increment("metric_store", result="rebuild")
+            return MetricStore(frames, counts)
+
+        changed = {
+            key: np.flatnonzero(~_same(counts[key], self.counts[key]).all(axis=1))
+            for key in COUNT_COLUMNS
+        }
+
+        store = object.__new__(MetricStore)
+        store.__dict__.update(self.__dict__)
+        store.frames, store.counts, store._totals = frames, counts, dict(self._totals)
+        store._patch(self, changed)
+        increment("metric_store", result="incremental")
+        return store
+
+    def _patch(self, old, changed):
+        affected = set()
+        for key, rows in changed.items():
+            affected.update(int(year) for year in self._years[key][rows] if not np.isnan(year))
+
+        # Ratio columns of the changed rows and their rollup sums; the other
+        # columns are taken from the new frames as they are
+        self.rates = {}
+        for key, spec in RATE_SPECS.items():
+            rows = changed[key]
+            values = old.rates[key][spec.output].to_numpy(dtype=float, copy=True)
+            if len(rows):
+                values[rows] = _rates(self.counts[key][rows], spec)
+                self._totals[key] = (
+                    self._totals[key]
+                    + np.nansum(self.counts[key][rows], axis=0)
+                    - np.nansum(old.counts[key][rows], axis=0)
+                )
+            self.rates[key] = self.frames[key].copy()
+            self.rates[key][spec.output] = values
+
+        # Enrollment total and the drop-out transitions into and out of
+        # every changed row
+        rows = changed["enrollment"]
+        if len(rows):
+            counts = self.counts["enrollment"]
+            self._totals["enrollment"] += float(np.nansum(counts[rows]) - np.nansum(old.counts["enrollment"][rows]))
+
+            starts = sorted({int(start) for row in rows for start in (row - 1, row) if start in self._dropout_row})
+            if starts:
+                starts = np.array(starts)
+                dropout_rows = np.array([self._dropout_row[start] for start in starts])
+                values = old.dropout_df["Drop-out Rate"].to_numpy(dtype=float, copy=True)
+                new_rates = dropout_rates(counts[starts], counts[starts + 1])
+
+                self._totals["dropout"] += float(new_rates.sum() - values[dropout_rows].sum())
+                values[dropout_rows] = new_rates
+                self.dropout_df = old.dropout_df.assign(**{"Drop-out Rate": values})
+                affected.update(int(year) for year in self.dropout_df["Year"].to_numpy()[dropout_rows])
+
+        if any(len(rows) for rows in changed.values()):
+            self._patch_kpis(affected)
+
+    # ===== KPI Table Patching =====
+
+    def _per_year(self, metric, years):
+        """The per-year values build_kpi_table uses: each year's first row, NaN if none."""
+        source = KPI_SOURCES[metric]
+        rows = np.array([self._first[source].get(year, -1) for year in years], dtype=int)
+        found = rows >= 0
+        rows = rows[found]
+
+        values = np.full(len(years), np.nan)
+        if source == "dropout":
+            values[found] = self.dropout_df["Drop-out Rate"].to_numpy(dtype=float)[rows]
+        elif source == "enrollment":
+            values[found] = np.nansum(self.counts[source][rows], axis=1)
+        else:
+            values[found] = _rates(self.counts[source][rows], RATE_SPECS[source], strict=True)
+        return values
+
+    def _patch_kpis(self, affected):
+        table = self.kpi_table.to_numpy(dtype=float, copy=True)
+        column = self._kpi_column
+
+        years = [year for year in sorted(affected | {year + 1 for year in affected}) if year in self._kpi_row]
+        if years:
+            rows = [self._kpi_row[year] for year in years]
+            for metric in KPI_METRICS:
+                value = np.nan_to_num(self._per_year(metric, years), nan=0.0)
+                previous = self._per_year(metric, [year - 1 for year in years])
+                if metric in ("Total Enrollment", "Drop-out Rate"):
+                    previous = np.nan_to_num(previous, nan=0.0)
+                table[rows, column[(metric, "value")]] = value
+                table[rows, column[(metric, "previous")]] = previous
+                table[rows, column[(metric, "delta")]] = value - previous
+
+        rollup = self._kpi_row[ALL_YEARS]
+        table[rollup, column[("Total Enrollment", "value")]] = self._totals["enrollment"]
+        for metric, source in KPI_SOURCES.items():
+            if source in RATE_SPECS:
+                numerator, denominator = self._totals[source]
+                scale = RATE_SPECS[source].scale
+                table[rollup, column[(metric, "value")]] = numerator / denominator * scale if denominator > 0 else 0
+        count = len(self.dropout_df)
+        table[rollup, column[("Drop-out Rate", "value")]] = self._totals["dropout"] / count if count else np.nan
+
+        self.kpi_table = pd.DataFrame(table, index=self.kpi_table.index, columns=self.kpi_table.columns)
+
+# -------------------------------
+# Process-wide Store Registry
+# -------------------------------
+
+_lock = threading.Lock()
+_stores = {}  # key -> (version, MetricStore)
+
+
+def get_metrics(key, version, frames):
+    """
+    Return the MetricStore of `key` (a program, or a tuple of programs) for
+    frames at `version`, updating the previous version's store in place of
+    recomputing it.
+    """
+    with _lock:
+        current = _stores.get(key)
+    if current is not None and current[0] == version:
+        increment("metric_store", result="hit")
+        return current[1]
+
+    with span("metrics.update"):
+        if current is None:
+            increment("metric_store", result="build")
+            store = MetricStore(frames)
+        else:
+            store = current[1].updated(frames)
+    with _lock:
+        _stores[key] = (version, store)
+    return store
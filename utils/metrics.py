@@ -1,272 +1,293 @@
 # -------------------------------
 # Imports
 # -------------------------------
+from dataclasses import dataclass, replace
+
+import numpy as np
 import pandas as pd
-import streamlit as st
+
+from config import YEAR_LEVELS
+
+# -------------------------------
+# Ratio Metric Specs
+# -------------------------------
+
+@dataclass(frozen=True)
+class RatioMetric:
+    """
+    Declarative numerator/denominator metric.
+
+    on_zero_denominator is the value reported when the denominator is zero,
+    negative or missing; use np.nan to leave such rows blank instead.
+    """
+    numerator: str
+    denominator: str
+    output: str
+    scale: float = 100.0
+    on_zero_denominator: float = 0.0
+
+
+GRADUATION_RATE = RatioMetric(
+    numerator="No. Graduates who graduated on time",
+    denominator="No. Graduating Students",
+    output="Graduation Rate (%)"
+)
+
+COHORT_SURVIVAL_RATE = RatioMetric(
+    numerator="Cohort Graduates",
+    denominator="Cohort Enrollment",
+    output="Cohort Survival Rate"
+)
 
 # -------------------------------
 # KPI Computation Functions
 # -------------------------------
 
-def compute_dropout(df):
-    """Compute drop-out rate between year levels based on enrollment data."""
-    dropout_data = []
-    df = df.copy()
-    df["Year"] = pd.to_numeric(df["Year"], errors="coerce")  # Ensure 'Year' is numeric
+def dropout_rates(previous, current):
+    """
+    Drop-out rate (%) of each pair of level-count rows, given as 2-D arrays.
 
-    for i in range(1, len(df)):
-        if pd.isna(df.loc[i - 1, "Year"]) or pd.isna(df.loc[i, "Year"]):
-            continue
+    Students in level k of a previous row are expected in level k+1 of the
+    matching current row.
+    """
+    enrolled = previous[:, :-1]  # Every level but the last
+    advanced = current[:, 1:]    # Every level but the first
 
-        year = int(df.loc[i, "Year"])
-        prev_row = df.loc[i - 1]
-        current_row = df.loc[i]
+    # Only transitions with a positive starting count and a known outcome count
+    valid = (enrolled > 0) & ~np.isnan(advanced)
+    dropped_total = np.where(valid, enrolled - advanced, 0).sum(axis=1)
+    enrolled_total = np.where(valid, enrolled, 0).sum(axis=1)
 
-        dropped_total = 0
-        enrolled_total = 0
+    return np.divide(
+        dropped_total, enrolled_total,
+        out=np.zeros_like(dropped_total), where=enrolled_total > 0
+    ) * 100
 
-        # Define transitions to track drop-out
-        transitions = [
-            ("First Year", "Second Year"),
-            ("Second Year", "Third Year"),
-            ("Third Year", "Fourth Year")
-        ]
 
-        for prev_level, next_level in transitions:
-            enrolled = pd.to_numeric(prev_row[prev_level], errors="coerce")
-            advanced = pd.to_numeric(current_row[next_level], errors="coerce")
+def compute_dropout(df, year_levels=YEAR_LEVELS):
+    """
+    Compute drop-out rate between year levels based on typed enrollment data.
 
-            if pd.notna(enrolled) and enrolled > 0 and pd.notna(advanced):
-                dropped = enrolled - advanced
-                dropped_total += dropped
-                enrolled_total += enrolled
+    Each row is compared with the row before it. All transitions for all
+    rows are computed at once on shifted arrays.
+    """
+    years = df["Year"].to_numpy(dtype=float, na_value=np.nan)
+    counts = df[year_levels].to_numpy(dtype=float, na_value=np.nan)
 
-        dropout_rate = (dropped_total / enrolled_total) * 100 if enrolled_total > 0 else 0
-        dropout_data.append({"Year": year, "Drop-out Rate": dropout_rate})
+    dropout_rate = dropout_rates(counts[:-1], counts[1:])
 
-    return pd.DataFrame(dropout_data)
+    # Skip pairs where either row has no numeric year (e.g. a "Total" row)
+    keep = ~np.isnan(years[:-1]) & ~np.isnan(years[1:])
 
+    return pd.DataFrame({
+        "Year": years[1:][keep].astype(int),
+        "Drop-out Rate": dropout_rate[keep]
+    })
 
-def compute_graduation_rate(grad_df):
-    """Add a 'Graduation Rate (%)' column to graduation data."""
-    grad_df = grad_df.copy()
-    grad_df.columns = grad_df.columns.str.strip()
-    grad_df["Year"] = grad_df["Year"].astype(str)
 
-    grad_df["Graduation Rate (%)"] = grad_df.apply(
-        lambda row: (row["No. Graduates who graduated on time"] / row["No. Graduating Students"] * 100)
-        if row["No. Graduating Students"] > 0 else 0,
-        axis=1
-    )
+def ratio_values(numerators, denominators, specs):
+    """Ratios of 2-D numerator/denominator arrays, one column per RatioMetric spec."""
+    scales = np.array([spec.scale for spec in specs])
+    fills = np.array([spec.on_zero_denominator for spec in specs], dtype=float)
 
-    return grad_df
+    has_denominator = denominators > 0
+    ratios = np.divide(
+        numerators, denominators,
+        out=np.zeros_like(numerators), where=has_denominator
+    ) * scales
+    return np.where(has_denominator, ratios, fills)
 
 
-def compute_cohort_survival_rate(cohort_df):
-    """Add a 'Cohort Survival Rate' column to cohort data."""
-    cohort_df = cohort_df.copy()
-    cohort_df.columns = cohort_df.columns.str.strip()
-    cohort_df["Year"] = cohort_df["Year"].astype(str)
+def compute_ratio_metrics(df, specs):
+    """
+    Add one percentage column per RatioMetric spec to a copy of a typed frame.
 
-    cohort_df["Cohort Survival Rate"] = cohort_df.apply(
-        lambda row: (
-            row["Cohort Graduates"] / row["Cohort Enrollment"] * 100
-        ) if row["Cohort Enrollment"] > 0 else 0,
-        axis=1
-    )
+    All specs are evaluated together: numerators and denominators are
+    stacked into two arrays and divided in a single vectorized step.
+    """
+    df = df.copy()
+    if not specs:
+        return df
 
-    return cohort_df
+    numerators = df[[spec.numerator for spec in specs]].to_numpy(dtype=float, na_value=np.nan)
+    denominators = df[[spec.denominator for spec in specs]].to_numpy(dtype=float, na_value=np.nan)
+    ratios = ratio_values(numerators, denominators, specs)
 
+    for i, spec in enumerate(specs):
+        df[spec.output] = ratios[:, i]
 
+    return df
 
-def compute_total_enrollment(year, df):
-    """Compute total enrollment for a given year or across all years."""
-    year_cols = ["First Year", "Second Year", "Third Year", "Fourth Year"]
-    df["Year"] = df["Year"].astype(str)  # Ensure year is a string for comparison
 
-    filtered_df = df if year == "All Years" else df[df["Year"] == str(year)]
+def compute_graduation_rate(grad_df):
+    """Add a 'Graduation Rate (%)' column to graduation data."""
+    return compute_ratio_metrics(grad_df, [GRADUATION_RATE])
+
 
-    total_first = filtered_df["First Year"].sum()
-    total_second = filtered_df["Second Year"].sum()
-    total_third = filtered_df["Third Year"].sum()
-    total_fourth = filtered_df["Fourth Year"].sum()
+def compute_cohort_survival_rate(cohort_df):
+    """Add a 'Cohort Survival Rate' column to cohort data."""
+    return compute_ratio_metrics(cohort_df, [COHORT_SURVIVAL_RATE])
+
+
+def compute_total_enrollment(year, df):
+    """Compute total enrollment for a given year or across all years."""
+    filtered_df = df if year == "All Years" else df[df["Year"] == year]
 
-    total = total_first + total_second + total_third + total_fourth
+    total = filtered_df[YEAR_LEVELS].sum().sum()
     return int(total)
 
 # -------------------------------
-# KPI Cards Renderer
+# KPI Table Materialization
 # -------------------------------
 
-def show_kpi_cards(selected_year, enroll_df, grad_df, cohort_df, dropout_df):
-    """Render the four KPI metric cards on the dashboard."""
-    col1, col2, col3, col4 = st.columns(4)
-
-    # === Total Enrollment ===
-    with col1:
-        df = enroll_df.copy()
+KPI_METRICS = ["Total Enrollment", "Graduation Rate", "Cohort Survival Rate", "Drop-out Rate"]
+KPI_FIELDS = ["value", "previous", "delta"]
+ALL_YEARS = "All Years"
+
+
+def _by_year(years, values):
+    """Index values by integer year, keeping the first row of each year."""
+    years = pd.Series(years).to_numpy(dtype=float, na_value=np.nan)
+    values = pd.Series(values).to_numpy(dtype=float, na_value=np.nan)
+    known = ~np.isnan(years)
+    series = pd.Series(values[known], index=years[known].astype(int))
+    return series[~series.index.duplicated(keep="first")]
+
+
+def _strict_rate(df, spec):
+    """Per-row rate that is NaN, not 0, when the denominator is not positive."""
+    strict = replace(spec, output="_rate", on_zero_denominator=np.nan)
+    return compute_ratio_metrics(df, [strict])["_rate"].to_numpy()
+
+
+def _overall_rate(df, spec):
+    """Rate over the summed numerator and denominator of every row."""
+    numerator = df[spec.numerator].sum()
+    denominator = df[spec.denominator].sum()
+    return numerator / denominator * spec.scale if denominator > 0 else 0
+
+
+def build_kpi_table(enroll_df, grad_df, cohort_df, dropout_df):
+    """
+    Materialize every KPI card value in one table.
+
+    Rows are indexed by every year any frame has and the year after it,
+    plus a final "All Years" rollup row; columns are (metric, field) pairs
+    with field in value/previous/delta. A missing enrollment or drop-out
+    figure counts as 0, while a missing rate leaves previous/delta as NaN
+    ("No data").
+    """
+    level_counts = enroll_df[YEAR_LEVELS]
+    per_year = {
+        "Total Enrollment": _by_year(enroll_df["Year"], level_counts.sum(axis=1)),
+        "Graduation Rate": _by_year(grad_df["Year"], _strict_rate(grad_df, GRADUATION_RATE)),
+        "Cohort Survival Rate": _by_year(cohort_df["Year"], _strict_rate(cohort_df, COHORT_SURVIVAL_RATE)),
+        "Drop-out Rate": _by_year(dropout_df["Year"], dropout_df["Drop-out Rate"])
+    }
+
+    # A year no frame has still compares against the year before it
+    known = set().union(*(s.index for s in per_year.values()))
+    years = pd.Index(sorted(known | {year + 1 for year in known}), dtype=int)
+    previous_years = years - 1
+
+    table = {}
+    for metric, series in per_year.items():
+        value = series.reindex(years).fillna(0).to_numpy()
+        previous = series.reindex(previous_years).to_numpy()
+        if metric in ("Total Enrollment", "Drop-out Rate"):
+            previous = np.nan_to_num(previous, nan=0.0)
+        table[(metric, "value")] = value
+        table[(metric, "previous")] = previous
+        table[(metric, "delta")] = value - previous
+
+    kpi_table = pd.DataFrame(table, index=years.astype(object))
+    kpi_table.columns = pd.MultiIndex.from_tuples(kpi_table.columns)
+
+    # All-years rollup
+    kpi_table.loc[ALL_YEARS] = np.nan
+    kpi_table.loc[ALL_YEARS, ("Total Enrollment", "value")] = level_counts.sum().sum()
+    kpi_table.loc[ALL_YEARS, ("Graduation Rate", "value")] = _overall_rate(grad_df, GRADUATION_RATE)
+    kpi_table.loc[ALL_YEARS, ("Cohort Survival Rate", "value")] = _overall_rate(cohort_df, COHORT_SURVIVAL_RATE)
+    kpi_table.loc[ALL_YEARS, ("Drop-out Rate", "value")] = dropout_df["Drop-out Rate"].mean()
+
+    return kpi_table
+
+
+def lookup_kpis(kpi_table, selected_year):
+    """Return the KPI row for a year (or "All Years"), zeros if neither it nor the year before is known."""
+    key = ALL_YEARS if selected_year in ["Total", ALL_YEARS] else int(selected_year)
+    if key in kpi_table.index:
+        return kpi_table.loc[key]
+
+    empty = pd.Series(np.nan, index=kpi_table.columns)
+    for metric in KPI_METRICS:
+        empty[(metric, "value")] = 0.0
+    for metric in ("Total Enrollment", "Drop-out Rate"):
+        empty[(metric, "previous")] = 0.0
+        empty[(metric, "delta")] = 0.0
+    return empty
 
-        if selected_year in ["Total", "All Years"]:
-            current_total = df.iloc[:, 1:].sum().sum()
-            change_text = "Overall Total"
-            change_color = "#888"
-        else:
-            current_year_data = df[df["Year"] == selected_year]
-            current_total = current_year_data.iloc[:, 1:].sum(axis=1).values[0] if not current_year_data.empty else 0
-
-            previous_year = str(int(selected_year) - 1)
-            previous_data = df[df["Year"] == previous_year]
-            previous_total = previous_data.iloc[:, 1:].sum(axis=1).values[0] if not previous_data.empty else 0
-
-            delta = current_total - previous_total
-            if delta > 0:
-                change_text = f"▲ +{delta} since {previous_year}"
-                change_color = "green"
-            elif delta < 0:
-                change_text = f"▼ {delta} since {previous_year}"
-                change_color = "red"
-            else:
-                change_text = f"No change from {previous_year}"
-                change_color = "#888"
-
-        st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-title">Total Enrollment</div>
-                <div class="metric-value">{int(current_total)}</div>
-                <div class="metric-change" style="color: {change_color};">{change_text}</div>
-            </div>
-        """, unsafe_allow_html=True)
-
-    # === Graduation Rate ===
-    with col2:
-        if selected_year in ["Total", "All Years"]:
-            total_graduates = grad_df["No. Graduates who graduated on time"].sum()
-            total_graduating = grad_df["No. Graduating Students"].sum()
-            grad_rate = (total_graduates / total_graduating) * 100 if total_graduating > 0 else 0
-            change_text = "Overall Rate"
-            change_color = "#888"
-        else:
-            grad_filtered = grad_df[grad_df["Year"] == selected_year]
-            grad_rate = 0
-            if not grad_filtered.empty:
-                row = grad_filtered.iloc[0]
-                if row["No. Graduating Students"] > 0:
-                    grad_rate = (row["No. Graduates who graduated on time"] / row["No. Graduating Students"]) * 100
-
-            prev_year = str(int(selected_year) - 1)
-            prev_row = grad_df[grad_df["Year"] == prev_year]
-            if not prev_row.empty:
-                prev = prev_row.iloc[0]
-                if prev["No. Graduating Students"] > 0:
-                    prev_rate = (prev["No. Graduates who graduated on time"] / prev["No. Graduating Students"]) * 100
-                    delta = grad_rate - prev_rate
-                    if delta > 0:
-                        change_text = f"▲ +{delta:.1f}% since {prev_year}"
-                        change_color = "green"
-                    elif delta < 0:
-                        change_text = f"▼ {delta:.1f}% since {prev_year}"
-                        change_color = "red"
-                    else:
-                        change_text = f"No change from {prev_year}"
-                        change_color = "#888"
-                else:
-                    change_text = f"No data for {prev_year}"
-                    change_color = "#888"
-            else:
-                change_text = f"No data for {prev_year}"
-                change_color = "#888"
-
-        st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-title">Graduation Rate</div>
-                <div class="metric-value">{grad_rate:.1f}%</div>
-                <div class="metric-change" style="color: {change_color};">{change_text}</div>
-            </div>
-        """, unsafe_allow_html=True)
-
-    # === Cohort Survival Rate ===
-    with col3:
-        if selected_year in ["Total", "All Years"]:
-            total_cohort = cohort_df["Cohort Enrollment"].sum()
-            total_graduates = cohort_df["Cohort Graduates"].sum()
-            survival_rate = (total_graduates / total_cohort) * 100 if total_cohort > 0 else 0
-            change_text = "Overall Rate"
-            change_color = "#888"
-        else:
-            cohort_filtered = cohort_df[cohort_df["Year"] == selected_year]
-            survival_rate = 0
-            if not cohort_filtered.empty:
-                row = cohort_filtered.iloc[0]
-                if row["Cohort Enrollment"] > 0:
-                    survival_rate = (
-                        row["Cohort Graduates"] /
-                        row["Cohort Enrollment"]
-                    ) * 100
-
-            prev_year = str(int(selected_year) - 1)
-            prev_row = cohort_df[cohort_df["Year"] == prev_year]
-            if not prev_row.empty:
-                prev = prev_row.iloc[0]
-                if prev["Cohort Enrollment"] > 0:
-                    prev_rate = (
-                        prev["Cohort Graduates"] /
-                        prev["Cohort Enrollment"]
-                    ) * 100
-                    delta = survival_rate - prev_rate
-                    if delta > 0:
-                        change_text = f"▲ +{delta:.1f}% since {prev_year}"
-                        change_color = "green"
-                    elif delta < 0:
-                        change_text = f"▼ {delta:.1f}% since {prev_year}"
-                        change_color = "red"
-                    else:
-                        change_text = f"No change from {prev_year}"
-                        change_color = "#888"
-                else:
-                    change_text = f"No data for {prev_year}"
-                    change_color = "#888"
-            else:
-                change_text = f"No data for {prev_year}"
-                change_color = "#888"
-
-        st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-title">Cohort Survival Rate</div>
-                <div class="metric-value">{survival_rate:.1f}%</div>
-                <div class="metric-change" style="color: {change_color};">{change_text}</div>
-            </div>
-        """, unsafe_allow_html=True)
-
-    # === Drop-out Rate ===
-    with col4:
-        if selected_year in ["Total", "All Years"]:
-            overall_dropout = dropout_df["Drop-out Rate"].mean()
-            change_text = "Overall Avg"
-            change_color = "#888"
+# -------------------------------
+# KPI Card Values
+# -------------------------------
+# What each KPI card shows, as plain text and colors, so the dashboard,
+# the report CLI and the JSON API all present the same figures.
+
+@dataclass(frozen=True)
+class KpiCard:
+    metric: str
+    value_format: str
+    change_format: str
+    overall_caption: str
+    suffix: str = ""
+    higher_is_better: bool = True
+
+
+KPI_CARDS = [
+    KpiCard("Total Enrollment", ".0f", ".0f", "Overall Total"),
+    KpiCard("Graduation Rate", ".1f", ".1f", "Overall Rate", suffix="%"),
+    KpiCard("Cohort Survival Rate", ".1f", ".1f", "Overall Rate", suffix="%"),
+    KpiCard("Drop-out Rate", ".2f", ".1f", "Overall Avg", suffix="%", higher_is_better=False)
+]
+
+
+def change_label(delta, previous_year, fmt, suffix="", higher_is_better=True):
+    """Return (text, color) describing a year-over-year change."""
+    if pd.isna(delta):
+        return f"No data for {previous_year}", "#888"
+    if delta > 0:
+        color = "green" if higher_is_better else "red"
+        return f"▲ +{delta:{fmt}}{suffix} since {previous_year}", color
+    if delta < 0:
+        color = "red" if higher_is_better else "green"
+        return f"▼ {delta:{fmt}}{suffix} since {previous_year}", color
+    return f"No change from {previous_year}", "#888"
+
+
+def kpi_card_values(kpi_table, selected_year):
+    """
+    Return the four KPI cards for a year (or "All Years") as dicts with
+    title, value, value_text, change_text and change_color.
+    """
+    kpis = lookup_kpis(kpi_table, selected_year)
+    overall = selected_year in ["Total", ALL_YEARS]
+    previous_year = None if overall else int(selected_year) - 1
+
+    cards = []
+    for card in KPI_CARDS:
+        value = float(kpis[(card.metric, "value")])
+        if overall:
+            change_text, change_color = card.overall_caption, "#888"
         else:
-            row = dropout_df[dropout_df["Year"] == int(selected_year)]
-            current_rate = row["Drop-out Rate"].values[0] if not row.empty else 0
-
-            prev_row = dropout_df[dropout_df["Year"] == int(selected_year) - 1]
-            prev_rate = prev_row["Drop-out Rate"].values[0] if not prev_row.empty else 0
-
-            delta = current_rate - prev_rate
-            if delta > 0:
-                change_text = f"▲ +{delta:.1f}% since {int(selected_year) - 1}"
-                change_color = "red"
-            elif delta < 0:
-                change_text = f"▼ {delta:.1f}% since {int(selected_year) - 1}"
-                change_color = "green"
-            else:
-                change_text = f"No change from {int(selected_year) - 1}"
-                change_color = "#888"
-
-            overall_dropout = current_rate
-
-        st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-title">Drop-out Rate</div>
-                <div class="metric-value">{overall_dropout:.2f}%</div>
-                <div class="metric-change" style="color: {change_color};">{change_text}</div>
-            </div>
-        """, unsafe_allow_html=True)
+            change_text, change_color = change_label(
+                kpis[(card.metric, "delta")], previous_year,
+                card.change_format, card.suffix, card.higher_is_better
+            )
+        cards.append({
+            "title": card.metric,
+            "value": value,
+            "value_text": f"{value:{card.value_format}}{card.suffix}",
+            "change_text": change_text,
+            "change_color": change_color
+        })
+    return cards
@@ -0,0 +1,72 @@
+# -------------------------------
+# Imports
+# -------------------------------
+import pandas as pd
+
+from config import PROGRAMS, SHEET_SCHEMAS, coerce_frame
+
+# -------------------------------
+# Program Labels
+# -------------------------------
+
+ALL_PROGRAMS = "All Programs"
+
+
+def format_program(program):
+    """Label a program partition as "Name (Campus)" for program filters."""
+    if program == ALL_PROGRAMS:
+        return ALL_PROGRAMS
+    info = PROGRAMS[program]
+    return f"{info['name']} ({info['campus']})" if info.get("campus") else info["name"]
+
+
+# -------------------------------
+# Per-partition Aggregates
+# -------------------------------
+# A program's summary holds its count columns summed per year. Summaries
+# are tiny compared to the raw sheets, so the all-programs rollup is built
+# from them instead of from every partition's raw rows.
+
+def _count_columns(sheet_key):
+    return [col for col, dtype in SHEET_SCHEMAS[sheet_key].items() if dtype != "year"]
+
+
+def summarize_partition(frames):
+    """Sum every count column per year for each sheet of one partition."""
+    summary = {}
+    for sheet_key, df in frames.items():
+        if sheet_key not in SHEET_SCHEMAS:
+            continue
+        columns = _count_columns(sheet_key)
+        summary[sheet_key] = (
+            df[df["Year"].notna()]
+            .groupby("Year", observed=True)[columns]
+            .sum(min_count=1)
+            .reset_index()
+        )
+    return summary
+
+
+def combine_summaries(summaries):
+    """
+    Add up partition summaries into one set of frames typed like the
+    per-partition sheets, so every metric function works on the rollup.
+    """
+    rollup = {}
+    for sheet_key in SHEET_SCHEMAS:
+        parts = [
+            summary[sheet_key].assign(Year=summary[sheet_key]["Year"].astype("Int16"))
+            for summary in summaries if sheet_key in summary
+        ]
+        if not parts:
+            rollup[sheet_key] = coerce_frame(pd.DataFrame(columns=list(SHEET_SCHEMAS[sheet_key])), sheet_key)
+            continue
+
+        combined = (
+            pd.concat(parts, ignore_index=True)
+            .groupby("Year")[_count_columns(sheet_key)]
+            .sum(min_count=1)
+            .reset_index()
+        )
+        rollup[sheet_key] = coerce_frame(combined, sheet_key)
+    return rollup
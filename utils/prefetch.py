@@ -0,0 +1,70 @@
+# -------------------------------
+# Imports
+# -------------------------------
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from config import DEFAULT_PROGRAM
+from utils.data_cache import (
+    CACHE_TTL_SECONDS,
+    VERSION_CHECK_SECONDS,
+    cached_partitions,
+    prefetch_partition
+)
+
+# -------------------------------
+# Prefetch Settings
+# -------------------------------
+
+# How often each warm program is checked; shorter than VERSION_CHECK_SECONDS
+# so version checks happen here rather than on a page load
+PREFETCH_INTERVAL_SECONDS = VERSION_CHECK_SECONDS / 2
+
+# Reload frames this long before CACHE_TTL_SECONDS would expire them
+REFRESH_AHEAD_SECONDS = min(60, CACHE_TTL_SECONDS / 4)
+
+# Programs fetched in parallel
+PREFETCH_WORKERS = 4
+
+# -------------------------------
+# Background Prefetcher
+# -------------------------------
+# One daemon thread per process keeps the default program warm in the
+# shared data cache, so the first visitor after a deploy reads from memory
+# instead of Google Sheets, and keeps refreshing every program someone has
+# opened since. Programs nobody asked for are never loaded, however many
+# are configured.
+
+_state = {"thread": None}
+_state_lock = threading.Lock()
+
+
+def prefetch_all(pool):
+    """Warm or refresh the default program and every program already loaded once, in parallel."""
+    partitions = dict.fromkeys([DEFAULT_PROGRAM] + cached_partitions())
+    futures = [
+        pool.submit(prefetch_partition, partition, REFRESH_AHEAD_SECONDS)
+        for partition in partitions
+    ]
+    wait(futures)
+
+
+def _run():
+    with ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="sheet-prefetch") as pool:
+        while True:
+            try:
+                prefetch_all(pool)
+            except Exception:
+                pass  # A failed round is retried on the next tick
+            time.sleep(PREFETCH_INTERVAL_SECONDS)
+
+
+def start_prefetcher():
+    """Start the process-wide prefetcher once; later calls are no-ops."""
+    with _state_lock:
+        if _state["thread"] is not None:
+            return False
+        _state["thread"] = threading.Thread(target=_run, name="sheet-prefetcher", daemon=True)
+        _state["thread"].start()
+        return True
@@ -0,0 +1,179 @@
+# -------------------------------
+# Imports
+# -------------------------------
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from config import RECORD_COLUMNS, SHEET_COLUMNS, YEAR_LEVELS, coerce_frame
+from utils.importer import CHUNK_ROWS, MAX_REPORTED_ERRORS, _match_columns, iter_file_chunks
+
+# -------------------------------
+# Per-student Records
+# -------------------------------
+# Instead of hand-entered counts, a program can upload one row per student
+# per academic year enrolled (config.RECORD_COLUMNS). The enrollment,
+# graduation and cohort sheets are derived from them with groupby/pivot
+# operations, so everything downstream (utils.metrics, the dashboard)
+# works unchanged; drop-out follows from the derived enrollment counts.
+#
+# Records are held compactly: Student ID as a categorical, Year as int16,
+# Year Level as int8 and Graduated as bool, about 8 bytes per row plus
+# one string per distinct student.
+
+RECORD_DTYPES = {"Year": "int16", "Year Level": "int8", "Graduated": "bool"}
+
+TRUE_FLAGS = {"1", "true", "yes", "y", "graduated"}
+
+LEVEL_NAMES = {name.lower(): number for number, name in enumerate(YEAR_LEVELS, start=1)}
+
+
+def empty_records():
+    return pd.DataFrame({
+        "Student ID": pd.Categorical([]),
+        **{col: pd.Series(dtype=dtype) for col, dtype in RECORD_DTYPES.items()}
+    })
+
+
+def _text(values):
+    return values.astype(str).str.strip().where(values.notna(), "")
+
+
+def _parse_levels(values):
+    """Year levels as numbers: 1-based integers or YEAR_LEVELS names; NaN if invalid."""
+    text = _text(values)
+    numbers = pd.to_numeric(text, errors="coerce")
+    numbers = numbers.where(numbers.notna(), text.str.lower().map(LEVEL_NAMES))
+    return numbers.where(numbers.isin(range(1, len(YEAR_LEVELS) + 1)))
+
+
+def _parse_flags(values):
+    """Truthy cells (1, true, yes, y, graduated) as True; anything else False."""
+    text = _text(values).str.lower()
+    return text.isin(TRUE_FLAGS) | (pd.to_numeric(text, errors="coerce") == 1)
+
+
+def coerce_records(chunk, first_row=2):
+    """
+    Keep the record columns of a chunk, convert them to compact dtypes and
+    split off rows without a Student ID, an integer Year or a valid level.
+    Returns (valid_rows, errors, rejected_count) like importer.validate_chunk.
+    """
+    mapping = _match_columns(chunk, RECORD_COLUMNS)
+    chunk = chunk[list(mapping)].rename(columns=mapping)
+
+    ids = _text(chunk["Student ID"])
+    years = pd.to_numeric(chunk["Year"], errors="coerce")
+    levels = _parse_levels(chunk["Year Level"])
+
+    checks = {
+        "missing Student ID": ids == "",
+        "missing or non-integer Year": years.isna() | (years % 1 > 0),
+        "invalid Year Level": levels.isna()
+    }
+    bad_rows = pd.concat(checks, axis=1).any(axis=1).to_numpy()
+
+    errors = []
+    for position in bad_rows.nonzero()[0][:MAX_REPORTED_ERRORS]:
+        reasons = [reason for reason, failed in checks.items() if failed.iloc[position]]
+        errors.append(f"Row {first_row + position}: {', '.join(reasons)}")
+
+    keep = ~bad_rows
+    valid = pd.DataFrame({
+        "Student ID": pd.Categorical(ids[keep]),
+        "Year": years[keep].astype("int16"),
+        "Year Level": levels[keep].astype("int8"),
+        "Graduated": _parse_flags(chunk["Graduated"])[keep]
+    })
+    return valid.reset_index(drop=True), errors, int(bad_rows.sum())
+
+
+def read_records_file(file, file_name, chunk_rows=CHUNK_ROWS, on_progress=None):
+    """
+    Stream a CSV, Excel or Parquet file of per-student records through
+    coerce_records. Returns a dict shaped like importer.read_import_file.
+    """
+    chunks, errors = [], []
+    rows_read = rejected = 0
+
+    for chunk in iter_file_chunks(file, file_name, chunk_rows):
+        valid, chunk_errors, chunk_rejected = coerce_records(chunk, first_row=rows_read + 2)
+        chunks.append(valid)
+        errors.extend(chunk_errors[:MAX_REPORTED_ERRORS - len(errors)])
+        rows_read += len(chunk)
+        rejected += chunk_rejected
+        if on_progress:
+            on_progress(rows_read)
+
+    if not chunks:
+        return {"data": empty_records(), "rows_read": 0, "rejected": 0, "errors": []}
+
+    # Chunks have their own ID categories; merge them into one
+    ids = union_categoricals([chunk["Student ID"] for chunk in chunks])
+    data = pd.concat([chunk.drop(columns="Student ID") for chunk in chunks], ignore_index=True)
+    data.insert(0, "Student ID", ids)
+    return {"data": data, "rows_read": rows_read, "rejected": rejected, "errors": errors}
+
+# -------------------------------
+# Sheet Derivation
+# -------------------------------
+
+def _to_frame(counts, sheet_key):
+    """Year-indexed counts -> a frame typed like a loaded sheet."""
+    df = counts.rename_axis("Year").reset_index()
+    return coerce_frame(df[SHEET_COLUMNS[sheet_key]], sheet_key)
+
+
+def records_to_frames(records):
+    """
+    Derive the enrollment, graduation and cohort sheets from per-student
+    records, typed like data_cache.load_sheet_data frames:
+
+    - enrollment: students per Year and level (a student counted once a
+      year, at the highest level recorded for that year)
+    - graduation: students in the final level each Year, and those who
+      graduated that Year exactly len(YEAR_LEVELS) - 1 years after
+      entering the first level (on time)
+    - cohort: students entering the first level each Year, and how many of
+      them have graduated since
+
+    Students never recorded in the first level (transferees) count toward
+    enrollment and graduating students but belong to no cohort.
+    """
+    final_level = len(YEAR_LEVELS)
+
+    # One row per student and year; students are grouped by their integer
+    # category codes, which is much cheaper than by ID strings
+    records = records.assign(**{"Student ID": records["Student ID"].astype("category").cat.codes})
+    records = records.sort_values(["Year", "Year Level", "Graduated"]).drop_duplicates(
+        ["Student ID", "Year"], keep="last"
+    )
+
+    enrollment = (
+        records.groupby(["Year", "Year Level"]).size()
+        .unstack(fill_value=0)
+        .reindex(columns=range(1, final_level + 1), fill_value=0)
+    )
+    enrollment.columns = YEAR_LEVELS
+
+    # Per student: year entering the first level, year graduated (NaN if not)
+    students = pd.DataFrame({
+        "entry": records[records["Year Level"] == 1].groupby("Student ID")["Year"].min(),
+        "graduated": records[records["Graduated"]].groupby("Student ID")["Year"].min()
+    })
+
+    on_time = students[students["graduated"] - students["entry"] == final_level - 1]
+    graduation = pd.DataFrame({
+        "No. Graduating Students": records[records["Year Level"] == final_level].groupby("Year").size(),
+        "No. Graduates who graduated on time": on_time.groupby("graduated").size()
+    }).fillna(0)
+
+    cohort = students.dropna(subset=["entry"]).groupby("entry").agg(**{
+        "Cohort Enrollment": ("entry", "size"),
+        "Cohort Graduates": ("graduated", "count")
+    })
+
+    return {
+        "enrollment": _to_frame(enrollment, "enrollment"),
+        "graduation": _to_frame(graduation, "graduation"),
+        "cohort": _to_frame(cohort, "cohort")
+    }
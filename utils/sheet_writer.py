@@ -0,0 +1,179 @@
+# -------------------------------
+# Write Settings
+# -------------------------------
+
+# Largest number of consecutive rows sent as one range
+BLOCK_ROWS = 5_000
+
+# Cells per values:batchUpdate request, keeping bulk imports under the
+# API's request size limit
+MAX_CELLS_PER_REQUEST = 100_000
+
+# -------------------------------
+# Grid Conversion
+# -------------------------------
+
+def frame_to_grid(df):
+    """
+    Convert a DataFrame to the header + string rows layout cells are
+    compared in; build_value_ranges sends whole numbers as numbers.
+    """
+    values = df.astype(object).where(df.notna(), "").astype(str)
+    return [df.columns.tolist()] + values.values.tolist()
+
+
+def _cell_value(value):
+    """
+    A grid cell as sent with RAW input: whole numbers as numbers, so sheet
+    formulas count them, and anything else (blanks, labels) unchanged.
+    """
+    if not isinstance(value, str):
+        return value
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    return int(number) if number.is_integer() else value
+
+
+def _pad(grid, rows, cols):
+    """Pad a ragged grid with blanks to exactly rows x cols."""
+    padded = [list(row) + [""] * (cols - len(row)) for row in grid]
+    padded += [[""] * cols for _ in range(rows - len(grid))]
+    return padded
+
+
+
+def keep_untouched(new_grid, shown_grid, stored_grid):
+    """
+    The grid to diff against the stored one: the edited values, except
+    that a cell still showing what was loaded keeps its stored value. Cells
+    coercion could not show as they are (a "Total" label in the Year column,
+    an unparsed count) are then left alone unless edited or removed.
+    """
+    merged = []
+    for r, row in enumerate(new_grid):
+        shown = shown_grid[r] if r < len(shown_grid) else []
+        stored = stored_grid[r] if r < len(stored_grid) else []
+        merged.append([
+            (stored[c] if c < len(stored) else "") if c < len(shown) and str(value) == str(shown[c]) else value
+            for c, value in enumerate(row)
+        ])
+    return merged
+
+# -------------------------------
+# Cell Diffing
+# -------------------------------
+
+def diff_grids(old_grid, new_grid):
+    """
+    Compare two grids cell by cell and return the changed runs as
+    (row, col, values) tuples with 1-based row/col of the first cell.
+
+    Both grids are padded to the larger extent, so appended rows show up
+    as new values and removed rows as runs of blanks that clear them.
+    """
+    rows = max(len(old_grid), len(new_grid))
+    cols = max([len(row) for row in old_grid + new_grid] or [0])
+    old_grid, new_grid = _pad(old_grid, rows, cols), _pad(new_grid, rows, cols)
+
+    runs = []
+    for r in range(rows):
+        old_row, new_row = old_grid[r], new_grid[r]
+        c = 0
+        while c < cols:
+            if str(old_row[c]) == str(new_row[c]):
+                c += 1
+                continue
+            start = c
+            while c < cols and str(old_row[c]) != str(new_row[c]):
+                c += 1
+            runs.append((r + 1, start + 1, new_row[start:c]))
+    return runs
+
+
+def _to_blocks(runs, max_rows=BLOCK_ROWS):
+    """Merge runs spanning the same columns on consecutive rows into blocks."""
+    blocks = []
+    for row, col, values in runs:
+        if blocks:
+            last_row, last_col, last_values = blocks[-1]
+            if (
+                last_col == col
+                and len(last_values[0]) == len(values)
+                and last_row + len(last_values) == row
+                and len(last_values) < max_rows
+            ):
+                last_values.append(values)
+                continue
+        blocks.append((row, col, [values]))
+    return blocks
+
+
+def build_value_ranges(sheet_range, runs):
+    """Turn changed runs into values:batchUpdate data entries for one sheet."""
+    from gspread.utils import rowcol_to_a1
+
+    return [
+        {
+            "range": (
+                f"{sheet_range}!{rowcol_to_a1(row, col)}:"
+                f"{rowcol_to_a1(row + len(values) - 1, col + len(values[0]) - 1)}"
+            ),
+            "values": [[_cell_value(value) for value in row_values] for row_values in values]
+        }
+        for row, col, values in _to_blocks(runs)
+    ]
+
+
+def _split_requests(data, max_cells=MAX_CELLS_PER_REQUEST):
+    """Group data entries into request bodies of bounded size."""
+    batch, cells = [], 0
+    for entry in data:
+        size = len(entry["values"]) * len(entry["values"][0])
+        if batch and cells + size > max_cells:
+            yield batch
+            batch, cells = [], 0
+        batch.append(entry)
+        cells += size
+    if batch:
+        yield batch
+
+# -------------------------------
+# Batched Write
+# -------------------------------
+
+def write_changes(workbook, ranges, baseline, edited, grids=None):
+    """
+    Write only what changed between the baseline and edited frames.
+
+    grids, if given, are the raw values grids the baseline frames were
+    coerced from (config.fetch_all_values); edits are then diffed against
+    what is actually stored, so cells coercion blanked out can be cleared.
+
+    Unchanged sheets are skipped; all changed cells of all sheets go out in
+    a single values:batchUpdate call (split only for very large imports).
+    Returns the keys of the sheets that were written.
+    """
+    data = []
+    changed_sheets = []
+    for sheet_key, df in edited.items():
+        old_df = baseline.get(sheet_key)
+        new_grid = frame_to_grid(df)
+        if grids is not None and sheet_key in grids:
+            old_grid = grids[sheet_key]
+            if old_df is not None:
+                new_grid = keep_untouched(new_grid, frame_to_grid(old_df), old_grid)
+        else:
+            old_grid = frame_to_grid(old_df) if old_df is not None else []
+            if old_df is not None and old_df.empty and not df.empty:
+                old_grid = []  # An empty baseline may stand in for a blank sheet; rewrite the header too
+        runs = diff_grids(old_grid, new_grid)
+        if runs:
+            changed_sheets.append(sheet_key)
+            data.extend(build_value_ranges(ranges[sheet_key], runs))
+
+    for batch in _split_requests(data):
+        workbook.values_batch_update({"valueInputOption": "RAW", "data": batch})
+
+    return changed_sheets
@@ -0,0 +1,75 @@
+# -------------------------------
+# Imports
+# -------------------------------
+import json
+import os
+
+import pandas as pd
+
+from config import SNAPSHOT_DIR, coerce_frame
+
+# -------------------------------
+# Local Parquet Snapshot
+# -------------------------------
+# The last good copy of every sheet is kept on disk so a freshly started
+# process can render immediately while Google Sheets is refreshed.
+
+META_FILE = "meta.json"
+
+
+def _snapshot_dir(partition):
+    return SNAPSHOT_DIR / partition
+
+
+def _snapshot_path(partition, sheet_key):
+    return _snapshot_dir(partition) / f"{sheet_key}.parquet"
+
+
+def _to_arrow_safe(df):
+    """Cast mixed-type object columns to strings so Parquet can store them."""
+    df = df.copy()
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].astype(str)
+    return df
+
+
+def write_snapshot(partition, frames, version, fetched_at):
+    """Write a partition's frames plus version metadata, replacing files atomically."""
+    _snapshot_dir(partition).mkdir(parents=True, exist_ok=True)
+
+    for sheet_key, df in frames.items():
+        path = _snapshot_path(partition, sheet_key)
+        tmp_path = path.with_suffix(".tmp")
+        _to_arrow_safe(df).to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    meta = {
+        "version": version,
+        "fetched_at": fetched_at,
+        "sheets": list(frames)
+    }
+    meta_path = _snapshot_dir(partition) / META_FILE
+    tmp_path = meta_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(meta), encoding="utf-8")
+    os.replace(tmp_path, meta_path)
+
+
+def read_snapshot(partition):
+    """
+    Return (frames, meta) from a partition's last snapshot, or None if there
+    is no complete snapshot on disk.
+    """
+    meta_path = _snapshot_dir(partition) / META_FILE
+    if not meta_path.exists():
+        return None
+
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    frames = {}
+    for sheet_key in meta["sheets"]:
+        path = _snapshot_path(partition, sheet_key)
+        if not path.exists():
+            return None
+        # Parquet does not keep the categorical Year, so re-apply the schema
+        frames[sheet_key] = coerce_frame(pd.read_parquet(path), sheet_key)
+
+    return frames, meta
@@ -0,0 +1,322 @@
+# -------------------------------
+# Imports
+# -------------------------------
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+from config import (
+    PROGRAMS,
+    SHEET_COLUMNS,
+    SQLITE_PATH,
+    STORAGE_BACKEND,
+    coerce_frame,
+    fetch_all_values,
+    get_gspread_client,
+    get_sheet_ranges,
+    values_to_frame
+)
+from utils.partitions import summarize_partition, combine_summaries, _count_columns
+from utils.sheet_writer import frame_to_grid, write_changes
+from utils.telemetry import increment, span
+
+# -------------------------------
+# Storage Backend Interface
+# -------------------------------
+# Every read and write of program data goes through one backend object.
+# Frames always come back typed by SHEET_SCHEMAS, whatever the engine, so
+# the cache, metrics and pages do not know where the data lives. gspread
+# and requests are only imported once Google Sheets (or the fake) is used,
+# so SQLite storage runs without them.
+
+class StorageBackend:
+    """Base backend; aggregations default to pandas over loaded frames."""
+
+    name = None
+
+    def version(self, partition):
+        """Return a value that changes whenever the partition's data does."""
+        raise NotImplementedError
+
+    def read_frames(self, partition):
+        """Return {sheet_key: typed DataFrame} for one program."""
+        raise NotImplementedError
+
+    def read_grids(self, partition):
+        """Return {sheet_key: values grid} as stored, header row first and uncoerced."""
+        return self.read_sheets(partition)[1]
+
+    def read_sheets(self, partition):
+        """Return (frames, grids) as read_frames and read_grids would, from one read."""
+        frames = self.read_frames(partition)
+        return frames, {sheet_key: frame_to_grid(df) for sheet_key, df in frames.items()}
+
+    def write_changes(self, partition, baseline, edited, grids=None):
+        """
+        Persist edited frames; returns the keys of the sheets that changed.
+        grids, if given, are the stored values the baseline was read from
+        (see read_grids).
+        """
+        raise NotImplementedError
+
+    def reset(self, partition):
+        """Forget per-partition handles after the data was changed elsewhere."""
+
+    def summarize(self, partition, frames):
+        """Per-year sums of every count column (see utils.partitions)."""
+        return summarize_partition(frames)
+
+    def rollup(self, partitions, summaries):
+        """Per-year sums over several programs, typed like one program's frames."""
+        return combine_summaries(summaries)
+
+    def read_rollup(self, partitions):
+        """
+        Read per-year sums over one or more programs straight from storage,
+        with no cache in between. Returns (versions, frames); versions is a
+        tuple of (partition, version) pairs, each read before its data.
+        """
+        versions, summaries = [], []
+        for partition in partitions:
+            versions.append((partition, self.version(partition)))
+            summaries.append(self.summarize(partition, self.read_frames(partition)))
+        return tuple(versions), self.rollup(partitions, summaries)
+
+# -------------------------------
+# Google Sheets Backend
+# -------------------------------
+
+# Quota (429) and server (5xx) errors and dropped connections are retried
+# with exponential backoff and jitter; anything else fails immediately
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRY_ATTEMPTS = 5
+RETRY_INITIAL_SECONDS = 1.0
+RETRY_MAX_SECONDS = 32.0
+
+
+def _is_retryable(error):
+    import requests
+    from gspread.exceptions import APIError
+
+    if isinstance(error, APIError):
+        return error.code in RETRY_STATUS_CODES
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+def _call(call, func, *args):
+    """Run one Sheets API call with retries, timing it and counting it by name."""
+    retrying = Retrying(
+        retry=retry_if_exception(_is_retryable),
+        wait=wait_exponential_jitter(initial=RETRY_INITIAL_SECONDS, max=RETRY_MAX_SECONDS),
+        stop=stop_after_attempt(RETRY_ATTEMPTS),
+        before_sleep=lambda state: increment("api_retries", call=call),
+        reraise=True
+    )
+    with span(f"sheets.{call}"):
+        result = retrying(func, *args)
+    increment("api_calls", call=call)
+    return result
+
+
+class SheetsBackend(StorageBackend):
+    """One spreadsheet per program, read and written in batched requests."""
+
+    name = "sheets"
+
+    def __init__(self, client=None):
+        self._client = client
+        self._workbooks = {}
+        self._ranges = {}
+        self._lock = threading.Lock()
+
+    def client(self):
+        """Return the authorized gspread client, creating it once."""
+        with self._lock:
+            if self._client is None:
+                self._client = _call("auth", get_gspread_client)
+            return self._client
+
+    def workbook(self, partition):
+        """Return a program's opened spreadsheet, opening it once."""
+        if partition not in self._workbooks:
+            workbook = _call("open", self.client().open, PROGRAMS[partition]["spreadsheet"])
+            self._workbooks.setdefault(partition, workbook)
+        return self._workbooks[partition]
+
+    def ranges(self, partition):
+        """Return the A1 range of every configured worksheet, resolving it once."""
+        if partition not in self._ranges:
+            self._ranges[partition] = _call("metadata", get_sheet_ranges, self.workbook(partition))
+        return self._ranges[partition]
+
+    def version(self, partition):
+        return _call("version", self.workbook(partition).get_lastUpdateTime)
+
+    def read_frames(self, partition):
+        return self.read_sheets(partition)[0]
+
+    def read_grids(self, partition):
+        workbook, ranges = self.workbook(partition), self.ranges(partition)
+        return _call("read", fetch_all_values, workbook, ranges)
+
+    def read_sheets(self, partition):
+        grids = self.read_grids(partition)
+        return {sheet_key: values_to_frame(values, sheet_key) for sheet_key, values in grids.items()}, grids
+
+    def write_changes(self, partition, baseline, edited, grids=None):
+        # Values are written, not appended, so retrying a partial write is safe
+        workbook, ranges = self.workbook(partition), self.ranges(partition)
+        return _call("write", write_changes, workbook, ranges, baseline, edited, grids)
+
+    def reset(self, partition):
+        self._ranges.pop(partition, None)
+
+# -------------------------------
+# Local SQLite Backend
+# -------------------------------
+# One table per (program, sheet) in a single database file, plus a version
+# table bumped on every write. Works offline and without credentials.
+# Reading sums straight from storage (read_rollup) runs them as SQL, in
+# the same transaction as the version read, instead of loading every row.
+# The cache keeps building its sums from the frames it holds, like any
+# backend, so they always match those frames' version.
+
+def _quote(identifier):
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def _table(partition, sheet_key):
+    return _quote(f"{partition}__{sheet_key}")
+
+
+class SQLiteBackend(StorageBackend):
+    """Program data in a local SQLite file (config.SQLITE_PATH)."""
+
+    name = "sqlite"
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection for one operation; commits on success."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS data_version (partition TEXT PRIMARY KEY, version TEXT)")
+                yield conn
+        finally:
+            conn.close()
+
+    def _exists(self, conn, partition, sheet_key):
+        row = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (f"{partition}__{sheet_key}",)
+        ).fetchone()
+        return row is not None
+
+    def _version(self, conn, partition):
+        row = conn.execute("SELECT version FROM data_version WHERE partition = ?", (partition,)).fetchone()
+        return row[0] if row else None
+
+    def version(self, partition):
+        with span("sqlite.version"), self._connect() as conn:
+            return self._version(conn, partition)
+
+    def read_frames(self, partition):
+        frames = {}
+        with span("sqlite.read"), self._connect() as conn:
+            for sheet_key, columns in SHEET_COLUMNS.items():
+                if self._exists(conn, partition, sheet_key):
+                    df = pd.read_sql_query(f"SELECT * FROM {_table(partition, sheet_key)} ORDER BY rowid", conn)
+                else:
+                    df = pd.DataFrame(columns=columns)
+                frames[sheet_key] = coerce_frame(df, sheet_key)
+        return frames
+
+    def replace_frames(self, partition, frames):
+        """Overwrite whole sheets in one transaction, e.g. to seed from Google Sheets."""
+        with span("sqlite.write"), self._connect() as conn:
+            for sheet_key, df in frames.items():
+                if "Year" in df.columns:
+                    # Store years as integers, not as categorical labels
+                    df = df.assign(Year=pd.to_numeric(df["Year"].astype(object), errors="coerce").astype("Int64"))
+                df.to_sql(f"{partition}__{sheet_key}", conn, if_exists="replace", index=False)
+            conn.execute(
+                "INSERT OR REPLACE INTO data_version (partition, version) VALUES (?, ?)",
+                (partition, str(time.time_ns()))
+            )
+
+    def write_changes(self, partition, baseline, edited, grids=None):
+        # Stored values are already typed, so the baseline is what is stored
+        changed = [
+            sheet_key for sheet_key, df in edited.items()
+            if sheet_key not in baseline or frame_to_grid(baseline[sheet_key]) != frame_to_grid(df)
+        ]
+        if changed:
+            # Local writes are cheap, so changed sheets are rewritten whole
+            self.replace_frames(partition, {sheet_key: edited[sheet_key] for sheet_key in changed})
+        return changed
+
+    def _sum_by_year_sql(self, tables, sheet_key):
+        """SELECT summing the count columns per Year over one or more tables."""
+        sums = ", ".join(f"SUM({_quote(col)}) AS {_quote(col)}" for col in _count_columns(sheet_key))
+        columns = ", ".join(_quote(col) for col in SHEET_COLUMNS[sheet_key])
+        source = " UNION ALL ".join(f"SELECT {columns} FROM {table}" for table in tables)
+        return (
+            f"SELECT Year, {sums} FROM ({source}) "
+            f"WHERE Year IS NOT NULL GROUP BY Year ORDER BY Year"
+        )
+
+    def read_rollup(self, partitions):
+        frames = {}
+        with span("sqlite.sums"), self._connect() as conn:
+            # One read transaction, so the sums are of the versions returned
+            conn.execute("BEGIN")
+            versions = tuple((partition, self._version(conn, partition)) for partition in partitions)
+            for sheet_key, columns in SHEET_COLUMNS.items():
+                tables = [
+                    _table(partition, sheet_key) for partition in partitions
+                    if self._exists(conn, partition, sheet_key)
+                ]
+                if tables:
+                    df = pd.read_sql_query(self._sum_by_year_sql(tables, sheet_key), conn)
+                else:
+                    df = pd.DataFrame(columns=columns)
+                frames[sheet_key] = coerce_frame(df, sheet_key)
+        return versions, frames
+
+# -------------------------------
+# Backend Selection
+# -------------------------------
+
+def _fake_backend():
+    from utils.fake_sheets import FakeClient
+
+    return SheetsBackend(FakeClient.from_env())
+
+
+BACKENDS = {
+    "sheets": SheetsBackend,
+    "sqlite": SQLiteBackend,
+    "fake": _fake_backend
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name=None):
+    """Return the shared backend instance for name (config.STORAGE_BACKEND by default)."""
+    name = name or STORAGE_BACKEND
+    with _backends_lock:
+        if name not in _backends:
+            if name not in BACKENDS:
+                raise ValueError(f"Unknown storage backend '{name}'. Use one of: {', '.join(BACKENDS)}")
+            _backends[name] = BACKENDS[name]()
+        return _backends[name]
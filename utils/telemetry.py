@@ -0,0 +1,198 @@
+# -------------------------------
+# Imports
+# -------------------------------
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# -------------------------------
+# Telemetry Settings
+# -------------------------------
+
+# Durations kept per span / page for percentiles
+MAX_SAMPLES = 2_000
+
+# Completed page runs kept for the debug panel and JSON lines export
+MAX_RUNS = 500
+
+# When set, every completed page run is appended to this file as one JSON line
+METRICS_LOG_PATH = os.environ.get("DASHBOARD_METRICS_LOG")
+
+QUANTILES = [0.5, 0.9, 0.99]
+
+# -------------------------------
+# Process-wide Telemetry State
+# -------------------------------
+# Spans are timed stages (a Sheets read, a metric computation...). Each one
+# is added to process-wide samples and, when it happens inside a page run,
+# to that run's breakdown. A page run is one Streamlit rerun of one page;
+# Streamlit runs every session's script on its own thread, so the current
+# run is thread-local and background threads only feed the process totals.
+
+_lock = threading.Lock()
+_counters = defaultdict(int)                                # (name, labels) -> count
+_span_samples = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+_page_samples = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+_runs = deque(maxlen=MAX_RUNS)
+_local = threading.local()
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+# -------------------------------
+# Recording
+# -------------------------------
+
+def increment(name, amount=1, **labels):
+    """Add to a counter, e.g. increment("api_calls", call="read")."""
+    with _lock:
+        _counters[(name, _labels(labels))] += amount
+
+
+def record_span(name, seconds):
+    """Record a finished stage duration."""
+    with _lock:
+        _span_samples[name].append(seconds)
+    run = getattr(_local, "run", None)
+    if run is not None:
+        run["spans"].append((name, seconds))
+
+
+@contextmanager
+def span(name):
+    """Time the enclosed block as one stage: `with span("sheets.read"): ...`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - start)
+
+
+@contextmanager
+def page_run(page):
+    """Time one rerun of a page and collect the spans recorded inside it."""
+    run = {"page": page, "started_at": time.time(), "spans": []}
+    _local.run = run
+    start = time.perf_counter()
+    try:
+        yield run
+    finally:
+        run["seconds"] = time.perf_counter() - start
+        _local.run = None
+        with _lock:
+            _page_samples[page].append(run["seconds"])
+            _runs.append(run)
+        if METRICS_LOG_PATH:
+            try:
+                with open(METRICS_LOG_PATH, "a", encoding="utf-8") as log:
+                    log.write(_run_to_json(run) + "\n")
+            except OSError:
+                pass  # Metrics logging must never break a page
+
+
+def last_run():
+    """Return the most recent completed page run on this process, or None."""
+    with _lock:
+        return _runs[-1] if _runs else None
+
+# -------------------------------
+# Summaries
+# -------------------------------
+
+def _quantile(values, q):
+    """Linearly interpolated quantile of sorted values (numpy's default method)."""
+    position = (len(values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def _quantiles(samples):
+    # Plain Python, so the app shell can record telemetry without numpy
+    values = sorted(float(value) for value in samples)
+    return {q: _quantile(values, q) for q in QUANTILES}
+
+
+def summary():
+    """
+    Return counters and latency summaries as plain data:
+    {"counters": [...], "spans": {...}, "pages": {...}}.
+    """
+    with _lock:
+        counters = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in sorted(_counters.items())
+        ]
+        spans = {name: list(samples) for name, samples in _span_samples.items() if samples}
+        pages = {page: list(samples) for page, samples in _page_samples.items() if samples}
+
+    def describe(samples):
+        return {"count": len(samples), "sum": float(sum(samples)), "quantiles": _quantiles(samples)}
+
+    return {
+        "counters": counters,
+        "spans": {name: describe(samples) for name, samples in sorted(spans.items())},
+        "pages": {page: describe(samples) for page, samples in sorted(pages.items())}
+    }
+
+# -------------------------------
+# Export Formats
+# -------------------------------
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prom_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _prom_summary(lines, metric, label_key, described):
+    lines.append(f"# TYPE {metric} summary")
+    for key, stats in described.items():
+        for q, value in stats["quantiles"].items():
+            lines.append(f"{metric}{_prom_labels({label_key: key, 'quantile': q})} {value:.6f}")
+        lines.append(f"{metric}_sum{_prom_labels({label_key: key})} {stats['sum']:.6f}")
+        lines.append(f"{metric}_count{_prom_labels({label_key: key})} {stats['count']}")
+
+
+def to_prometheus():
+    """Render counters and latency summaries in Prometheus text format."""
+    data = summary()
+    lines = []
+
+    seen = set()
+    for counter in data["counters"]:
+        metric = f"dashboard_{counter['name']}_total"
+        if metric not in seen:
+            lines.append(f"# TYPE {metric} counter")
+            seen.add(metric)
+        lines.append(f"{metric}{_prom_labels(counter['labels'])} {counter['value']}")
+
+    _prom_summary(lines, "dashboard_page_seconds", "page", data["pages"])
+    _prom_summary(lines, "dashboard_span_seconds", "span", data["spans"])
+    return "\n".join(lines) + "\n"
+
+
+def _run_to_json(run):
+    return json.dumps({
+        "ts": run["started_at"],
+        "page": run["page"],
+        "seconds": run["seconds"],
+        "spans": [{"name": name, "seconds": seconds} for name, seconds in run["spans"]]
+    })
+
+
+def to_json_lines():
+    """Render recent page runs, then the current counters, as JSON lines."""
+    with _lock:
+        runs = list(_runs)
+    lines = [_run_to_json(run) for run in runs]
+    lines += [json.dumps({"counter": c["name"], **c["labels"], "value": c["value"]}) for c in summary()["counters"]]
+    return "\n".join(lines) + "\n"